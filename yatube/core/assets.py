@@ -0,0 +1,137 @@
+"""Отдача собранной статики из ``STATIC_ROOT``.
+
+При старте процесса ``StaticFilesMiddleware`` один раз обходит
+``STATIC_ROOT`` и запоминает каждый файл вместе с его сжатыми копиями
+(``.br``, ``.gz`` из ``core.storage``). Запрос отдаётся по этому индексу:
+путь вне индекса в файловую систему не попадает, а файлы, собранные уже
+после старта, станут видны после перезапуска.
+
+Из копий выбирается лучшая, которую клиент принимает по
+``Accept-Encoding``. Файлы с хешем в имени (из манифеста
+``staticfiles.json``) получают годовой ``Cache-Control: immutable``,
+остальные — ``STATIC_MAX_AGE`` секунд и проверку по ``ETag``.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Расширение копии и Content-Encoding, от лучшего сжатия к худшему
+ENCODINGS = ((".br", "br"), (".gz", "gzip"))
+
+
+class Variant:
+    __slots__ = ("path", "encoding", "size", "etag", "last_modified")
+
+    def __init__(self, path, encoding=None):
+        stat = os.stat(path)
+        self.path = path
+        self.encoding = encoding
+        self.size = stat.st_size
+        self.etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        self.last_modified = http_date(stat.st_mtime)
+
+
+class StaticFile:
+    def __init__(self, path, content_type, cache_control):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.variants = [
+            Variant(path + suffix, encoding)
+            for suffix, encoding in ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+        self.original = Variant(path)
+
+    def choose(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for variant in self.variants:
+            if variant.encoding in accepted:
+                return variant
+        return self.original
+
+
+def accepted_encodings(header):
+    """Кодировки из ``Accept-Encoding``, кроме запрещённых ``q=0``."""
+    accepted, refused = set(), set()
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else refused).add(coding)
+    if "*" in accepted:
+        accepted.update(encoding for _, encoding in ENCODINGS)
+    return accepted - refused
+
+
+def content_type(name):
+    guessed, _ = mimetypes.guess_type(name)
+    guessed = guessed or "application/octet-stream"
+    if guessed.startswith("text/") or guessed in (
+        "application/javascript", "image/svg+xml", "application/json",
+    ):
+        return f"{guessed}; charset=utf-8"
+    return guessed
+
+
+def build_index(root, url_prefix):
+    """Словарь «URL → StaticFile» для всех файлов в ``root``."""
+    hashed = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+    suffixes = tuple(suffix for suffix, _ in ENCODINGS)
+    index = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            # Сжатая копия без оригинала рядом отдельно не отдаётся
+            if (
+                name.endswith(suffixes)
+                and os.path.isfile(os.path.splitext(path)[0])
+            ):
+                continue
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            index[url_prefix + relative] = StaticFile(
+                path,
+                content_type(name),
+                IMMUTABLE if relative in hashed
+                else f"public, max-age={settings.STATIC_MAX_AGE}",
+            )
+    return index
+
+
+def not_modified(request, variant):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        return "*" in etags or variant.etag in etags
+    return request.headers.get("If-Modified-Since") == variant.last_modified
+
+
+def serve(request, static_file):
+    variant = static_file.choose(request.headers.get("Accept-Encoding", ""))
+    if not_modified(request, variant):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(variant.path, "rb"), content_type=static_file.content_type
+        )
+        response["Content-Length"] = variant.size
+        if variant.encoding:
+            response["Content-Encoding"] = variant.encoding
+    response["ETag"] = variant.etag
+    response["Last-Modified"] = variant.last_modified
+    response["Cache-Control"] = static_file.cache_control
+    if static_file.variants:
+        response["Vary"] = "Accept-Encoding"
+    return response
@@ -0,0 +1,31 @@
+"""SQLite с выбором режима транзакций.
+
+Django 4.2 начинает транзакцию обычным ``BEGIN`` (DEFERRED): блокировка на
+запись берётся только при первом изменении, и если другой процесс успел
+записать раньше, SQLite сразу отвечает «database is locked», не дожидаясь
+``busy_timeout``. С ``OPTIONS['transaction_mode'] = 'IMMEDIATE'``
+транзакция сразу встаёт в очередь писателей, как ``transaction_mode`` в
+Django 5.1.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        mode = params.pop("transaction_mode", None)
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode должен быть одним из {TRANSACTION_MODES}."
+            )
+        self.transaction_mode = mode.upper() if mode else None
+        return params
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f"BEGIN {self.transaction_mode}")
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends import filebased, locmem
+from django.utils.connection import ConnectionProxy
+
+from . import metrics
+
+SHARED_ALIAS = "shared"
+
+# Кэш, общий для всех процессов: маркеры свежести, версии карточек и
+# наборы подписок должны меняться сразу во всех воркерах, а не только в
+# том, который обработал запись.
+shared_cache = ConnectionProxy(caches, SHARED_ALIAS)
+
+_missing = object()
+
+
+class MetricsCacheMixin:
+    """Считает попадания и промахи ``get``.
+
+    ``BaseCache.get_many`` вызывает ``get`` для каждого ключа, так что
+    пакетные чтения тоже учитываются.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        metrics.record_cache(value is not _missing)
+        return default if value is _missing else value
+
+
+class LocMemCache(MetricsCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(MetricsCacheMixin, filebased.FileBasedCache):
+    """Файловый кэш, в котором запись не обходит весь каталог.
+
+    Django сверяется с ``MAX_ENTRIES`` при каждой записи, перечисляя все
+    файлы, так что запись дорожает с числом записей. Здесь уборка идёт не
+    чаще раза в ``CULL_INTERVAL`` секунд (из ``OPTIONS``) на процесс:
+    сначала удаляются истёкшие записи, а если файлов всё ещё не меньше
+    ``MAX_ENTRIES`` — ``1 / CULL_FREQUENCY`` самых давно записанных, а не
+    случайных.
+    """
+
+    # Когда каждому каталогу пора на уборку (time.monotonic)
+    _next_cull = {}
+    _cull_lock = threading.Lock()
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get("OPTIONS", {})
+        self._cull_interval = options.get("CULL_INTERVAL", 60)
+
+    def _cull(self):
+        now = time.monotonic()
+        with self._cull_lock:
+            if now < self._next_cull.get(self._dir, 0):
+                return
+            self._next_cull[self._dir] = now + self._cull_interval
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        alive = []
+        for fname in filelist:
+            try:
+                written = os.stat(fname).st_mtime
+                with open(fname, "rb") as f:
+                    # Истёкший файл _is_expired удаляет сам
+                    if not self._is_expired(f):
+                        alive.append((written, fname))
+            except FileNotFoundError:
+                continue
+        if len(alive) < self._max_entries:
+            return
+        alive.sort()
+        for _, fname in alive[:len(alive) // self._cull_frequency]:
+            self._delete(fname)
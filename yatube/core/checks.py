@@ -0,0 +1,31 @@
+"""Проверки конфигурации (``manage.py check``)."""
+from django.conf import settings
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+from django.utils.module_loading import import_string
+
+from .cache import SHARED_ALIAS
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    config = settings.CACHES.get(SHARED_ALIAS)
+    if config is None:
+        return [Error(
+            f"Не настроен кэш '{SHARED_ALIAS}'.",
+            hint="Маркеры свежести и версии карточек хранятся в нём.",
+            id="core.E001",
+        )]
+    backend = import_string(config["BACKEND"])
+    if issubclass(backend, (LocMemCache, DummyCache)):
+        return [Error(
+            f"Кэш '{SHARED_ALIAS}' не общий для процессов: "
+            f"{config['BACKEND']}.",
+            hint=(
+                "Запись в одном воркере не сбросит ETag и карточки в "
+                "остальных. Нужен файловый кэш, Redis или база."
+            ),
+            id="core.E002",
+        )]
+    return []
@@ -0,0 +1,56 @@
+"""Настройка SQLite при подключении и повтор транзакций записи.
+
+``apply_sqlite_pragmas`` подключается к ``connection_created`` в
+``CoreConfig.ready`` и выполняет ``settings.SQLITE_PRAGMAS`` (WAL,
+synchronous, busy_timeout и т. д.) на каждом новом соединении SQLite.
+``write_transaction`` оборачивает функцию записи в ``transaction.atomic``
+и повторяет её с экспоненциальной задержкой, если база занята. Им
+оборачивается только сохранение после проверки формы, а не view целиком:
+иначе рендер формы и обработка картинки шли бы под блокировкой записи.
+"""
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+LOCKED_MESSAGES = ("database is locked", "database table is locked")
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def is_locked(error):
+    return any(message in str(error) for message in LOCKED_MESSAGES)
+
+
+def write_transaction(func):
+    """``transaction.atomic`` с повтором при «database is locked».
+
+    Повторяется только внешняя транзакция: внутри чужого atomic-блока
+    ошибка пробрасывается выше, чтобы повтор сделал тот, кто его открыл.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = settings.DB_WRITE_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if (
+                    not is_locked(error)
+                    or attempt == retries
+                    or connection.in_atomic_block
+                ):
+                    raise
+            delay = settings.DB_WRITE_RETRY_DELAY * 2 ** attempt
+            time.sleep(delay * random.uniform(0.5, 1.5))
+
+    return wrapper
@@ -0,0 +1,293 @@
+"""Метрики запросов в формате Prometheus.
+
+Каждый процесс копит счётчики и гистограммы в памяти и не чаще раза в
+``METRICS_FLUSH_INTERVAL`` секунд сбрасывает снимок в свой файл в
+``METRICS_DIR``. Эндпоинт ``/metrics`` складывает снимки всех процессов,
+поэтому значения сходятся при любом числе воркеров. Без ``METRICS_DIR``
+отдаются только данные текущего процесса.
+
+SQL, шаблоны и кэш учитываются в ``RequestStats`` текущего запроса через
+contextvar: он доступен и в потоках ``sync_to_async`` асинхронных view.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "yatube_http_requests_total": (
+        "counter", "Обработанные запросы."
+    ),
+    "yatube_http_request_duration_seconds": (
+        "histogram", "Время обработки запроса."
+    ),
+    "yatube_db_queries_total": (
+        "counter", "Выполненные SQL-запросы."
+    ),
+    "yatube_db_query_duration_seconds_total": (
+        "counter", "Время выполнения SQL-запросов."
+    ),
+    "yatube_template_render_duration_seconds_total": (
+        "counter", "Время отрисовки шаблонов."
+    ),
+    "yatube_cache_hits_total": (
+        "counter", "Попадания в кэш."
+    ),
+    "yatube_cache_misses_total": (
+        "counter", "Промахи кэша."
+    ),
+}
+
+
+class RequestStats:
+    """Затраты одного запроса, которые учитываются по мере выполнения."""
+
+    __slots__ = (
+        "queries", "query_time", "template_time", "cache_hits",
+        "cache_misses",
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+current_stats = ContextVar("current_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper: считает запросы текущего HTTP-запроса."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_template(duration):
+    stats = current_stats.get()
+    if stats is not None:
+        stats.template_time += duration
+
+
+def record_cache(hit):
+    stats = current_stats.get()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def instrument_templates():
+    """Оборачивает отрисовку шаблонов Django замером времени.
+
+    ``render()`` и ``TemplateResponse`` проходят через
+    ``backends.django.Template.render``; вложенные ``include`` — нет,
+    поэтому время не считается дважды.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, "instrumented", False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            record_template(time.perf_counter() - started)
+
+    render.instrumented = True
+    Template.render = render
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.filename = f"{self.pid}-{time.time_ns()}.json"
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.last_flush = time.monotonic()
+
+    def _inc(self, name, labels, value=1):
+        self.counters[(name, labels)] += value
+
+    def observe(self, view, method, status, duration, stats):
+        labels = (("view", view),)
+        with self.lock:
+            if os.getpid() != self.pid:
+                # Процесс-потомок после fork начинает с чистого листа
+                self.reset()
+            self._inc(
+                "yatube_http_requests_total",
+                labels + (("method", method), ("status", str(status))),
+            )
+            key = ("yatube_http_request_duration_seconds", labels)
+            histogram = self.histograms.setdefault(
+                key, [[0] * len(BUCKETS), 0.0, 0]
+            )
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += duration
+            histogram[2] += 1
+            self._inc("yatube_db_queries_total", labels, stats.queries)
+            self._inc(
+                "yatube_db_query_duration_seconds_total",
+                labels,
+                stats.query_time,
+            )
+            self._inc(
+                "yatube_template_render_duration_seconds_total",
+                labels,
+                stats.template_time,
+            )
+            self._inc("yatube_cache_hits_total", labels, stats.cache_hits)
+            self._inc(
+                "yatube_cache_misses_total", labels, stats.cache_misses
+            )
+        self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    [name, list(labels), list(buckets), total, count]
+                    for (name, labels), (buckets, total, count)
+                    in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Сбрасывает снимок процесса в METRICS_DIR, если пора.
+
+        Ошибка записи только пишется в лог: из-за метрик запрос
+        пользователя не должен падать.
+        """
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+            not force
+            and now - self.last_flush < settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        self.last_flush = now
+        # Путь собирается заново: каталог могли удалить или сменить
+        path = os.path.join(directory, self.filename)
+        temporary = f"{path}.tmp"
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(temporary, "w", encoding="utf-8") as output:
+                json.dump(self.snapshot(), output)
+            os.replace(temporary, path)
+        except OSError:
+            logger.exception("Не удалось записать метрики в %s", directory)
+
+
+registry = Registry()
+
+
+def collect():
+    """Снимки всех процессов: из METRICS_DIR или только текущего."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(force=True)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        logger.exception("Не удалось прочитать метрики из %s", directory)
+        return [registry.snapshot()]
+    snapshots = []
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            # Файл удалён или пишется прямо сейчас
+            continue
+    return snapshots
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, buckets, total, count in snapshot["histograms"]:
+            merged = histograms.setdefault(
+                (name, tuple(map(tuple, labels))),
+                [[0] * len(BUCKETS), 0.0, 0],
+            )
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def format_labels(labels):
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def render():
+    """Текст в формате Prometheus exposition 0.0.4."""
+    counters, histograms = merge(collect())
+    series = defaultdict(list)
+    for (name, labels), value in sorted(counters.items()):
+        series[name].append(f"{name}{format_labels(labels)} {value:g}")
+    for (name, labels), (buckets, total, count) in sorted(
+        histograms.items()
+    ):
+        for bound, value in zip(BUCKETS, buckets):
+            bucket_labels = format_labels(labels + (("le", f"{bound:g}"),))
+            series[name].append(f"{name}_bucket{bucket_labels} {value}")
+        inf_labels = format_labels(labels + (("le", "+Inf"),))
+        series[name].append(f"{name}_bucket{inf_labels} {count}")
+        series[name].append(f"{name}_sum{format_labels(labels)} {total:g}")
+        series[name].append(f"{name}_count{format_labels(labels)} {count}")
+    lines = []
+    for name, (kind, description) in HELP.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(series.get(name, ()))
+    return "\n".join(lines) + "\n"
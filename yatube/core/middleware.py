@@ -0,0 +1,170 @@
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+from . import assets, metrics, routers
+
+
+class MetricsMiddleware:
+    """Пишет в метрики время, SQL, шаблоны и кэш каждого запроса.
+
+    Работает и в синхронном, и в асинхронном режиме, чтобы не заставлять
+    Django переключать async view обратно в поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    def start(self):
+        stats = metrics.RequestStats()
+        return stats, metrics.current_stats.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        match = getattr(request, "resolver_match", None)
+        metrics.registry.observe(
+            view=match.view_name if match else "<unresolved>",
+            method=request.method,
+            status=response.status_code,
+            duration=time.perf_counter() - started,
+            stats=stats,
+        )
+
+
+class ReplicaMiddleware:
+    """Направляет чтения read-only view на реплику (``core.routers``).
+
+    После запроса, который что-то записал, пользователь получает cookie
+    и ещё ``REPLICA_PIN_SECONDS`` читает с основной базы — так он сразу
+    видит свой пост или комментарий, даже если реплика отстаёт.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.current_state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.current_state.reset(token)
+        return self.finish(response, state)
+
+    def start(self, request):
+        state = routers.RoutingState(
+            use_replica=(
+                request.method in ("GET", "HEAD")
+                and not self.pinned(request)
+                and self.view_name(request) in settings.REPLICA_READ_VIEWS
+            )
+        )
+        return state, routers.current_state.set(state)
+
+    def finish(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                str(int(time.time()) + settings.REPLICA_PIN_SECONDS),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def pinned(self, request):
+        value = request.COOKIES.get(settings.REPLICA_PIN_COOKIE, "")
+        return value.isdigit() and int(value) > time.time()
+
+    def view_name(self, request):
+        try:
+            return resolve(request.path_info).view_name
+        except Resolver404:
+            return None
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из ``STATIC_ROOT`` (``core.assets``).
+
+    Запросы к ``STATIC_URL`` не доходят до сессий, CSRF и view: файл
+    отдаётся сразу, в сжатом виде, если клиент это принимает. Без
+    ``collectstatic`` или с внешним ``STATIC_URL`` (CDN) middleware
+    отключается.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        root, prefix = settings.STATIC_ROOT, settings.STATIC_URL
+        if not root or not prefix.startswith("/") or not os.path.isdir(root):
+            raise MiddlewareNotUsed
+        self.files = assets.build_index(root, prefix)
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        static_file = self.find(request)
+        if static_file is not None:
+            return assets.serve(request, static_file)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        static_file = self.find(request)
+        if static_file is not None:
+            return assets.serve(request, static_file)
+        return await self.get_response(request)
+
+    def find(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        return self.files.get(request.path_info)
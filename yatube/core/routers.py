@@ -0,0 +1,73 @@
+"""Маршрутизация чтений на реплику с «прилипанием» после записи.
+
+Решение принимает ``core.middleware.ReplicaMiddleware``: для GET на view
+из ``REPLICA_READ_VIEWS`` и пользователя, который недавно ничего не
+писал, чтения моделей из ``REPLICA_APPS`` идут в ``REPLICA_DATABASE``.
+Записи всегда идут в ``default``; первая же запись помечает запрос,
+и middleware закрепляет пользователя за основной базой.
+
+Маркеры свежести меняются сразу после записи, а реплика догоняет позже.
+Поэтому страница, прочитанная с реплики, добавляет к ETag и версиям
+карточек поколение реплики (``replica_generation``): его меняет
+синхронизация, и устаревший ответ не живёт дольше отставания реплики.
+"""
+import uuid
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .cache import shared_cache
+
+GENERATION_KEY = "replica:generation"
+
+
+class RoutingState:
+    __slots__ = ("use_replica", "wrote")
+
+    def __init__(self, use_replica=False):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+current_state = ContextVar("replica_routing_state", default=None)
+
+
+def bump_generation():
+    """Вызывается после каждой синхронизации реплики."""
+    shared_cache.set(GENERATION_KEY, uuid.uuid4().hex[:12], None)
+
+
+def replica_generation():
+    """Поколение реплики, если запрос читает с неё, иначе ``None``."""
+    state = current_state.get()
+    if state is None or not state.use_replica or state.wrote:
+        return None
+    # Неизвестно, насколько отстала реплика: такой ответ не кэшируется
+    return shared_cache.get(GENERATION_KEY) or uuid.uuid4().hex[:12]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current_state.get()
+        if (
+            state is not None
+            and state.use_replica
+            and not state.wrote
+            and model._meta.app_label in settings.REPLICA_APPS
+        ):
+            return settings.REPLICA_DATABASE
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        state = current_state.get()
+        if state is not None:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика — копия основной базы, объекты из обеих совместимы
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает на реплику вместе с данными через sync_replica
+        return db == "default"
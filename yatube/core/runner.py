@@ -0,0 +1,33 @@
+"""Запуск тестов с общим кэшем во временном каталоге.
+
+Тесты пишут в ``core.cache.shared_cache`` и очищают его, поэтому на время
+прогона алиас ``shared`` переводится в свежий каталог и удаляется после:
+кэш рабочей копии или сервера (``YATUBE_SHARED_CACHE_DIR``) не трогается.
+"""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from .cache import SHARED_ALIAS
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.shared_cache_dir = tempfile.mkdtemp(prefix="yatube-shared-")
+        caches = dict(settings.CACHES)
+        caches[SHARED_ALIAS] = {
+            "BACKEND": "core.cache.FileBasedCache",
+            "LOCATION": self.shared_cache_dir,
+            "OPTIONS": caches[SHARED_ALIAS].get("OPTIONS", {}),
+        }
+        self.shared_cache_override = override_settings(CACHES=caches)
+        self.shared_cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.shared_cache_override.disable()
+        shutil.rmtree(self.shared_cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
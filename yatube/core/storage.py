@@ -0,0 +1,101 @@
+"""Хранилище статики с хешами в именах и заранее сжатыми копиями.
+
+``collectstatic`` записывает каждый файл ещё и под именем с хешем
+содержимого (``style.3f1c9a0b2e4d.css``) и ведёт ``staticfiles.json`` —
+соответствие исходных имён хешированным, по которому ``{% static %}``
+строит ссылки. Такие файлы не меняются никогда, поэтому
+``core.middleware.StaticFilesMiddleware`` отдаёт их с годовым
+``Cache-Control: immutable``.
+
+Текстовые форматы из ``STATIC_COMPRESS_EXTENSIONS`` сжимаются рядом с
+оригиналом в ``.gz`` и, если установлен пакет ``brotli``, в ``.br``.
+Копия сохраняется, только если она заметно меньше оригинала.
+"""
+import gzip
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Копия должна быть хотя бы на 5% меньше оригинала
+MIN_RATIO = 0.95
+
+
+def gzip_compress(data):
+    buffer = io.BytesIO()
+    # mtime=0: одинаковый файл — одинаковые байты при каждой сборке
+    with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=9,
+                       mtime=0) as archive:
+        archive.write(data)
+    return buffer.getvalue()
+
+
+def encoders():
+    """Пары (расширение, функция сжатия), доступные в окружении."""
+    found = [(".gz", gzip_compress)]
+    if brotli is not None:
+        found.append((".br", brotli.compress))
+    return found
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def url_converter(self, name, hashed_files, template=None):
+        convert = super().url_converter(name, hashed_files, template)
+
+        def tolerant(matchobj):
+            # Минифицированные библиотеки ссылаются на .map, которых в
+            # репозитории нет: такая ссылка остаётся как есть
+            try:
+                return convert(matchobj)
+            except ValueError as error:
+                logger.warning("%s: %s", name, error)
+                return matchobj.group(0)
+
+        return tolerant
+
+    def stored_name(self, name):
+        # Без манифеста (collectstatic не запускали — разработка, тесты)
+        # ссылка ведёт на исходное имя, а не падает
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        # CSS обрабатывается в несколько проходов, и хеш меняется после
+        # подстановки ссылок: сжимаем только итоговые имена
+        final = {}
+        processed = super().post_process(paths, dry_run, **options)
+        for name, hashed_name, result in processed:
+            yield name, hashed_name, result
+            if hashed_name and not isinstance(result, Exception):
+                final[name] = hashed_name
+        if dry_run:
+            return
+        for name, hashed_name in final.items():
+            self.compress(name)
+            self.compress(hashed_name)
+
+    def compress(self, name):
+        extension = os.path.splitext(name)[1].lower()
+        if extension not in settings.STATIC_COMPRESS_EXTENSIONS:
+            return
+        with self.open(name) as original:
+            data = original.read()
+        for suffix, encode in encoders():
+            packed = encode(data)
+            if len(packed) > len(data) * MIN_RATIO:
+                continue
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            self._save(target, ContentFile(packed))
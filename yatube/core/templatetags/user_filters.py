@@ -10,4 +10,19 @@ def addclass(field, css):
 
 # синтаксис @register... , под который описана функция addclass() -
 # это применение "декораторов", функций, меняющих поведение функций
-# Не бойтесь соб@к
\ No newline at end of file
+# Не бойтесь соб@к
+
+
+@register.simple_tag(takes_context=True)
+def query_transform(context, **kwargs):
+    """Текущая строка запроса с заменёнными параметрами.
+
+    Пустые значения удаляют параметр: {% query_transform page=2 after='' %}
+    """
+    query = context["request"].GET.copy()
+    for key, value in kwargs.items():
+        if value in (None, ""):
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return query.urlencode()
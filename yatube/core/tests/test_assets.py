@@ -0,0 +1,70 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..middleware import StaticFilesMiddleware
+
+
+class StaticAssetsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        override = override_settings(STATIC_ROOT=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        # Ссылки bootstrap на отсутствующие .map не ломают сборку
+        with self.assertLogs('core.storage', 'WARNING'):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse(status=404)
+        )
+
+    def get(self, url, **headers):
+        return self.middleware(RequestFactory().get(url, **headers))
+
+    def test_collectstatic_hashes_and_compresses(self):
+        url = staticfiles_storage.url('css/style.css')
+        self.assertRegex(url, r'^/static/css/style\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.directory, url[len('/static/'):])
+        with open(path, 'rb') as original, open(path + '.gz', 'rb') as packed:
+            self.assertEqual(gzip.decompress(packed.read()), original.read())
+        # Картинки уже сжаты
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, 'img/logo.png.gz'))
+        )
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        url = staticfiles_storage.url('css/style.css')
+        response = self.get(url, HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            response['Cache-Control'], 'public, max-age=31536000, immutable'
+        )
+        self.assertEqual(response['Content-Type'], 'text/css; charset=utf-8')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b''.join(self.get(url).streaming_content),
+        )
+        cached = self.get(url, HTTP_IF_NONE_MATCH=response['ETag'],
+                          HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(cached.status_code, 304)
+
+    def test_plain_names_and_refused_encodings(self):
+        response = self.get('/static/css/style.css',
+                            HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.STATIC_MAX_AGE}',
+        )
+        for url in ('/static/css/missing.css', '/static/../manage.py'):
+            self.assertEqual(self.get(url).status_code, 404)
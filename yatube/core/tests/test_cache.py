@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..cache import FileBasedCache
+
+
+class FileBasedCacheCullTests(SimpleTestCase):
+    def make_cache(self, **options):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        FileBasedCache._next_cull.pop(directory, None)
+        return FileBasedCache(directory, {"OPTIONS": options})
+
+    def age(self, cache, key, seconds):
+        path = cache._key_to_file(key)
+        written = os.stat(path).st_mtime - seconds
+        os.utime(path, (written, written))
+
+    def test_expired_then_oldest_entries_are_evicted(self):
+        cache = self.make_cache(
+            MAX_ENTRIES=4, CULL_FREQUENCY=2, CULL_INTERVAL=3600
+        )
+        for number in range(5):
+            cache.set(f"key{number}", number)
+            self.age(cache, f"key{number}", 100 - number)
+        # Нулевой срок: запись уже истекла
+        cache.set("expired", "x", 0)
+        FileBasedCache._next_cull[cache._dir] = 0
+        cache._cull()
+        self.assertEqual(len(cache._list_cache_files()), 3)
+        self.assertFalse(os.path.exists(cache._key_to_file("expired")))
+        self.assertIsNone(cache.get("key0"))
+        self.assertIsNone(cache.get("key1"))
+        self.assertEqual(cache.get("key2"), 2)
+        self.assertEqual(cache.get("key4"), 4)
+
+    def test_writes_between_culls_do_not_list_the_directory(self):
+        cache = self.make_cache(MAX_ENTRIES=2, CULL_INTERVAL=3600)
+        cache.set("first", 1)
+        calls = []
+        original = cache._list_cache_files
+        cache._list_cache_files = lambda: calls.append(1) or original()
+        for number in range(5):
+            cache.set(f"key{number}", number)
+        self.assertEqual(calls, [])
+        self.assertEqual(cache.get("key4"), 4)
@@ -0,0 +1,27 @@
+import os
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from ..checks import check_shared_cache
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_configured_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    def test_process_local_shared_cache_is_an_error(self):
+        local = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+        with override_settings(CACHES={'default': local, 'shared': local}):
+            errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['core.E002'])
+
+    def test_tests_do_not_touch_project_shared_cache(self):
+        location = settings.CACHES['shared']['LOCATION']
+        self.assertFalse(
+            os.path.realpath(location).startswith(
+                os.path.realpath(settings.BASE_DIR)
+            )
+        )
@@ -0,0 +1,61 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from ..backends.sqlite3.base import DatabaseWrapper
+from ..db import apply_sqlite_pragmas, write_transaction
+
+
+class WriteTransactionTests(TransactionTestCase):
+    def test_write_transaction_retries_locked_database(self):
+        calls = []
+
+        @write_transaction
+        def write():
+            calls.append(connection.in_atomic_block)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        with override_settings(DB_WRITE_RETRY_DELAY=0):
+            self.assertEqual(write(), 'ok')
+        self.assertEqual(calls, [True, True, True])
+
+    def test_write_transaction_does_not_retry_other_errors(self):
+        calls = []
+
+        @write_transaction
+        def write():
+            calls.append(1)
+            raise OperationalError('no such table: posts_post')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+
+class SqliteProfileTests(TestCase):
+    def test_immediate_transaction_mode(self):
+        settings_dict = dict(
+            connection.settings_dict,
+            OPTIONS={'transaction_mode': 'immediate'},
+        )
+        wrapper = DatabaseWrapper(settings_dict, alias='immediate')
+        wrapper.force_debug_cursor = True
+        try:
+            wrapper.ensure_connection()
+            wrapper._start_transaction_under_autocommit()
+            wrapper.rollback()
+            self.assertEqual(wrapper.queries[0]['sql'], 'BEGIN IMMEDIATE')
+        finally:
+            wrapper.close()
+        settings_dict['OPTIONS'] = {'transaction_mode': 'sometimes'}
+        with self.assertRaises(ImproperlyConfigured):
+            DatabaseWrapper(settings_dict).get_connection_params()
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234})
+    def test_pragmas_applied_on_connect(self):
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -1234)
@@ -0,0 +1,87 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+from ..views import metrics_view
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        override = override_settings(METRICS_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    def test_request_metrics_are_exposed(self):
+        self.client.get(reverse('posts:index'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_http_requests_total{view="posts:index",method="GET",'
+            'status="200"} 1',
+            body,
+        )
+        self.assertIn(
+            'yatube_http_request_duration_seconds_count'
+            '{view="posts:index"} 1',
+            body,
+        )
+        queries = re.search(
+            r'yatube_db_queries_total\{view="posts:index"\} (\d+)', body
+        )
+        self.assertGreater(int(queries.group(1)), 0)
+        self.assertRegex(
+            body,
+            r'yatube_template_render_duration_seconds_total'
+            r'\{view="posts:index"\} [1-9e.\-0-9]+',
+        )
+
+    def test_snapshots_of_workers_are_summed(self):
+        self.client.get(reverse('about:tech'))
+        worker = {
+            'counters': [[
+                'yatube_http_requests_total',
+                [['view', 'about:tech'], ['method', 'GET'],
+                 ['status', '200']],
+                2,
+            ]],
+            'histograms': [],
+        }
+        with open(os.path.join(self.directory, '1-1.json'), 'w') as f:
+            json.dump(worker, f)
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_http_requests_total{view="about:tech",method="GET",'
+            'status="200"} 3',
+            body,
+        )
+
+    def test_removed_directory_does_not_break_requests(self):
+        shutil.rmtree(self.directory)
+        metrics.registry.flush(force=True)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        # Каталог внутри обычного файла создать нельзя
+        blocker = os.path.join(self.directory, 'file')
+        open(blocker, 'w').close()
+        with override_settings(
+            METRICS_DIR=os.path.join(blocker, 'metrics'),
+            METRICS_FLUSH_INTERVAL=0,
+        ):
+            with self.assertLogs('core.metrics', 'ERROR'):
+                response = self.client.get(reverse('about:tech'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_metrics_hidden_from_outside(self):
+        request = RequestFactory().get(reverse('metrics'))
+        with self.assertRaises(Http404):
+            metrics_view(request)
@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts import freshness
+from posts.models import Post
+
+from ..middleware import ReplicaMiddleware
+from ..routers import ReplicaRouter, bump_generation
+
+
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request, write=False):
+        """Прогоняет запрос через middleware и запоминает базу чтения."""
+        seen = {}
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            seen['posts'] = self.router.db_for_read(Post)
+            seen['sessions'] = self.router.db_for_read(Session)
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(request)
+        return seen, response
+
+    def test_read_only_views_use_replica(self):
+        seen, _ = self.route(self.factory.get(reverse('posts:index')))
+        self.assertEqual(seen, {'posts': 'replica', 'sessions': 'default'})
+        seen, _ = self.route(self.factory.get(reverse('posts:post_create')))
+        self.assertEqual(seen['posts'], 'default')
+
+    def test_replica_etag_follows_sync_generation(self):
+        view = freshness.conditional(lambda request: ['posts'])(
+            lambda request: HttpResponse('ok')
+        )
+        middleware = ReplicaMiddleware(view)
+
+        def get(**headers):
+            request = self.factory.get(reverse('posts:index'), **headers)
+            request.user = AnonymousUser()
+            return middleware(request)
+
+        bump_generation()
+        etag = get()['ETag']
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Реплика догнала основную базу: старый ответ больше не годится
+        bump_generation()
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_writer_is_pinned_to_primary(self):
+        seen, response = self.route(
+            self.factory.post(reverse('posts:post_create')), write=True
+        )
+        self.assertEqual(seen['posts'], 'default')
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        request = self.factory.get(reverse('posts:index'))
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = cookie.value
+        seen, _ = self.route(request)
+        self.assertEqual(seen['posts'], 'default')
+
+    def test_expired_pin_returns_to_replica(self):
+        request = self.factory.get(reverse('posts:index'))
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = str(
+            int(time.time()) - 1
+        )
+        seen, _ = self.route(request)
+        self.assertEqual(seen['posts'], 'replica')
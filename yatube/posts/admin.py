@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, Group
+from .models import Group, Job, Post
 
 class PostAdmin(admin.ModelAdmin):
     # Перечисляем поля, которые должны отображаться в админке
@@ -23,4 +23,22 @@ class PostAdmin(admin.ModelAdmin):
 # При регистрации модели Post источником конфигурации для неё назначаем
 # класс PostAdmin
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
\ No newline at end of file
+admin.site.register(Group)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'run_at',
+        'attempts',
+        'max_attempts',
+        'locked_by',
+        'finished_at',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('created', 'finished_at', 'locked_by', 'last_error')
+
+
+admin.site.register(Job, JobAdmin)
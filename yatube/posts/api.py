@@ -0,0 +1,214 @@
+"""JSON API только для чтения: посты, группы, профили, комментарии, подписки.
+
+Ответы компактные (без пробелов, ``ensure_ascii=False``), набор полей
+выбирается параметром ``?fields=id,text``. Списки листаются тем же
+``posts.utils.paginator``, что и HTML-страницы. Каждый ответ несёт
+``ETag``/``Last-Modified`` из ``posts.freshness``: повторный запрос с
+``If-None-Match`` без изменений получает 304 без обращения к базе.
+"""
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse
+
+from . import freshness, timeline
+from .counters import counters_for
+from .models import Group, Post
+from .utils import paginator
+from .views import comments_page
+
+User = get_user_model()
+
+POST_FIELDS = {
+    "id": lambda post: post.id,
+    "text": lambda post: post.text,
+    "pub_date": lambda post: post.pub_date.isoformat(),
+    "author": lambda post: post.author.username,
+    "group": lambda post: post.group.slug if post.group_id else None,
+    "image": lambda post: post.image.url if post.image else None,
+    "comments_count": lambda post: post.comments_count,
+}
+GROUP_FIELDS = {
+    "id": lambda group: group.id,
+    "slug": lambda group: group.slug,
+    "title": lambda group: group.title,
+    "description": lambda group: group.description,
+    "posts_count": lambda group: group.posts_count,
+}
+PROFILE_FIELDS = {
+    "username": lambda user: user.username,
+    "first_name": lambda user: user.first_name,
+    "last_name": lambda user: user.last_name,
+    "posts_count": lambda user: counters_for(user).posts_count,
+    "followers_count": lambda user: counters_for(user).followers_count,
+    "following_count": lambda user: counters_for(user).following_count,
+}
+COMMENT_FIELDS = {
+    "id": lambda comment: comment.id,
+    "author": lambda comment: comment.author.username,
+    "text": lambda comment: comment.text,
+    "created": lambda comment: comment.created.isoformat(),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def respond(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+    )
+
+
+def api_view(scopes_for):
+    """Условный GET по маркерам свежести и ошибки в виде JSON."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as error:
+                return respond({"error": str(error)}, error.status)
+            except Http404:
+                return respond({"error": "Не найдено."}, 404)
+
+        return freshness.conditional(scopes_for)(wrapper)
+
+    return decorator
+
+
+def selected_fields(request, available):
+    """Поля из ``?fields=``; по умолчанию — все."""
+    requested = request.GET.get("fields")
+    if not requested:
+        return list(available)
+    fields = [name for name in requested.split(",") if name]
+    unknown = set(fields) - set(available)
+    if unknown:
+        raise ApiError(
+            f"Неизвестные поля: {', '.join(sorted(unknown))}. "
+            f"Доступны: {', '.join(available)}."
+        )
+    return fields
+
+
+def serialize(obj, available, fields):
+    return {name: available[name](obj) for name in fields}
+
+
+def _link(request, **params):
+    query = request.GET.copy()
+    for name in ("page", "after", "before"):
+        query.pop(name, None)
+    query.update(params)
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+def page_data(request, page, available):
+    """Страница списка в общем формате ``results``/``next``/``previous``."""
+    fields = selected_fields(request, available)
+    data = {"results": [serialize(obj, available, fields) for obj in page]}
+    if getattr(page, "is_cursor", False):
+        data["next"] = (
+            _link(request, after=page.next_cursor)
+            if page.next_cursor else None
+        )
+        data["previous"] = (
+            _link(request, before=page.previous_cursor)
+            if page.previous_cursor else None
+        )
+        return data
+    data["count"] = page.paginator.count
+    data["next"] = (
+        _link(request, page=page.next_page_number())
+        if page.has_next() else None
+    )
+    data["previous"] = (
+        _link(request, page=page.previous_page_number())
+        if page.has_previous() else None
+    )
+    return data
+
+
+def get_or_404(queryset, **lookup):
+    obj = queryset.filter(**lookup).first()
+    if obj is None:
+        raise Http404
+    return obj
+
+
+@api_view(lambda request: ["posts"])
+def post_list(request):
+    page = paginator(Post.objects.for_feed(), request)
+    return respond(page_data(request, page, POST_FIELDS))
+
+
+@api_view(lambda request, post_id: [f"post:{post_id}"])
+def post_detail(request, post_id):
+    post = get_or_404(Post.objects.for_feed(), id=post_id)
+    fields = selected_fields(request, POST_FIELDS)
+    return respond(serialize(post, POST_FIELDS, fields))
+
+
+@api_view(lambda request, post_id: [f"post:{post_id}"])
+def post_comments(request, post_id):
+    post = get_or_404(Post.objects.only("id"), id=post_id)
+    page = comments_page(post.id, request)
+    return respond(page_data(request, page, COMMENT_FIELDS))
+
+
+@api_view(lambda request: ["group_counts"])
+def group_list(request):
+    page = paginator(Group.objects.order_by("title", "id"), request)
+    return respond(page_data(request, page, GROUP_FIELDS))
+
+
+@api_view(lambda request, slug: ["group_counts"])
+def group_detail(request, slug):
+    group = get_or_404(Group.objects.all(), slug=slug)
+    fields = selected_fields(request, GROUP_FIELDS)
+    return respond(serialize(group, GROUP_FIELDS, fields))
+
+
+@api_view(lambda request, slug: [f"group:{slug}"])
+def group_posts(request, slug):
+    group = get_or_404(Group.objects.all(), slug=slug)
+    page = paginator(group.posts.for_feed(), request)
+    return respond(page_data(request, page, POST_FIELDS))
+
+
+@api_view(lambda request, username: [f"author:{username}"])
+def profile_detail(request, username):
+    user = get_or_404(
+        User.objects.select_related("counters"), username=username
+    )
+    fields = selected_fields(request, PROFILE_FIELDS)
+    return respond(serialize(user, PROFILE_FIELDS, fields))
+
+
+@api_view(lambda request, username: [f"author:{username}"])
+def profile_posts(request, username):
+    user = get_or_404(User.objects.all(), username=username)
+    page = paginator(Post.objects.filter(author=user).for_feed(), request)
+    return respond(page_data(request, page, POST_FIELDS))
+
+
+def follow_scopes(request):
+    # Маркер сбрасывают посты и комментарии всех авторов из подписок
+    # (posts.timeline.feed_changed): 304 отдаётся без запросов к базе
+    if not request.user.is_authenticated:
+        return []
+    return [f"following:{request.user.pk}"]
+
+
+@api_view(follow_scopes)
+def follow_feed(request):
+    if not request.user.is_authenticated:
+        raise ApiError("Требуется авторизация.", status=401)
+    page = paginator(timeline.feed_for(request.user).for_feed(), request)
+    return respond(page_data(request, page, POST_FIELDS))
@@ -0,0 +1,149 @@
+"""Асинхронные версии read-only view приложения posts.
+
+Под ASGI (``yatube/asgi.py`` включает ``settings.ASYNC_READ_VIEWS``) эти
+view подключаются в ``posts/urls.py`` вместо синхронных и не проходят
+через адаптер пула потоков. Независимые запросы — страница постов,
+счётчики, проверка подписки — запускаются одновременно через
+``asyncio.gather``. В Django 4.2 асинхронный ORM сам выполняет запросы в
+общем потоке, поэтому параллельно идёт ожидание, а не работа SQLite.
+Шаблоны рендерятся в ``sync_to_async``: теги карточек и превью ходят в
+кэш и базу синхронно.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+from . import follow_sets, freshness, recommendations, timeline
+from .counters import counters_for
+from .forms import CommentForm
+from .models import Group, Post
+from .search import search_posts
+from .utils import paginator
+from .views import (
+    comments_page, group_scopes, index_scopes, profile_scopes,
+)
+
+User = get_user_model()
+
+arender = sync_to_async(render)
+acounters_for = sync_to_async(counters_for)
+acomments_page = sync_to_async(comments_page)
+asuggestions_for = sync_to_async(recommendations.suggestions_for)
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"{queryset.model._meta.object_name} не найден.")
+
+
+@sync_to_async
+def apaginator(object_list, request):
+    """``utils.paginator`` с уже загруженными объектами страницы."""
+    page = paginator(object_list, request)
+    page.object_list = list(page.object_list)
+    return page
+
+
+@sync_to_async
+def aviewer(request):
+    """Пользователь запроса или None для анонима."""
+    return request.user if request.user.is_authenticated else None
+
+
+async def afollowing(viewer, author):
+    if viewer is None:
+        return False
+    follow_set = await sync_to_async(follow_sets.following_ids)(viewer)
+    return author.pk in follow_set
+
+
+@freshness.conditional(index_scopes)
+async def index(request):
+    search_query = request.GET.get("search", "")
+    if search_query:
+        post_list = search_posts(search_query, Post.objects.for_feed())
+    else:
+        post_list = Post.objects.for_feed()
+    context = {
+        "page_obj": await apaginator(post_list, request),
+        "search_query": search_query,
+    }
+    return await arender(request, "posts/index.html", context)
+
+
+@freshness.conditional(group_scopes)
+async def group_posts(request, slug):
+    group = await aget_object_or_404(Group.objects.all(), slug=slug)
+    context = {
+        "group": group,
+        "page_obj": await apaginator(group.posts.for_feed(), request),
+    }
+    return await arender(request, "posts/group_list.html", context)
+
+
+@freshness.conditional(profile_scopes)
+async def profile(request, username):
+    user_obj, viewer = await asyncio.gather(
+        aget_object_or_404(
+            User.objects.select_related("counters"),
+            username=username,
+        ),
+        aviewer(request),
+    )
+    page_obj, user_counters, following = await asyncio.gather(
+        apaginator(Post.objects.filter(author=user_obj).for_feed(), request),
+        acounters_for(user_obj),
+        afollowing(viewer, user_obj),
+    )
+    suggestions = []
+    if viewer == user_obj:
+        suggestions = await asuggestions_for(viewer)
+    context = {
+        "user_obj": user_obj,
+        "page_obj": page_obj,
+        "counters": user_counters,
+        "amount_posts": user_counters.posts_count,
+        "following": following,
+        "suggestions": suggestions,
+    }
+    return await arender(request, "posts/profile.html", context)
+
+
+async def post_detail(request, post_id):
+    post, comments = await asyncio.gather(
+        aget_object_or_404(
+            Post.objects.select_related("author__counters", "group"),
+            id=post_id,
+        ),
+        acomments_page(post_id, request),
+    )
+    author_counters = await acounters_for(post.author)
+    context = {
+        "post": post,
+        "amount_posts": author_counters.posts_count,
+        "form": CommentForm(),
+        "comments": comments,
+    }
+    return await arender(request, "posts/post_detail.html", context)
+
+
+async def follow_index(request):
+    viewer = await aviewer(request)
+    if viewer is None:
+        return redirect_to_login(request.get_full_path())
+    post_list = await sync_to_async(timeline.feed_for)(viewer)
+    page_obj, suggestions = await asyncio.gather(
+        apaginator(post_list.for_feed(), request),
+        asuggestions_for(viewer),
+    )
+    context = {
+        "page_obj": page_obj,
+        "suggestions": suggestions,
+    }
+    return await arender(request, "posts/follow.html", context)
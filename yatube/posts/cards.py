@@ -0,0 +1,129 @@
+"""Кэш отрендеренных карточек постов (posts/includes/post_list.html).
+
+Карточка хранится в кэше вместе с версиями всего, от чего она зависит:
+самого поста, его автора и группы. Версия — случайный токен, который
+меняется сигналами (``posts.signals``) при изменении поста, комментариев,
+профиля автора или группы. Версии лежат в общем для процессов
+``core.cache.shared_cache``, карточки — в кэше процесса: страница ленты
+получает версии и карточки двумя ``get_many``, устаревшие карточки
+рендерятся заново и сохраняются одним ``cache.set_many``. Счётчики
+попаданий тоже ведутся в кэше процесса: запись в общий кэш на каждый
+запрос дорога, а ``incr`` файлового кэша теряет параллельные обновления.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from core.cache import shared_cache
+from core.routers import replica_generation
+
+CARD_TEMPLATE = "posts/includes/post_list.html"
+KEY_PREFIX = "post_card"
+HITS_KEY = f"{KEY_PREFIX}:stats:hits"
+MISSES_KEY = f"{KEY_PREFIX}:stats:misses"
+
+
+def _card_key(post_id):
+    return f"{KEY_PREFIX}:{post_id}"
+
+
+def _version_key(kind, pk):
+    return f"{KEY_PREFIX}:version:{kind}:{pk}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def bump(kind, pk):
+    if pk is not None:
+        shared_cache.set(
+            _version_key(kind, pk), _new_version(),
+            settings.FRESHNESS_TIMEOUT,
+        )
+
+
+def _dependencies(post):
+    keys = [
+        _version_key("post", post.pk),
+        _version_key("author", post.author_id),
+    ]
+    if post.group_id is not None:
+        keys.append(_version_key("group", post.group_id))
+    return keys
+
+
+def _render(post):
+    return render_to_string(CARD_TEMPLATE, {"post": post})
+
+
+def _record(name, amount):
+    if amount:
+        cache.add(name, 0, None)
+        try:
+            cache.incr(name, amount)
+        except ValueError:
+            pass
+
+
+def render_cards(posts):
+    """Возвращает HTML карточек в порядке ``posts``.
+
+    Результаты поиска (с подсвеченным ``snippet``) не кэшируются.
+    """
+    posts = list(posts)
+    cacheable = [post for post in posts if not getattr(post, "snippet", "")]
+    dependencies = {post.pk: _dependencies(post) for post in cacheable}
+    version_keys = {
+        key for keys in dependencies.values() for key in keys
+    }
+    found = shared_cache.get_many(list(version_keys))
+    missing_versions = {
+        key: _new_version() for key in version_keys if key not in found
+    }
+    if missing_versions:
+        shared_cache.set_many(missing_versions, settings.FRESHNESS_TIMEOUT)
+        found.update(missing_versions)
+    found.update(cache.get_many([_card_key(post.pk) for post in cacheable]))
+
+    # Карточка, отрисованная по данным реплики, помнит её поколение
+    generation = replica_generation()
+    cards, rendered, hits = [], {}, 0
+    for post in posts:
+        if post.pk not in dependencies:
+            cards.append(_render(post))
+            continue
+        versions = tuple(found[key] for key in dependencies[post.pk])
+        if generation is not None:
+            versions += (generation,)
+        cached = found.get(_card_key(post.pk))
+        if cached is not None and cached[0] == versions:
+            cards.append(cached[1])
+            hits += 1
+            continue
+        html = _render(post)
+        rendered[_card_key(post.pk)] = (versions, html)
+        cards.append(html)
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    _record(HITS_KEY, hits)
+    _record(MISSES_KEY, len(rendered))
+    return cards
+
+
+def stats():
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,135 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарным ``UPDATE ... SET x = x + 1`` из сигналов
+(см. ``posts.signals``), поэтому учитываются и каскадные удаления.
+Комментарии, удаляемые вместе с автором, вычитаются из счётчиков чужих
+постов одним запросом (``uncount_comments_by``).
+Если счётчики разошлись с данными, их пересчитывает
+``manage.py recount_counters``.
+"""
+from django.apps import apps as django_apps
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+BATCH_SIZE = 1000
+
+
+def _increments(**deltas):
+    return {
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    }
+
+
+def bump_user(user_id, **deltas):
+    UserCounters = django_apps.get_model("posts", "UserCounters")
+    updated = UserCounters.objects.filter(user_id=user_id).update(
+        **_increments(**deltas)
+    )
+    # Строки может не быть у пользователей, созданных до появления
+    # счётчиков. Создаём её только при увеличении: при каскадном удалении
+    # пользователя новая строка сломала бы внешний ключ.
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        recount_user(user_id)
+
+
+def bump_post(post_id, **deltas):
+    Post = django_apps.get_model("posts", "Post")
+    Post.objects.filter(pk=post_id).update(**_increments(**deltas))
+
+
+def bump_group(group_id, **deltas):
+    if group_id is None:
+        return
+    Group = django_apps.get_model("posts", "Group")
+    Group.objects.filter(pk=group_id).update(**_increments(**deltas))
+
+
+def uncount_comments_by(user_id):
+    """Вычитает комментарии пользователя из счётчиков чужих постов.
+
+    Вызывается перед удалением пользователя одним ``UPDATE``: каскадно
+    удаляемые комментарии счётчики поштучно не уменьшают.
+    """
+    Comment = django_apps.get_model("posts", "Comment")
+    Post = django_apps.get_model("posts", "Post")
+    Post.objects.filter(
+        pk__in=Comment.objects.filter(author_id=user_id).values("post_id"),
+    ).exclude(author_id=user_id).update(
+        comments_count=Greatest(
+            F("comments_count")
+            - _count(Comment, "post", author_id=user_id),
+            0,
+        ),
+    )
+
+
+def recount_user(user_id):
+    Follow = django_apps.get_model("posts", "Follow")
+    Post = django_apps.get_model("posts", "Post")
+    UserCounters = django_apps.get_model("posts", "UserCounters")
+    counters, _ = UserCounters.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            "posts_count": Post.objects.filter(author_id=user_id).count(),
+            "followers_count": Follow.objects.filter(
+                author_id=user_id,
+            ).count(),
+            "following_count": Follow.objects.filter(
+                user_id=user_id,
+            ).count(),
+        },
+    )
+    return counters
+
+
+def counters_for(user):
+    """Счётчики пользователя; при отсутствии строки пересчитывает их."""
+    UserCounters = django_apps.get_model("posts", "UserCounters")
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        return recount_user(user.pk)
+
+
+def _count(model, field, **filters):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")}, **filters)
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def recount_all(get_model=django_apps.get_model):
+    """Пересчитывает все счётчики несколькими UPDATE с подзапросами.
+
+    ``get_model`` позволяет вызывать функцию из миграций с историческими
+    моделями.
+    """
+    Comment = get_model("posts", "Comment")
+    Follow = get_model("posts", "Follow")
+    Group = get_model("posts", "Group")
+    Post = get_model("posts", "Post")
+    UserCounters = get_model("posts", "UserCounters")
+    User = UserCounters._meta.get_field("user").related_model
+
+    missing = User.objects.exclude(
+        pk__in=UserCounters.objects.values("user_id"),
+    ).values_list("pk", flat=True)
+    UserCounters.objects.bulk_create(
+        (UserCounters(user_id=pk) for pk in missing.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    UserCounters.objects.update(
+        posts_count=_count(Post, "author"),
+        followers_count=_count(Follow, "author"),
+        following_count=_count(Follow, "user"),
+    )
+    Post.objects.update(comments_count=_count(Comment, "post"))
+    Group.objects.update(posts_count=_count(Post, "group"))
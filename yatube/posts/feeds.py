@@ -0,0 +1,153 @@
+"""RSS и Atom: общая лента, лента группы и лента автора.
+
+Готовый XML хранится в кэше под ключом из маркеров свежести области
+(``posts.freshness``): изменение поста перестраивает только ленты его
+области — общую, его группы и его автора, — остальные остаются в кэше.
+Опрос без изменений получает 304 или XML из кэша без запросов к базе.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import linebreaks, truncatechars
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from . import freshness
+from .models import Group, Post
+from .views import group_scopes, index_scopes
+
+User = get_user_model()
+
+KEY_PREFIX = "syndication"
+
+
+class LatestPostsFeed(Feed):
+    title = "Yatube: последние записи"
+    description = "Новые записи всех авторов."
+
+    def link(self):
+        return reverse("posts:index")
+
+    def items(self):
+        return Post.objects.for_feed()[:settings.SYNDICATION_ITEMS]
+
+    def item_title(self, item):
+        return truncatechars(item.text, settings.AMOUNT_OF_SYMBOLS)
+
+    def item_description(self, item):
+        return linebreaks(item.text)
+
+    def item_link(self, item):
+        return reverse("posts:post_detail", args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group_id else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f"Yatube: {group.title}"
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse("posts:group_list", args=[group.slug])
+
+    def items(self, group):
+        return group.posts.for_feed()[:settings.SYNDICATION_ITEMS]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f"Yatube: {author.get_full_name() or author.username}"
+
+    def description(self, author):
+        return f"Записи пользователя {author.username}."
+
+    def link(self, author):
+        return reverse("posts:profile", args=[author.username])
+
+    def items(self, author):
+        return Post.objects.filter(author=author).for_feed()[
+            :settings.SYNDICATION_ITEMS
+        ]
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr("description", obj)
+
+
+class LatestPostsAtomFeed(AtomFeedMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
+
+
+def cached_feed(feed, scopes_for):
+    """View ленты с условным GET и XML в кэше до изменения области."""
+    @freshness.conditional(scopes_for)
+    def view(request, *args, **kwargs):
+        scopes = list(scopes_for(request, *args, **kwargs))
+        tokens = [
+            token for token, _ in freshness.markers(
+                scopes + list(freshness.SHARED_SCOPES)
+            )
+        ]
+        digest = hashlib.md5(
+            "|".join([request.path] + tokens).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        key = f"{KEY_PREFIX}:{digest}"
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = feed(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(
+                key,
+                (response.content, response["Content-Type"]),
+                settings.SYNDICATION_CACHE_TIMEOUT,
+            )
+        return response
+
+    return view
+
+
+def author_scopes(request, username):
+    return [f"author:{username}"]
+
+
+latest_rss = cached_feed(LatestPostsFeed(), index_scopes)
+latest_atom = cached_feed(LatestPostsAtomFeed(), index_scopes)
+group_rss = cached_feed(GroupPostsFeed(), group_scopes)
+group_atom = cached_feed(GroupPostsAtomFeed(), group_scopes)
+author_rss = cached_feed(AuthorPostsFeed(), author_scopes)
+author_atom = cached_feed(AuthorPostsAtomFeed(), author_scopes)
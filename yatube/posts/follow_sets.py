@@ -0,0 +1,85 @@
+"""Кэш подписок зрителя для проверки «я подписан на автора?».
+
+Id авторов, на которых подписан пользователь, хранятся в кэше одним
+значением — отсортированным массивом ``array("i")`` в байтах, 4 байта на
+подписку. Проверка — двоичный поиск, поэтому целая страница авторов
+проверяется без запросов к базе. Набор лежит в общем кэше
+(``core.cache.shared_cache``): сигналы (``posts.signals``) сбрасывают его
+при подписке или отписке и ещё раз после коммита, и сброс сразу виден
+всем воркерам. Внутри запроса набор запоминается на объекте
+пользователя и читается из кэша один раз.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import transaction
+
+from core.cache import shared_cache
+
+KEY_PREFIX = "follow_set"
+
+
+def _key(user_id):
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+class FollowSet:
+    """Отсортированный массив id авторов."""
+
+    __slots__ = ("ids",)
+
+    def __init__(self, ids=()):
+        self.ids = array("i", ids)
+
+    @classmethod
+    def from_bytes(cls, raw):
+        follow_set = cls()
+        follow_set.ids.frombytes(raw)
+        return follow_set
+
+    def __contains__(self, author_id):
+        position = bisect_left(self.ids, author_id)
+        return position < len(self.ids) and self.ids[position] == author_id
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+
+def load(user_id):
+    Follow = django_apps.get_model("posts", "Follow")
+    follow_set = FollowSet(
+        Follow.objects.filter(user_id=user_id)
+        .order_by("author_id")
+        .values_list("author_id", flat=True)
+    )
+    shared_cache.set(
+        _key(user_id), follow_set.ids.tobytes(), settings.FOLLOW_SET_TIMEOUT
+    )
+    return follow_set
+
+
+def following_ids(user):
+    """Подписки пользователя; для анонима — пустой набор."""
+    if not user.is_authenticated:
+        return FollowSet()
+    follow_set = getattr(user, "_follow_set", None)
+    if follow_set is None:
+        raw = shared_cache.get(_key(user.pk))
+        if raw is None:
+            follow_set = load(user.pk)
+        else:
+            follow_set = FollowSet.from_bytes(raw)
+        user._follow_set = follow_set
+    return follow_set
+
+
+def invalidate(user_id):
+    # Повтор после коммита убирает набор, который параллельный запрос
+    # успел прочитать из базы до коммита
+    shared_cache.delete(_key(user_id))
+    transaction.on_commit(lambda: shared_cache.delete(_key(user_id)))
@@ -0,0 +1,143 @@
+"""Маркеры свежести лент для условных GET (ETag/Last-Modified).
+
+Каждая «область» ленты (все посты, группа, автор, пост с комментариями,
+подписки пользователя) хранит пару «токен, время изменения» в общем для
+всех процессов кэше ``core.cache.shared_cache``, так что запись в одном
+воркере сбрасывает ETag во всех. Маркеры живут ``FRESHNESS_TIMEOUT``
+секунд.
+Сигналы (``posts.signals``) обновляют маркеры после коммита транзакции.
+ETag страницы — хэш токенов её областей, адреса и пользователя, поэтому
+ответ 304 отдаётся одним ``cache.get_many`` без запросов к базе и
+рендеринга шаблонов.
+"""
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from core.cache import shared_cache
+from core.routers import replica_generation
+
+KEY_PREFIX = "freshness"
+
+# Имена, группы и счётчики показываются в карточках любой ленты
+SHARED_SCOPES = ("users", "groups")
+
+
+def _key(scope):
+    return f"{KEY_PREFIX}:{scope}"
+
+
+def _new_marker():
+    return uuid.uuid4().hex[:12], time.time()
+
+
+def touch(*scopes):
+    """Отмечает области изменившимися, когда транзакция закоммичена."""
+    keys = [_key(scope) for scope in scopes if scope]
+
+    def set_markers():
+        marker = _new_marker()
+        shared_cache.set_many(
+            {key: marker for key in keys}, settings.FRESHNESS_TIMEOUT
+        )
+
+    if keys:
+        transaction.on_commit(set_markers)
+
+
+def markers(scopes):
+    """Маркеры областей; отсутствующие в кэше создаются заново."""
+    keys = [_key(scope) for scope in scopes]
+    found = shared_cache.get_many(keys)
+    missing = {key: _new_marker() for key in keys if key not in found}
+    if missing:
+        shared_cache.set_many(missing, settings.FRESHNESS_TIMEOUT)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def validators(request, scopes):
+    """ETag и Last-Modified ответа для текущего пользователя и адреса."""
+    current = markers(scopes)
+    digest = hashlib.md5(usedforsecurity=False)
+    for token, _ in current:
+        digest.update(token.encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(str(request.user.pk or 0).encode())
+    generation = replica_generation()
+    if generation is not None:
+        digest.update(generation.encode())
+    modified = max(changed for _, changed in current)
+    return digest.hexdigest(), modified
+
+
+def post_scopes(post, group_slugs=()):
+    """Области, которые меняются вместе с постом."""
+    scopes = ["posts", f"post:{post.pk}", f"author:{post.author.username}"]
+    scopes.extend(f"group:{slug}" for slug in group_slugs)
+    return scopes
+
+
+def _finish(response, etag, modified):
+    if response.status_code == 200 and not response.has_header("ETag"):
+        response["ETag"] = quote_etag(etag)
+        response["Last-Modified"] = http_date(int(modified))
+    patch_vary_headers(response, ("Cookie",))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional(scopes_for):
+    """Декоратор view: отвечает 304, если области ленты не менялись.
+
+    ``scopes_for(request, *args, **kwargs)`` возвращает список областей
+    страницы; к нему всегда добавляются ``SHARED_SCOPES``. Работает и с
+    асинхронными view.
+    """
+    def prepare(request, args, kwargs):
+        scopes = list(scopes_for(request, *args, **kwargs))
+        scopes.extend(SHARED_SCOPES)
+        etag, modified = validators(request, scopes)
+        response = get_conditional_response(
+            request,
+            etag=quote_etag(etag),
+            last_modified=int(modified),
+        )
+        return etag, modified, response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+                etag, modified, response = await sync_to_async(prepare)(
+                    request, args, kwargs
+                )
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(response, etag, modified)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            etag, modified, response = prepare(request, args, kwargs)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _finish(response, etag, modified)
+
+        return wrapper
+
+    return decorator
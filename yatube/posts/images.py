@@ -0,0 +1,96 @@
+"""Обработка загруженных картинок постов перед сохранением.
+
+Оригиналы с камеры весят мегабайты и каждый промах кэша превью заново
+декодируется sorl. Поэтому при загрузке картинка проверяется на размер,
+поворачивается по EXIF, уменьшается до ``IMAGE_MAX_DIMENSION`` по большей
+стороне и перекодируется в WebP (или прогрессивный JPEG, если Pillow
+собран без WebP). При перекодировании метаданные, включая EXIF и GPS, не
+переносятся. Результат пишется во временный файл, который хранилище
+копирует на диск по частям. Анимированные GIF сохраняются как есть.
+"""
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps, features
+
+MIN_QUALITY = 50
+QUALITY_STEP = 10
+
+
+def output_format():
+    if settings.IMAGE_FORMAT == "WEBP" and features.check("webp"):
+        return "WEBP"
+    return "JPEG"
+
+
+def _prepare_mode(image, image_format):
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        # JPEG не умеет прозрачность: подкладываем белый фон
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        return image.convert("RGBA" if has_alpha else "RGB")
+    return image
+
+
+def _save_options(image_format, quality):
+    if image_format == "WEBP":
+        return {"format": "WEBP", "quality": quality, "method": 4}
+    return {
+        "format": "JPEG",
+        "quality": quality,
+        "optimize": True,
+        "progressive": True,
+    }
+
+
+def normalize(upload):
+    """Возвращает файл для сохранения вместо загруженного ``upload``."""
+    if upload.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            "Файл больше %(limit)s.",
+            code="file_too_large",
+            params={"limit": filesizeformat(settings.IMAGE_MAX_UPLOAD_SIZE)},
+        )
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+        if getattr(image, "is_animated", False):
+            upload.seek(0)
+            return upload
+        image.load()
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            "Не удалось прочитать изображение.", code="invalid_image"
+        )
+    image = ImageOps.exif_transpose(image)
+    limit = settings.IMAGE_MAX_DIMENSION
+    image.thumbnail((limit, limit), Image.LANCZOS)
+    image_format = output_format()
+    image = _prepare_mode(image, image_format)
+
+    output = SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    quality = settings.IMAGE_QUALITY
+    while True:
+        output.seek(0)
+        output.truncate()
+        image.save(output, **_save_options(image_format, quality))
+        if (
+            output.tell() <= settings.IMAGE_MAX_BYTES
+            or quality - QUALITY_STEP < MIN_QUALITY
+        ):
+            break
+        quality -= QUALITY_STEP
+    output.seek(0)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    extension = ".webp" if image_format == "WEBP" else ".jpg"
+    return File(output, name=stem + extension)
@@ -0,0 +1,296 @@
+"""Очередь фоновых задач в базе данных, без внешнего брокера.
+
+Функция, обёрнутая ``@background``, по-прежнему вызывается напрямую, а
+``.delay(*args, **kwargs)`` записывает вызов в таблицу ``Job`` в той же
+транзакции, что и данные запроса: если транзакция откатилась, задачи тоже
+нет. ``.schedule(when, ...)`` откладывает запуск до ``when`` (datetime
+или timedelta). Аргументы должны сериализоваться в JSON, а сама функция —
+лежать на верхнем уровне модуля, чтобы воркер нашёл её по имени.
+
+Задачи выполняет команда ``run_worker``. Задача забирается условным UPDATE
+по её статусу и сроку аренды, поэтому несколько процессов не возьмут одну
+задачу дважды. Упавшая задача повторяется с экспоненциальной задержкой до
+``max_attempts`` раз; задача умершего воркера возвращается в очередь, когда
+истекает ``JOBS_LEASE``, а если попытки кончились — помечается упавшей.
+Задача, которая может работать дольше аренды, вызывает между шагами
+``renew_lease()``: аренда продлевается, а если её уже перехватил другой
+воркер, задача прерывается и не выполняется дважды одновременно. При
+``JOBS_EAGER = True`` задачи выполняются сразу после коммита, без воркера
+и без записи в базу.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from functools import update_wrapper
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.db import write_transaction
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Сколько кандидатов воркер просматривает за один заход
+CLAIM_BATCH = 10
+
+# Задача, которую выполняет текущий поток (для renew_lease)
+_current = threading.local()
+
+
+class LeaseLost(Exception):
+    """Аренда истекла, и задачу забрал другой воркер."""
+
+
+class Background:
+    """Функция, которую можно отложить в очередь."""
+
+    def __init__(self, func, max_attempts=None):
+        update_wrapper(self, func)
+        self.func = func
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.schedule(None, *args, **kwargs)
+
+    def schedule(self, when, *args, **kwargs):
+        if settings.JOBS_EAGER:
+            transaction.on_commit(lambda: self.func(*args, **kwargs))
+            return None
+        return enqueue(
+            self.name, args, kwargs,
+            run_at=when,
+            max_attempts=self.max_attempts,
+        )
+
+
+def background(func=None, *, max_attempts=None):
+    """Декоратор: ``@background`` или ``@background(max_attempts=5)``."""
+    if func is None:
+        return lambda func: Background(func, max_attempts)
+    return Background(func, max_attempts)
+
+
+def enqueue(name, args=(), kwargs=None, run_at=None, max_attempts=None):
+    """Ставит в очередь вызов функции по её полному имени."""
+    if run_at is None:
+        run_at = timezone.now()
+    elif isinstance(run_at, timedelta):
+        run_at = timezone.now() + run_at
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def due_jobs(now):
+    return Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(
+            status=Job.RUNNING,
+            locked_until__lt=now,
+            attempts__lt=F("max_attempts"),
+        )
+    )
+
+
+@write_transaction
+def fail_abandoned():
+    """Помечает упавшими задачи, воркер которых умер на последней попытке.
+
+    Иначе задача, которая каждый раз роняет воркер, повторялась бы вечно.
+    """
+    now = timezone.now()
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        locked_until__lt=now,
+        attempts__gte=F("max_attempts"),
+    ).update(
+        status=Job.FAILED,
+        locked_until=None,
+        finished_at=now,
+        last_error=(
+            "Аренда истекла на последней попытке: воркер не завершил "
+            "задачу."
+        ),
+    )
+
+
+@write_transaction
+def claim(worker):
+    """Забирает одну готовую к запуску задачу или возвращает ``None``."""
+    now = timezone.now()
+    candidates = due_jobs(now).values_list("id", "status", "locked_until")
+    for pk, status, locked_until in candidates[:CLAIM_BATCH]:
+        taken = Job.objects.filter(
+            pk=pk, status=status, locked_until=locked_until,
+        ).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=settings.JOBS_LEASE),
+            attempts=F("attempts") + 1,
+        )
+        if taken:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=settings.JOBS_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    )
+
+
+@write_transaction
+def finish(job, error=None):
+    now = timezone.now()
+    changes = {"locked_until": None, "last_error": error or ""}
+    if error is None:
+        changes.update(status=Job.DONE, finished_at=now)
+    elif job.attempts >= job.max_attempts:
+        changes.update(status=Job.FAILED, finished_at=now)
+    else:
+        changes.update(
+            status=Job.QUEUED, run_at=now + retry_delay(job.attempts)
+        )
+    # Если аренда истекла и задачу забрал другой воркер, итог пишет он
+    Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by,
+    ).update(**changes)
+
+
+@write_transaction
+def _extend(job):
+    # Повторный захват увеличивает attempts: так отличается и задача,
+    # которую забрал воркер с тем же именем
+    return Job.objects.filter(
+        pk=job.pk,
+        status=Job.RUNNING,
+        locked_by=job.locked_by,
+        attempts=job.attempts,
+    ).update(
+        locked_until=timezone.now() + timedelta(seconds=settings.JOBS_LEASE)
+    )
+
+
+def renew_lease():
+    """Продлевает аренду выполняемой задачи ещё на ``JOBS_LEASE``.
+
+    Вне воркера ничего не делает. Если задачу уже забрал другой воркер,
+    бросает ``LeaseLost``: продолжать работу нельзя.
+    """
+    job = getattr(_current, "job", None)
+    if job is not None and not _extend(job):
+        raise LeaseLost(f"{job.name} #{job.pk}")
+
+
+def execute(job):
+    """Выполняет забранную задачу и записывает итог."""
+    _current.job = job
+    try:
+        func = import_string(job.name)
+        getattr(func, "func", func)(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception("Задача %s #%s упала", job.name, job.pk)
+        finish(job, traceback.format_exc())
+    else:
+        finish(job)
+    finally:
+        _current.job = None
+
+
+def run_pending(worker="inline", limit=None):
+    """Выполняет готовые задачи в текущем потоке; возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        execute(job)
+        done += 1
+    return done
+
+
+def work(threads, poll_interval, stop):
+    """Пул потоков воркера; работает, пока не установлен ``stop``."""
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def loop(number):
+        worker = f"{prefix}:{number}"
+        while not stop.is_set():
+            try:
+                job = claim(worker)
+            except Exception:
+                logger.exception("Не удалось забрать задачу")
+                job = None
+            if job is None:
+                close_old_connections()
+                stop.wait(poll_interval)
+                continue
+            execute(job)
+            close_old_connections()
+
+    pool = [
+        threading.Thread(target=loop, args=(number,), name=f"jobs-{number}")
+        for number in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+def schedule_periodic():
+    """Ставит периодические задачи из ``JOBS_PERIODIC``, если их нет.
+
+    Следующий запуск — через интервал после окончания предыдущего, так что
+    медленная задача не копится в очереди.
+    """
+    now = timezone.now()
+    for name, interval in settings.JOBS_PERIODIC.items():
+        active = Job.objects.filter(
+            name=name, status__in=(Job.QUEUED, Job.RUNNING),
+        )
+        if active.exists():
+            continue
+        last = (
+            Job.objects.filter(name=name, finished_at__isnull=False)
+            .order_by("-finished_at")
+            .values_list("finished_at", flat=True)
+            .first()
+        )
+        run_at = now if last is None else last + timedelta(seconds=interval)
+        enqueue(name, run_at=max(run_at, now))
+
+
+def purge_finished():
+    """Удаляет завершённые задачи старше ``JOBS_KEEP_FINISHED`` секунд."""
+    border = timezone.now() - timedelta(seconds=settings.JOBS_KEEP_FINISHED)
+    return Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED), finished_at__lt=border,
+    ).delete()[0]
+
+
+def housekeeping():
+    try:
+        fail_abandoned()
+        schedule_periodic()
+        purge_finished()
+    except Exception:
+        logger.exception("Не удалось обслужить очередь задач")
+    finally:
+        close_old_connections()
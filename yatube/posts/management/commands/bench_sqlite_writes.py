@@ -0,0 +1,167 @@
+"""Пропускная способность записи в SQLite при нескольких воркерах.
+
+Каждый профиль (обычный и ``YATUBE_SQLITE_PRODUCTION=1``) запускается в
+отдельном процессе на свежей копии базы, чтобы не переводить рабочий файл
+в WAL. Внутри профиля ``--workers`` процессов в течение ``--seconds``
+пишут посты и комментарии через ``core.db.write_transaction`` — как
+view ``post_create`` и ``add_comment``, со всеми сигналами.
+"""
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from core.db import write_transaction
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+POST_SHARE = 0.2
+
+
+def write_worker(seconds, results):
+    user_ids = list(User.objects.values_list("pk", flat=True)[:100])
+    post_ids = list(
+        Post.objects.order_by("-pk").values_list("pk", flat=True)[:100]
+    )
+
+    @write_transaction
+    def write():
+        if random.random() < POST_SHARE:
+            Post.objects.create(
+                text="Пост из бенчмарка",
+                author_id=random.choice(user_ids),
+            )
+        else:
+            Comment.objects.create(
+                text="Комментарий из бенчмарка",
+                post_id=random.choice(post_ids),
+                author_id=random.choice(user_ids),
+            )
+
+    writes, errors, latencies = 0, 0, []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            write()
+        except OperationalError:
+            errors += 1
+            continue
+        writes += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+    connections.close_all()
+    results.put({"writes": writes, "errors": errors, "latencies": latencies})
+
+
+class Command(BaseCommand):
+    help = "Сравнивает запись в SQLite в обычном и боевом профиле."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument(
+            "--profile",
+            choices=("both", "default", "production"),
+            default="both",
+        )
+
+    def handle(self, *args, **options):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("Бенчмарк рассчитан на SQLite.")
+        if options["profile"] == "both":
+            return self.compare(options)
+        if (options["profile"] == "production") != settings.SQLITE_PRODUCTION:
+            raise CommandError(
+                "Профиль не совпадает с YATUBE_SQLITE_PRODUCTION; запускайте "
+                "команду с --profile both."
+            )
+        if not Post.objects.exists():
+            raise CommandError("В базе нет постов: запустите seed_data.")
+        self.stdout.write(json.dumps(self.run(options)))
+
+    def run(self, options):
+        # Соединения родителя не должны достаться процессам после fork
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=write_worker, args=(options["seconds"], results)
+            )
+            for _ in range(options["workers"])
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        reports = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        writes = sum(report["writes"] for report in reports)
+        latencies = sorted(
+            latency for report in reports for latency in report["latencies"]
+        )
+        p95 = (
+            statistics.quantiles(latencies, n=20)[-1]
+            if len(latencies) > 1 else 0.0
+        )
+        return {
+            "profile": options["profile"],
+            "workers": options["workers"],
+            "writes": writes,
+            "errors": sum(report["errors"] for report in reports),
+            "seconds": round(elapsed, 3),
+            "writes_per_second": round(writes / elapsed, 1),
+            "p95_ms": round(p95, 2),
+        }
+
+    def compare(self, options):
+        manage_py = os.path.join(settings.BASE_DIR, "manage.py")
+        source_path = connections["default"].settings_dict["NAME"]
+        for profile in ("default", "production"):
+            with tempfile.TemporaryDirectory() as directory:
+                copy_path = os.path.join(directory, "bench.sqlite3")
+                source = sqlite3.connect(source_path)
+                target = sqlite3.connect(copy_path)
+                source.backup(target)
+                target.close()
+                source.close()
+                env = dict(
+                    os.environ,
+                    YATUBE_SQLITE_NAME=copy_path,
+                    YATUBE_SQLITE_PRODUCTION=(
+                        "1" if profile == "production" else ""
+                    ),
+                )
+                result = subprocess.run(
+                    [
+                        sys.executable, manage_py, "bench_sqlite_writes",
+                        "--profile", profile,
+                        "--workers", str(options["workers"]),
+                        "--seconds", str(options["seconds"]),
+                    ],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                )
+            if result.returncode:
+                raise CommandError(result.stderr.strip().splitlines()[-1])
+            report = json.loads(result.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{profile}: {report['writes']} записей за "
+                f"{report['seconds']} с, {report['writes_per_second']} в с, "
+                f"p95 {report['p95_ms']} мс, ошибок {report['errors']} "
+                f"({report['workers']} воркеров)"
+            )
@@ -0,0 +1,124 @@
+"""Сравнение пропускной способности WSGI и ASGI на одинаковом числе воркеров.
+
+Каждый режим запускается в отдельном процессе: под WSGI запросы идут
+через тестовый ``Client`` из пула потоков и попадают в синхронные view,
+под ASGI — через ``AsyncClient`` с тем же числом одновременных корутин и
+попадают в ``posts.async_views``. Сервер и сеть не участвуют, поэтому
+замеряется именно обработка запроса Django.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+# Не с INTERNAL_IPS, чтобы debug_toolbar не участвовал в замере
+REMOTE_ADDR = "10.0.0.1"
+
+
+def sample_urls():
+    urls = [reverse("posts:index")]
+    group = Group.objects.first()
+    if group:
+        urls.append(reverse("posts:group_list", args=[group.slug]))
+    post = Post.objects.select_related("author").first()
+    if post:
+        urls.append(reverse("posts:profile", args=[post.author.username]))
+        urls.append(reverse("posts:post_detail", args=[post.id]))
+    return urls
+
+
+class Command(BaseCommand):
+    help = "Сравнивает пропускную способность страниц под WSGI и ASGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--mode",
+            choices=("both", "wsgi", "asgi"),
+            default="both",
+        )
+
+    def handle(self, *args, **options):
+        if options["mode"] == "both":
+            return self.compare(options)
+        if (options["mode"] == "asgi") != settings.ASYNC_READ_VIEWS:
+            raise CommandError(
+                "Режим не совпадает с YATUBE_ASYNC_VIEWS; запускайте "
+                "команду с --mode both."
+            )
+        urls = sample_urls()
+        per_worker = max(options["requests"] // options["workers"], 1)
+        total = per_worker * options["workers"] * len(urls)
+        run = self.run_asgi if options["mode"] == "asgi" else self.run_wsgi
+        started = time.perf_counter()
+        run(urls, per_worker, options["workers"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(json.dumps({
+            "mode": options["mode"],
+            "requests": total,
+            "seconds": round(elapsed, 3),
+            "rps": round(total / elapsed, 1),
+        }))
+
+    def compare(self, options):
+        manage_py = os.path.join(settings.BASE_DIR, "manage.py")
+        for mode in ("wsgi", "asgi"):
+            env = dict(
+                os.environ,
+                YATUBE_ASYNC_VIEWS="1" if mode == "asgi" else "",
+            )
+            result = subprocess.run(
+                [
+                    sys.executable, manage_py, "bench_wsgi_asgi",
+                    "--mode", mode,
+                    "--requests", str(options["requests"]),
+                    "--workers", str(options["workers"]),
+                ],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            report = json.loads(result.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{mode.upper()}: {report['requests']} запросов "
+                f"за {report['seconds']} с, {report['rps']} запросов/с "
+                f"({options['workers']} воркеров)"
+            )
+
+    def run_wsgi(self, urls, per_worker, workers):
+        def worker(url):
+            client = Client(REMOTE_ADDR=REMOTE_ADDR)
+            try:
+                for _ in range(per_worker):
+                    client.get(url)
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(worker, [u for u in urls for _ in range(workers)]))
+
+    def run_asgi(self, urls, per_worker, workers):
+        async def worker(url):
+            client = AsyncClient(client=[REMOTE_ADDR, 0])
+            for _ in range(per_worker):
+                await client.get(url)
+
+        async def main():
+            await asyncio.gather(
+                *(worker(url) for url in urls for _ in range(workers))
+            )
+
+        asyncio.run(main())
@@ -0,0 +1,103 @@
+"""Советник по индексам: EXPLAIN QUERY PLAN для запросов posts.views.
+
+Команда вызывает read-only view приложения ``posts`` на текущей базе,
+собирает выполненный ими SQL и для каждого запроса печатает план SQLite.
+Полный проход по таблице (``SCAN table`` без индекса) и сортировка во
+временном B-дереве (``USE TEMP B-TREE``) помечаются как предупреждения.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def is_warning(detail):
+    if detail.startswith("SCAN ") and "VIRTUAL TABLE" not in detail:
+        return " USING " not in detail
+    return "USE TEMP B-TREE" in detail
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает EXPLAIN QUERY PLAN для SQL, который выполняют view "
+        "posts, и помечает полные сканирования и временные сортировки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fail-on-warnings",
+            action="store_true",
+            help="Завершиться с ошибкой, если найдены предупреждения.",
+        )
+
+    def sample_urls(self):
+        """Адреса view, для которых в базе нашлись данные."""
+        urls = [reverse("posts:index"), reverse("posts:index") + "?search=a"]
+        group = Group.objects.first()
+        if group:
+            urls.append(reverse("posts:group_list", args=[group.slug]))
+        post = Post.objects.select_related("author").first()
+        if post:
+            urls.append(
+                reverse("posts:profile", args=[post.author.username])
+            )
+            urls.append(reverse("posts:post_detail", args=[post.id]))
+        comment = Comment.objects.first()
+        if comment:
+            urls.append(
+                reverse("posts:post_comments", args=[comment.post_id])
+            )
+        follow = Follow.objects.select_related("user").first()
+        viewer = follow.user if follow else User.objects.first()
+        if viewer:
+            urls.append(reverse("posts:follow_index"))
+        return urls, viewer
+
+    def capture(self, url, viewer):
+        request = RequestFactory().get(url)
+        request.user = viewer or AnonymousUser()
+        match = resolve(request.path_info)
+        request.resolver_match = match
+        with CaptureQueriesContext(connection) as queries:
+            match.func(request, *match.args, **match.kwargs)
+        return [query["sql"] for query in queries.captured_queries]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [row[-1] for row in cursor.fetchall()]
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError(
+                "EXPLAIN QUERY PLAN разбирается только в SQLite."
+            )
+        urls, viewer = self.sample_urls()
+        warnings = 0
+        for url in urls:
+            statements = self.capture(url, viewer)
+            heading = f"{url}: запросов {len(statements)}"
+            self.stdout.write(self.style.MIGRATE_HEADING(heading))
+            for sql in statements:
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                self.stdout.write(f"  {sql[:160]}")
+                for detail in self.explain(sql):
+                    if is_warning(detail):
+                        warnings += 1
+                        self.stdout.write(
+                            self.style.WARNING(f"    !! {detail}")
+                        )
+                    else:
+                        self.stdout.write(f"       {detail}")
+        summary = f"Предупреждений: {warnings}"
+        if warnings and options["fail_on_warnings"]:
+            raise CommandError(summary)
+        self.stdout.write(summary)
@@ -0,0 +1,53 @@
+"""Потоковая выгрузка пользователей, групп, постов, комментариев и подписок.
+
+Строки читаются ``iterator(chunk_size=...)`` без кэша QuerySet, поэтому
+память не растёт с размером базы. Пароли и адреса почты не выгружаются,
+картинки — только путями внутри ``MEDIA_ROOT``.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from posts.models import Comment, Follow, Group, Post
+from posts.ndjson import open_ndjson
+
+User = get_user_model()
+
+EXPORTS = (
+    ("user", User, ("id", "username", "first_name", "last_name")),
+    ("group", Group, ("id", "title", "slug", "description")),
+    ("post", Post, ("id", "text", "pub_date", "author_id", "group_id",
+                    "image")),
+    ("comment", Comment, ("id", "post_id", "author_id", "text", "created")),
+    ("follow", Follow, ("id", "user_id", "author_id")),
+)
+
+
+class Command(BaseCommand):
+    help = "Выгружает посты и связанные записи в NDJSON."
+    # Сводка пишется в stderr: stdout может быть самим файлом выгрузки
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            help="Файл для записи; .gz сжимается, «-» — stdout.",
+        )
+        parser.add_argument("--gzip", action="store_true", default=None)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        totals = {}
+        with open_ndjson(options["output"], "w", options["gzip"]) as output:
+            for record_type, model, fields in EXPORTS:
+                rows = model.objects.order_by("pk").values(*fields)
+                count = 0
+                for row in rows.iterator(chunk_size=options["chunk_size"]):
+                    output.write(encoder.encode({"type": record_type, **row}))
+                    output.write("\n")
+                    count += 1
+                totals[record_type] = count
+        summary = ", ".join(
+            f"{name}: {count}" for name, count in totals.items()
+        )
+        self.stderr.write(self.style.SUCCESS(f"Выгружено — {summary}."))
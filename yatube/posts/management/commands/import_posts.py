@@ -0,0 +1,260 @@
+"""Загрузка NDJSON из export_posts пачками ``bulk_create``.
+
+Исходные id не сохраняются: пользователи сопоставляются по ``username``,
+группы — по ``slug``, посты создаются заново, а ссылки комментариев и
+подписок переводятся на новые id. Сигналы при ``bulk_create`` не
+срабатывают, поэтому счётчики, поисковый индекс, ленты подписок и
+популярность пересобираются один раз в конце.
+
+Каждая пачка — отдельная транзакция. В ней же в таблицу
+``posts.ImportBatch`` записывается номер последней обработанной строки и
+новые сопоставления id, так что прерванную загрузку можно продолжить той
+же командой: пачка и отметка о ней фиксируются вместе, и повторно
+пачка не загружается.
+"""
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from posts import freshness, search
+from posts.models import Comment, Follow, Group, ImportBatch, Post
+from posts.ndjson import RECORD_TYPES, open_ndjson
+from posts.utils import explicit_dates
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Загружает посты и связанные записи из NDJSON export_posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Файл выгрузки; .gz, «-» — stdin.")
+        parser.add_argument("--gzip", action="store_true", default=None)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--state",
+            help="Имя загрузки, под которым сохраняется состояние для "
+            "продолжения; по умолчанию — полный путь к файлу.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Игнорировать сохранённое состояние.",
+        )
+        parser.add_argument(
+            "--skip-rebuild",
+            action="store_true",
+            help="Не пересчитывать счётчики, индекс и ленты в конце.",
+        )
+
+    def handle(self, *args, **options):
+        if options["input"] == "-" and not options["state"]:
+            raise CommandError("Для чтения из stdin укажите --state.")
+        self.source = self.state_source(options)
+        if options["restart"]:
+            ImportBatch.objects.filter(source=self.source).delete()
+        self.maps = {name: {} for name in RECORD_TYPES}
+        done = self.load_state()
+        if done:
+            self.stdout.write(f"Продолжение со строки {done + 1}.")
+        self.skipped = 0
+        self.created = dict.fromkeys(RECORD_TYPES, 0)
+
+        batch, batch_type, last_line = [], None, done
+        with open_ndjson(options["input"], "r", options["gzip"]) as source:
+            for number, line in enumerate(source, start=1):
+                if number <= done or not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("type") not in RECORD_TYPES:
+                    raise CommandError(
+                        f"Строка {number}: неизвестный тип записи."
+                    )
+                if batch and (
+                    record["type"] != batch_type
+                    or len(batch) >= options["batch_size"]
+                ):
+                    self.flush(batch_type, batch, last_line)
+                    batch = []
+                batch_type = record["type"]
+                batch.append(record)
+                last_line = number
+        if batch:
+            self.flush(batch_type, batch, last_line)
+
+        summary = ", ".join(
+            f"{name}: {count}" for name, count in self.created.items()
+        )
+        self.stdout.write(f"Создано — {summary}; пропущено: {self.skipped}.")
+        if not options["skip_rebuild"]:
+            self.rebuild()
+        self.stdout.write(self.style.SUCCESS("Загрузка завершена."))
+
+    def state_source(self, options):
+        source = options["state"] or os.path.abspath(options["input"])
+        if len(source) > ImportBatch._meta.get_field("source").max_length:
+            raise CommandError("Слишком длинный путь: укажите --state.")
+        return source
+
+    def load_state(self):
+        """Восстанавливает сопоставления id и номер обработанной строки."""
+        done = 0
+        batches = ImportBatch.objects.filter(source=self.source).values_list(
+            "line", "record_type", "ids"
+        )
+        for line, record_type, ids in batches.iterator():
+            done = line
+            self.maps[record_type].update(
+                (int(source), target) for source, target in ids.items()
+            )
+        return done
+
+    def flush(self, record_type, records, line):
+        with transaction.atomic():
+            new_ids, created = getattr(self, f"load_{record_type}s")(records)
+            ImportBatch.objects.create(
+                source=self.source,
+                line=line,
+                record_type=record_type,
+                ids=new_ids,
+            )
+        self.maps[record_type].update(new_ids)
+        self.created[record_type] += created
+
+    def load_users(self, records):
+        existing = dict(
+            User.objects.filter(
+                username__in=[record["username"] for record in records]
+            ).values_list("username", "id")
+        )
+        mapped = {
+            record["id"]: existing[record["username"]]
+            for record in records
+            if record["username"] in existing
+        }
+        fresh = [
+            record for record in records
+            if record["username"] not in existing
+        ]
+        created = User.objects.bulk_create(
+            User(
+                username=record["username"],
+                first_name=record["first_name"],
+                last_name=record["last_name"],
+                password="!",
+            )
+            for record in fresh
+        )
+        mapped.update(
+            (record["id"], user.pk) for record, user in zip(fresh, created)
+        )
+        return mapped, len(created)
+
+    def load_groups(self, records):
+        existing = dict(
+            Group.objects.filter(
+                slug__in=[record["slug"] for record in records]
+            ).values_list("slug", "id")
+        )
+        mapped = {
+            record["id"]: existing[record["slug"]]
+            for record in records
+            if record["slug"] in existing
+        }
+        fresh = [
+            record for record in records if record["slug"] not in existing
+        ]
+        created = Group.objects.bulk_create(
+            Group(
+                title=record["title"],
+                slug=record["slug"],
+                description=record["description"],
+            )
+            for record in fresh
+        )
+        mapped.update(
+            (record["id"], group.pk) for record, group in zip(fresh, created)
+        )
+        return mapped, len(created)
+
+    def resolved(self, records, **references):
+        """Записи, все ссылки которых удалось перевести на новые id."""
+        for record in records:
+            targets = {}
+            for field, record_type in references.items():
+                source = record[field]
+                if source is None:
+                    targets[field] = None
+                elif source in self.maps[record_type]:
+                    targets[field] = self.maps[record_type][source]
+                else:
+                    break
+            else:
+                yield record, targets
+                continue
+            self.skipped += 1
+
+    def load_posts(self, records):
+        rows = list(
+            self.resolved(records, author_id="user", group_id="group")
+        )
+        with explicit_dates(Post._meta.get_field("pub_date")):
+            created = Post.objects.bulk_create(
+                Post(
+                    text=record["text"],
+                    pub_date=parse_datetime(record["pub_date"]),
+                    image=record["image"] or "",
+                    **targets,
+                )
+                for record, targets in rows
+            )
+        mapped = {
+            record["id"]: post.pk
+            for (record, _), post in zip(rows, created)
+        }
+        return mapped, len(created)
+
+    def load_comments(self, records):
+        rows = list(
+            self.resolved(records, post_id="post", author_id="user")
+        )
+        with explicit_dates(Comment._meta.get_field("created")):
+            created = Comment.objects.bulk_create(
+                Comment(
+                    text=record["text"],
+                    created=parse_datetime(record["created"]),
+                    **targets,
+                )
+                for record, targets in rows
+            )
+        # На комментарии и подписки ничто не ссылается — id не нужны
+        return {}, len(created)
+
+    def load_follows(self, records):
+        rows = list(
+            self.resolved(records, user_id="user", author_id="user")
+        )
+        Follow.objects.bulk_create(
+            (Follow(**targets) for _, targets in rows),
+            ignore_conflicts=True,
+        )
+        return {}, len(rows)
+
+    def rebuild(self):
+        """Отложенное обслуживание: один проход вместо сигнала на строку."""
+        self.stdout.write(
+            "Пересчёт счётчиков, индекса, лент подписок и популярного…"
+        )
+        call_command("recount_counters", stdout=self.stdout)
+        if search.is_available():
+            call_command("rebuild_search_index", stdout=self.stdout)
+        call_command("rebuild_timelines", stdout=self.stdout)
+        call_command("refresh_popular", "--recompute", stdout=self.stdout)
+        freshness.touch(
+            "posts", "group_counts", *freshness.SHARED_SCOPES
+        )
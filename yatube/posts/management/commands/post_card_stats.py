@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts import cards
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает долю попаданий в кэш карточек постов. "
+        "Для LocMemCache статистика своя у каждого процесса."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Обнулить статистику после вывода.",
+        )
+
+    def handle(self, *args, **options):
+        stats = cards.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} "
+            f"hit_rate={stats['hit_rate']:.1%}"
+        )
+        if options["reset"]:
+            cards.reset_stats()
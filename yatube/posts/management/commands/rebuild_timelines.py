@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Пересобирает материализованные ленты подписок."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "usernames",
+            nargs="*",
+            help="Имена пользователей; по умолчанию все подписчики.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["usernames"]:
+            user_ids = User.objects.filter(
+                username__in=options["usernames"]
+            ).values_list("pk", flat=True)
+        with transaction.atomic():
+            entries = timeline.rebuild(user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Записей в лентах: {entries}.")
+        )
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рекомендации «кого почитать» по графу подписок."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            help="Сколько рекомендаций хранить на пользователя.",
+        )
+        parser.add_argument(
+            "--block-size",
+            type=int,
+            default=5000,
+            help="Сколько пользователей обрабатывать за одну транзакцию.",
+        )
+        parser.add_argument(
+            "--max-degree",
+            type=int,
+            default=1000,
+            help="Пропускать подписки и посты с большим числом связей.",
+        )
+        parser.add_argument("--comment-weight", type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        users, suggestions = recommendations.rebuild(
+            top_k=options["top_k"],
+            block_size=options["block_size"],
+            max_degree=options["max_degree"],
+            comment_weight=options["comment_weight"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Рекомендации пересчитаны: пользователей {users}, "
+            f"рекомендаций {suggestions} "
+            f"за {time.monotonic() - started:.1f} с."
+        ))
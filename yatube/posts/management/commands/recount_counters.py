@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters, rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счётчики постов, комментариев, подписчиков, "
+        "подписок и сводки сообществ."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counters.recount_all()
+            rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS("Счётчики пересчитаны."))
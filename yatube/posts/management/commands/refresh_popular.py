@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import popular
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает популярность постов и списки популярного в кэше."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recompute",
+            action="store_true",
+            help="Посчитать оценки заново по всем комментариям.",
+        )
+
+    def handle(self, *args, **options):
+        if options["recompute"]:
+            with transaction.atomic():
+                popular.recompute()
+        posts, groups = popular.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Популярное обновлено: постов {posts}, групп {groups}."
+        ))
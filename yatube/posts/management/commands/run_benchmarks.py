@@ -0,0 +1,223 @@
+"""Бенчмарк страниц posts, users и about.
+
+Команда обходит GET-адреса из ``posts.urls``, ``users.urls`` и
+``about.urls`` тестовым клиентом, подставляя в параметры данные из базы,
+и для каждого адреса сохраняет перцентили задержки p50/p95/p99, число
+SQL-запросов и пик выделенной памяти. Результат пишется в JSON; с
+``--compare`` прогон сравнивается с сохранённой базовой линией.
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+APPS = ("posts", "users", "about")
+# Адреса, GET на которые меняет состояние
+SKIPPED = {
+    "posts:profile_follow",
+    "posts:profile_unfollow",
+    "posts:add_comment",
+    "users:logout",
+}
+
+
+def percentile(samples, share):
+    """Перцентиль по ранее отсортированной выборке."""
+    if len(samples) == 1:
+        return samples[0]
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[share - 1]
+
+
+def regressions_for(row, before, limit):
+    """Описания ухудшений одного адреса относительно базовой линии."""
+    problems = []
+    if row["p95_ms"] > before["p95_ms"] * limit:
+        problems.append(f"p95 {before['p95_ms']} → {row['p95_ms']} мс")
+    if row["queries"] > before["queries"]:
+        problems.append(f"SQL {before['queries']} → {row['queries']}")
+    if row["peak_memory_kb"] > before["peak_memory_kb"] * limit:
+        problems.append(
+            f"память {before['peak_memory_kb']} → "
+            f"{row['peak_memory_kb']} КБ"
+        )
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет задержку, число запросов и память для страниц "
+        "posts, users и about и сравнивает с базовой линией."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--output",
+            default="benchmark.json",
+            help="Куда записать результаты прогона.",
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="BASELINE",
+            help="JSON предыдущего прогона для сравнения.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20.0,
+            help="Допустимый рост p95 и памяти, в процентах.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Завершиться с ошибкой при найденной регрессии.",
+        )
+        parser.add_argument(
+            "--only",
+            nargs="*",
+            default=[],
+            help="Имена адресов, например posts:index.",
+        )
+
+    def sample_kwargs(self):
+        """Значения параметров адресов, взятые из самых «тяжёлых» данных."""
+        user = (
+            User.objects.annotate(n=Count("posts")).order_by("-n").first()
+        )
+        if user is None:
+            raise CommandError("База пуста: запустите seed_data.")
+        group = (
+            Group.objects.annotate(n=Count("posts")).order_by("-n").first()
+        )
+        post = (
+            Post.objects.annotate(n=Count("comments")).order_by("-n").first()
+        )
+        kwargs = {
+            "username": user.username,
+            "pk": user.pk,
+            "uidb64": urlsafe_base64_encode(force_bytes(user.pk)),
+            "token": default_token_generator.make_token(user),
+        }
+        if group:
+            kwargs["slug"] = group.slug
+        if post:
+            kwargs["post_id"] = post.pk
+        return user, kwargs
+
+    def targets(self, kwargs):
+        for namespace in APPS:
+            resolver = get_resolver()
+            for pattern in resolver.namespace_dict[namespace][1].url_patterns:
+                if not isinstance(pattern, URLPattern):
+                    continue
+                name = f"{namespace}:{pattern.name}"
+                if name in SKIPPED:
+                    continue
+                params = pattern.pattern.regex.groupindex
+                if not set(params) <= set(kwargs):
+                    continue
+                yield name, reverse(
+                    name, kwargs={key: kwargs[key] for key in params}
+                )
+
+    def measure(self, client, path, iterations, warmup):
+        for _ in range(warmup):
+            client.get(path)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = client.get(path)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                client.get(path)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            "path": path,
+            "status": response.status_code,
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "p99_ms": round(percentile(samples, 99), 3),
+            "queries": len(queries),
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations должно быть не меньше 1.")
+        user, kwargs = self.sample_kwargs()
+        # Адрес вне INTERNAL_IPS, чтобы не замерять debug_toolbar;
+        # ошибки view попадают в отчёт статусом 500, а не прерывают прогон
+        client = Client(raise_request_exception=False, REMOTE_ADDR="192.0.2.1")
+        client.force_login(user)
+        results = {}
+        for name, path in self.targets(kwargs):
+            if options["only"] and name not in options["only"]:
+                continue
+            results[name] = self.measure(
+                client, path, options["iterations"], options["warmup"]
+            )
+            row = results[name]
+            self.stdout.write(
+                f"{name:<36} p50={row['p50_ms']:>8.2f}ms "
+                f"p95={row['p95_ms']:>8.2f}ms p99={row['p99_ms']:>8.2f}ms "
+                f"sql={row['queries']:>3} mem={row['peak_memory_kb']:>8}KB"
+            )
+        report = {
+            "created": timezone.now().isoformat(),
+            "iterations": options["iterations"],
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "results": results,
+        }
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(f"Результаты записаны в {options['output']}.")
+        if options["compare"]:
+            self.compare(results, options)
+
+    def compare(self, results, options):
+        try:
+            with open(options["compare"], encoding="utf-8") as baseline:
+                previous = json.load(baseline)["results"]
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f"Не удалось прочитать базовую линию: {error}")
+        limit = 1 + options["threshold"] / 100
+        regressions = []
+        for name, row in results.items():
+            if name not in previous:
+                continue
+            problems = regressions_for(row, previous[name], limit)
+            if problems:
+                regressions.append(f"{name}: {', '.join(problems)}")
+        for line in regressions:
+            self.stdout.write(self.style.WARNING(line))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("Регрессий нет."))
+        elif options["fail_on_regression"]:
+            raise CommandError(f"Регрессий: {len(regressions)}.")
@@ -0,0 +1,104 @@
+"""Воркер очереди фоновых задач (posts.jobs).
+
+Запускает ``--processes`` процессов по ``--threads`` потоков; каждый поток
+забирает из базы готовые задачи и выполняет их. Главный процесс ставит
+периодические задачи из ``JOBS_PERIODIC`` и чистит старые завершённые.
+SIGINT/SIGTERM останавливают воркер после текущих задач. С ``--once``
+готовые задачи выполняются в текущем потоке, и команда завершается.
+"""
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from posts import jobs
+
+
+def run_process(threads, poll_interval):
+    """Точка входа дочернего процесса."""
+    django.setup()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    # Ctrl+C получает вся группа процессов, останавливает их главный
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs.work(threads, poll_interval, stop)
+
+
+class Command(BaseCommand):
+    help = "Выполняет фоновые задачи из очереди в базе данных."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, default=settings.JOBS_PROCESSES
+        )
+        parser.add_argument(
+            "--threads", type=int, default=settings.JOBS_THREADS
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help="Пауза в секундах, когда готовых задач нет.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить готовые задачи и выйти.",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            jobs.housekeeping()
+            done = jobs.run_pending()
+            self.stdout.write(f"Выполнено задач: {done}.")
+            return
+        processes, threads = options["processes"], options["threads"]
+        if processes < 1 or threads < 1:
+            raise CommandError("Нужен хотя бы один процесс и один поток.")
+        poll_interval = options["poll_interval"]
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        children, runner = self.start(processes, threads, poll_interval, stop)
+        self.stdout.write(
+            f"Воркер запущен: процессов {processes}, потоков {threads}."
+        )
+
+        while not stop.wait(poll_interval):
+            jobs.housekeeping()
+            if children and not all(child.is_alive() for child in children):
+                self.stderr.write("Дочерний процесс завершился.")
+                stop.set()
+
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
+        if runner is not None:
+            runner.join()
+        self.stdout.write("Воркер остановлен.")
+
+    def start(self, processes, threads, poll_interval, stop):
+        """Один процесс — пул потоков здесь же, иначе дочерние процессы."""
+        if processes == 1:
+            runner = threading.Thread(
+                target=jobs.work, args=(threads, poll_interval, stop)
+            )
+            runner.start()
+            return [], runner
+        # Соединения не должны достаться потомкам после fork
+        connections.close_all()
+        children = [
+            multiprocessing.Process(
+                target=run_process, args=(threads, poll_interval)
+            )
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+        return children, None
@@ -0,0 +1,219 @@
+"""Наполнение базы синтетическими данными для нагрузочных тестов.
+
+Все объекты создаются через ``bulk_create`` пачками, поэтому сигналы не
+срабатывают: поисковый индекс, счётчики и ленты подписок пересобираются
+в конце одним проходом. Подписки распределены по степенному закону —
+немногие авторы собирают большинство подписчиков.
+"""
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from posts import counters, popular, rollups, search, timeline
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import explicit_dates
+
+User = get_user_model()
+
+TEXT_POOL_SIZE = 2000
+SEED_IMAGES = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт синтетических пользователей, посты, подписки "
+        "и комментарии."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--posts", type=int, default=1_000_000)
+        parser.add_argument("--groups", type=int, default=50)
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=20,
+            help="Среднее число подписок на пользователя.",
+        )
+        parser.add_argument("--comments", type=int, default=200_000)
+        parser.add_argument(
+            "--images",
+            type=float,
+            default=0.1,
+            help="Доля постов с картинкой.",
+        )
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=1.2,
+            help="Показатель степенного закона популярности авторов.",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--skip-timelines",
+            action="store_true",
+            help="Не пересобирать ленты подписок.",
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        fake = Faker("ru_RU")
+        fake.seed_instance(options["seed"])
+        self.texts = [fake.paragraph() for _ in range(TEXT_POOL_SIZE)]
+        self.now = timezone.now()
+        self.span = timedelta(days=options["days"]).total_seconds()
+
+        user_ids = self.create_users(options["users"])
+        group_ids = self.create_groups(fake, options["groups"])
+        with explicit_dates(
+            Post._meta.get_field("pub_date"),
+            Comment._meta.get_field("created"),
+        ):
+            post_ids = self.create_posts(
+                user_ids, group_ids, options["posts"], options["images"]
+            )
+            self.create_comments(user_ids, post_ids, options["comments"])
+        self.create_follows(user_ids, options["follows"], options["alpha"])
+
+        self.stdout.write("Пересчёт счётчиков и поискового индекса…")
+        counters.recount_all()
+        rollups.rebuild()
+        popular.recompute()
+        popular.rebuild()
+        if search.is_available():
+            search.rebuild_index()
+        if not options["skip_timelines"]:
+            self.stdout.write("Сборка лент подписок…")
+            with transaction.atomic():
+                timeline.rebuild(user_ids)
+        self.stdout.write(self.style.SUCCESS("Готово."))
+
+    def random_date(self):
+        return self.now - timedelta(seconds=self.random.random() * self.span)
+
+    def create_users(self, count):
+        start = User.objects.count()
+        users = (
+            User(
+                username=f"seed_user_{start + i}",
+                first_name=f"Имя{i}",
+                last_name=f"Фамилия{i}",
+                password="!",
+            )
+            for i in range(count)
+        )
+        created = User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.stdout.write(f"Пользователей: {len(created)}")
+        return [user.pk for user in created]
+
+    def create_groups(self, fake, count):
+        start = Group.objects.count()
+        groups = [
+            Group(
+                title=fake.catch_phrase()[:200],
+                slug=f"seed-group-{start + i}",
+                description=fake.paragraph(),
+            )
+            for i in range(count)
+        ]
+        created = Group.objects.bulk_create(groups)
+        self.stdout.write(f"Групп: {len(created)}")
+        return [group.pk for group in created]
+
+    def seed_images(self):
+        names = []
+        for i in range(SEED_IMAGES):
+            buffer = io.BytesIO()
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            Image.new("RGB", (1280, 720), color).save(buffer, "JPEG")
+            name = f"posts/seed_{i}.jpg"
+            if not default_storage.exists(name):
+                default_storage.save(name, buffer)
+            names.append(name)
+        return names
+
+    def create_posts(self, user_ids, group_ids, count, image_share):
+        images = self.seed_images() if image_share > 0 else []
+        post_ids = []
+        for offset in range(0, count, self.batch_size):
+            batch = [
+                Post(
+                    text=self.random.choice(self.texts),
+                    author_id=self.random.choice(user_ids),
+                    group_id=(
+                        self.random.choice(group_ids)
+                        if group_ids and self.random.random() < 0.5
+                        else None
+                    ),
+                    image=(
+                        self.random.choice(images)
+                        if images and self.random.random() < image_share
+                        else ""
+                    ),
+                    pub_date=self.random_date(),
+                )
+                for _ in range(min(self.batch_size, count - offset))
+            ]
+            post_ids.extend(
+                post.pk for post in Post.objects.bulk_create(batch)
+            )
+        self.stdout.write(f"Постов: {len(post_ids)}")
+        return post_ids
+
+    def create_comments(self, user_ids, post_ids, count):
+        if not post_ids:
+            return
+        for offset in range(0, count, self.batch_size):
+            Comment.objects.bulk_create(
+                Comment(
+                    post_id=self.random.choice(post_ids),
+                    author_id=self.random.choice(user_ids),
+                    text=self.random.choice(self.texts)[:500],
+                    created=self.random_date(),
+                )
+                for _ in range(min(self.batch_size, count - offset))
+            )
+        self.stdout.write(f"Комментариев: {count}")
+
+    def create_follows(self, user_ids, average, alpha):
+        if len(user_ids) < 2:
+            return
+        # Популярность автора убывает как 1 / rank^alpha
+        authors = list(user_ids)
+        self.random.shuffle(authors)
+        weights, total = [], 0.0
+        for rank in range(len(authors)):
+            total += 1 / (rank + 1) ** alpha
+            weights.append(total)
+        created, pending = 0, []
+        for user_id in user_ids:
+            wanted = min(
+                int(self.random.expovariate(1 / average)) if average else 0,
+                len(authors) - 1,
+            )
+            chosen = set(
+                self.random.choices(authors, cum_weights=weights, k=wanted)
+            )
+            chosen.discard(user_id)
+            pending.extend(
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in chosen
+            )
+            if len(pending) >= self.batch_size:
+                Follow.objects.bulk_create(pending, ignore_conflicts=True)
+                created += len(pending)
+                pending = []
+        Follow.objects.bulk_create(pending, ignore_conflicts=True)
+        created += len(pending)
+        self.stdout.write(f"Подписок: {created}")
@@ -0,0 +1,65 @@
+"""Копирует основную базу SQLite в файл реплики для чтения.
+
+Копия снимается онлайн через backup API SQLite во временный файл рядом
+с репликой и атомарно подменяет её: открытые соединения дочитывают
+старую копию, новые видят свежую. После подмены меняется поколение
+реплики (``core.routers.bump_generation``), от которого зависят ETag и
+карточки страниц, прочитанных с реплики. С ``--interval`` команда
+повторяет синхронизацию, имитируя отставание настоящей реплики.
+"""
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.routers import bump_generation
+
+
+class Command(BaseCommand):
+    help = "Синхронизирует реплику SQLite с основной базой."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Повторять каждые N секунд; 0 — один раз.",
+        )
+
+    def handle(self, *args, **options):
+        alias = settings.REPLICA_DATABASE
+        if not alias:
+            raise CommandError(
+                "Реплика не настроена: задайте YATUBE_REPLICA_DB."
+            )
+        if {connections["default"].vendor, connections[alias].vendor} != {
+            "sqlite"
+        }:
+            raise CommandError("sync_replica работает только с SQLite.")
+        source = connections["default"].settings_dict
+        target = connections[alias].settings_dict
+        while True:
+            started = time.monotonic()
+            self.copy(source["NAME"], target["NAME"])
+            bump_generation()
+            self.stdout.write(
+                f"Реплика обновлена за {time.monotonic() - started:.2f} с."
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def copy(self, source_path, target_path):
+        temporary = f"{target_path}.sync"
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(temporary)
+        try:
+            with target:
+                source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        os.replace(temporary, target_path)
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.8 on 2023-12-24 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _follow_count(Follow, field):
+    return Coalesce(
+        Subquery(
+            Follow.objects.filter(**{field: OuterRef('user_id')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    # Ограничение раньше было объявлено вне Meta и в базу не попадало,
+    # поэтому перед его созданием убираем повторные подписки.
+    Follow = apps.get_model('posts', 'Follow')
+    UserCounters = apps.get_model('posts', 'UserCounters')
+    keep = (
+        Follow.objects.values('user', 'author')
+        .annotate(first_id=Min('id'))
+        .values('first_id')
+    )
+    deleted, _ = Follow.objects.exclude(id__in=keep).delete()
+    if deleted:
+        # 0004 посчитала подписчиков вместе с повторами, а удаление
+        # исторических моделей сигналов не вызывает
+        UserCounters.objects.update(
+            followers_count=_follow_count(Follow, 'author'),
+            following_count=_follow_count(Follow, 'user'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_follows,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created', '-id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='post_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
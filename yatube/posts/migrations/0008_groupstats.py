@@ -0,0 +1,36 @@
+# Generated by Django 4.2.8 on 2026-10-18 20:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def rebuild(apps, schema_editor):
+    from posts.rollups import rebuild
+
+    rebuild(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.group', verbose_name='Сообщество')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность')),
+                ('last_post_excerpt', models.CharField(blank=True, max_length=200, verbose_name='Начало последнего поста')),
+                ('last_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.post', verbose_name='Последний пост')),
+            ],
+            options={
+                'verbose_name': 'Сводка сообщества',
+                'verbose_name_plural': 'Сводки сообществ',
+                'indexes': [models.Index(fields=['-last_post_at'], name='group_stats_activity_idx'), models.Index(fields=['-posts_count'], name='group_stats_posts_count_idx')],
+            },
+        ),
+        migrations.RunPython(rebuild, migrations.RunPython.noop),
+    ]
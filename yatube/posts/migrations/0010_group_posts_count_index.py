@@ -0,0 +1,25 @@
+# Generated by Django 4.2.8 on 2026-10-18 21:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='groupstats',
+            name='group_stats_posts_count_idx',
+        ),
+        migrations.RemoveField(
+            model_name='groupstats',
+            name='posts_count',
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-posts_count'], name='group_posts_count_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.8 on 2026-10-18 21:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_group_posts_count_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Загрузка')),
+                ('line', models.PositiveIntegerField(verbose_name='Последняя строка')),
+                ('record_type', models.CharField(max_length=10, verbose_name='Тип записей')),
+                ('ids', models.JSONField(default=dict, verbose_name='Новые id')),
+            ],
+            options={
+                'verbose_name': 'Пачка загрузки',
+                'verbose_name_plural': 'Пачки загрузки',
+                'ordering': ('source', 'line'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importbatch',
+            constraint=models.UniqueConstraint(fields=('source', 'line'), name='unique_import_batch'),
+        ),
+    ]
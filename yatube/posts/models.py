@@ -10,15 +10,46 @@ class Group(models.Model):
     title = models.CharField("Имя", max_length=200)
     slug = models.SlugField("Адрес", unique=True)
     description = models.TextField("Описание")
+    posts_count = models.PositiveIntegerField(
+        "Количество постов",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Сообщество"
         verbose_name_plural = "Сообщества"
+        indexes = [
+            models.Index(
+                fields=["-posts_count"],
+                name="group_posts_count_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для ленты: всё, что читает posts/includes/post_list.html,
+        достаётся одним запросом с JOIN автора и группы."""
+        return self.select_related('author', 'group').only(
+            'id',
+            'text',
+            'pub_date',
+            'image',
+            'comments_count',
+            'author__id',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__id',
+            'group__title',
+            'group__slug',
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -54,15 +85,66 @@ class Post(models.Model):
     # Аргумент upload_to указывает директорию,
     # в которую будут загружаться пользовательские файлы.
 
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    # Оценка популярности и unix-время, к которому она приведена
+    # (см. posts.popular)
+    hot_score = models.FloatField(
+        'Популярность',
+        default=0,
+        editable=False,
+    )
+    hot_scored_at = models.FloatField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-hot_score', '-id'],
+                name='post_hot_score_idx',
+            ),
+            models.Index(
+                fields=['group', '-hot_score', '-id'],
+                name='post_group_hot_score_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
 
+class CommentQuerySet(models.QuerySet):
+    def for_thread(self):
+        """Комментарии страницы поста вместе с автором, одним запросом."""
+        return self.select_related('author').only(
+            'id',
+            'post_id',
+            'text',
+            'created',
+            'author__id',
+            'author__username',
+        )
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -85,11 +167,18 @@ class Comment(models.Model):
         'Дата публикации',
         auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[: settings.AMOUNT_OF_SYMBOLS]
@@ -112,16 +201,245 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписчик/подписка'
         verbose_name_plural = 'Подписчики/подписки'
-
-    constraints = [
-        models.UniqueConstraint(
-            fields=["user", "author"],
-            name="unique_follow",
-        )
-    ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"],
+                name="unique_follow",
+            )
+        ]
 
     def __str__(self):
         return (
             f"Подписчик: {self.user.username}. "
             f"Подписка: {self.author.username}"
-        )
\ No newline at end of file
+        )
+
+
+class TimelineEntry(models.Model):
+    """Запись в ленте подписок пользователя (fan-out-on-write)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'],
+                name='timeline_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.post_id}"
+
+
+class UserCounters(models.Model):
+    """Денормализованные счётчики пользователя (см. posts.counters)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class Job(models.Model):
+    """Фоновая задача очереди в базе данных (см. posts.jobs)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=255)
+    args = models.JSONField('Аргументы', default=list)
+    kwargs = models.JSONField('Именованные аргументы', default=dict)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    run_at = models.DateTimeField('Запустить не раньше')
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток')
+    locked_by = models.CharField('Воркер', max_length=255, blank=True)
+    locked_until = models.DateTimeField(
+        'Занята до',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        ordering = ('run_at', 'id')
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='job_status_run_at_idx',
+            ),
+            models.Index(
+                fields=['name', 'status'],
+                name='job_name_status_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class GroupStats(models.Model):
+    """Сводка сообщества для каталога групп (см. posts.rollups).
+
+    Число постов здесь не хранится: это ``Group.posts_count``.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Сообщество'
+    )
+    last_post = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Последний пост'
+    )
+    last_post_at = models.DateTimeField(
+        'Последняя активность',
+        null=True,
+        blank=True,
+    )
+    last_post_excerpt = models.CharField(
+        'Начало последнего поста',
+        max_length=200,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Сводка сообщества'
+        verbose_name_plural = 'Сводки сообществ'
+        indexes = [
+            models.Index(
+                fields=['-last_post_at'],
+                name='group_stats_activity_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.group_id)
+
+
+class FollowSuggestion(models.Model):
+    """Рекомендация «кого почитать» (см. posts.recommendations)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Читатель'
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор'
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'suggested'],
+                name='unique_follow_suggestion',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_score_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} → {self.suggested_id}"
+
+
+class ImportBatch(models.Model):
+    """Пачка, загруженная ``import_posts``: точка продолжения и новые id.
+
+    Пишется в той же транзакции, что и сами записи пачки, поэтому
+    загрузка и отметка о ней фиксируются или откатываются вместе.
+    """
+    source = models.CharField('Загрузка', max_length=255)
+    line = models.PositiveIntegerField('Последняя строка')
+    record_type = models.CharField('Тип записей', max_length=10)
+    ids = models.JSONField('Новые id', default=dict)
+
+    class Meta:
+        ordering = ('source', 'line')
+        verbose_name = 'Пачка загрузки'
+        verbose_name_plural = 'Пачки загрузки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'line'],
+                name='unique_import_batch',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.source}:{self.line}"
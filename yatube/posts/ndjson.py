@@ -0,0 +1,26 @@
+"""Общие части export_posts и import_posts: формат NDJSON и открытие файлов.
+
+Каждая строка — JSON-объект с полем ``type`` (``user``, ``group``,
+``post``, ``comment``, ``follow``) и исходным ``id``. Записи идут в
+порядке зависимостей: сначала пользователи и группы, затем посты,
+комментарии и подписки. Файлы с расширением ``.gz`` сжимаются gzip.
+"""
+import gzip
+import io
+import sys
+
+RECORD_TYPES = ("user", "group", "post", "comment", "follow")
+
+
+def open_ndjson(path, mode, compress=None):
+    """Текстовый поток: ``-`` — stdin/stdout, ``.gz`` — gzip."""
+    if compress is None:
+        compress = path.endswith(".gz")
+    if path == "-":
+        binary = sys.stdin.buffer if mode == "r" else sys.stdout.buffer
+        if compress:
+            binary = gzip.GzipFile(fileobj=binary, mode=mode + "b")
+        return io.TextIOWrapper(binary, encoding="utf-8")
+    if compress:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
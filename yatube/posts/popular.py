@@ -0,0 +1,134 @@
+"""Популярные посты: оценка с затуханием по активности комментариев.
+
+У поста хранится ``hot_score`` — сумма весов его комментариев, каждый из
+которых вдвое теряет вес за ``settings.POPULAR_HALF_LIFE`` секунд, — и
+``hot_scored_at``, unix-время, к которому оценка приведена. Новый
+комментарий одним ``UPDATE`` приводит оценку к текущему моменту и добавляет
+вес, поэтому параллельные комментарии не теряются.
+
+Периодическая задача ``posts.tasks.refresh_popular`` приводит к текущему
+моменту все ненулевые оценки, обнуляет угасшие и кладёт первые
+``settings.POPULAR_TOP_N`` id общей ленты и каждой группы в общий для
+процессов ``core.cache.shared_cache``: задачу выполняет воркер, а списки
+нужны всем веб-процессам. Страница ``/popular/`` читает готовый список из
+кэша и не сортирует таблицу постов.
+"""
+import math
+import time
+from collections import defaultdict
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Power
+
+from core.cache import shared_cache
+
+KEY_PREFIX = "popular"
+GROUPS_KEY = f"{KEY_PREFIX}:groups"
+
+
+def _key(group_id=None):
+    return f"{KEY_PREFIX}:{group_id or 'all'}"
+
+
+def _decayed(now):
+    """Выражение: оценка, приведённая к моменту ``now``."""
+    return F("hot_score") * Power(
+        Value(0.5),
+        (Value(now) - F("hot_scored_at")) / settings.POPULAR_HALF_LIFE,
+    )
+
+
+def bump(post_id, weight=None):
+    """Добавляет посту вес нового комментария."""
+    if weight is None:
+        weight = settings.POPULAR_COMMENT_WEIGHT
+    Post = django_apps.get_model("posts", "Post")
+    now = time.time()
+    Post.objects.filter(pk=post_id).update(
+        hot_score=_decayed(now) + weight,
+        hot_scored_at=now,
+    )
+
+
+def redecay(now=None):
+    """Приводит все оценки к ``now`` и обнуляет угасшие."""
+    Post = django_apps.get_model("posts", "Post")
+    now = time.time() if now is None else now
+    scored = Post.objects.filter(hot_score__gt=0)
+    scored.update(hot_score=_decayed(now), hot_scored_at=now)
+    return scored.filter(hot_score__lt=settings.POPULAR_MIN_SCORE).update(
+        hot_score=0
+    )
+
+
+def recompute(now=None):
+    """Считает оценки заново по всем комментариям.
+
+    Нужна после загрузки данных в обход сигналов (миграции, импорт).
+    """
+    Comment = django_apps.get_model("posts", "Comment")
+    Post = django_apps.get_model("posts", "Post")
+    now = time.time() if now is None else now
+    scores = defaultdict(float)
+    created = Comment.objects.values_list("post_id", "created")
+    for post_id, moment in created.iterator():
+        age = max(now - moment.timestamp(), 0)
+        scores[post_id] += settings.POPULAR_COMMENT_WEIGHT * math.pow(
+            0.5, age / settings.POPULAR_HALF_LIFE
+        )
+    Post.objects.filter(hot_score__gt=0).update(hot_score=0)
+    Post.objects.bulk_update(
+        [
+            Post(pk=post_id, hot_score=score, hot_scored_at=now)
+            for post_id, score in scores.items()
+            if score >= settings.POPULAR_MIN_SCORE
+        ],
+        ["hot_score", "hot_scored_at"],
+        batch_size=1000,
+    )
+
+
+def rebuild():
+    """Пересчитывает затухание и кладёт в кэш top-N лент."""
+    Post = django_apps.get_model("posts", "Post")
+    redecay()
+    limit = settings.POPULAR_TOP_N
+    top, groups = [], defaultdict(list)
+    ranked = (
+        Post.objects.filter(hot_score__gt=0)
+        .order_by("-hot_score", "-id")
+        .values_list("id", "group_id")
+    )
+    for post_id, group_id in ranked.iterator():
+        if len(top) < limit:
+            top.append(post_id)
+        if group_id is not None and len(groups[group_id]) < limit:
+            groups[group_id].append(post_id)
+    lists = {_key(group_id): ids for group_id, ids in groups.items()}
+    lists[_key()] = top
+    lists[GROUPS_KEY] = list(groups)
+    stale = set(shared_cache.get(GROUPS_KEY) or ()) - set(groups)
+    shared_cache.set_many(lists, None)
+    shared_cache.delete_many([_key(group_id) for group_id in stale])
+    return len(top), len(groups)
+
+
+def top_ids(group_id=None):
+    """id популярных постов ленты или группы, от самых популярных."""
+    ids = shared_cache.get(_key(group_id))
+    if ids is not None:
+        return ids
+    # Кэш сброшен до ближайшего пересчёта: берём первые N по индексу
+    Post = django_apps.get_model("posts", "Post")
+    ranked = Post.objects.filter(hot_score__gt=0)
+    if group_id is not None:
+        ranked = ranked.filter(group_id=group_id)
+    ids = list(
+        ranked.order_by("-hot_score", "-id").values_list("id", flat=True)[
+            :settings.POPULAR_TOP_N
+        ]
+    )
+    shared_cache.set(_key(group_id), ids, settings.POPULAR_REFRESH_INTERVAL)
+    return ids
@@ -0,0 +1,191 @@
+"""Рекомендации «кого почитать» по графу подписок и комментариев.
+
+Кандидаты для читателя — авторы, на которых подписаны его подписки
+(друзья друзей), и пользователи, комментировавшие те же посты. Вклад
+каждого промежуточного узла делится на логарифм его степени (мера
+Адамик — Адара), поэтому массовые подписчики и популярные посты весят
+меньше; узлы со степенью больше ``max_degree`` пропускаются целиком.
+
+Графы загружаются потоком из базы в разреженные матрицы смежности CSR на
+``array``: 4 байта на ребро и 8 на строку, без Python-объектов на каждое
+ребро. Оценки считаются по блокам пользователей, и первые ``top_k``
+кандидатов блока записываются в ``FollowSuggestion`` одной транзакцией,
+так что память ограничена матрицами и одним блоком результатов.
+"""
+import heapq
+import math
+from array import array
+from collections import defaultdict
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from . import freshness
+
+CHUNK_SIZE = 10000
+
+
+class Adjacency:
+    """Разреженная матрица смежности в формате CSR.
+
+    ``pairs`` — пары ``(строка, столбец)``, отсортированные по строке;
+    номера строк и столбцов — первичные ключи, ``size`` — число строк.
+    """
+
+    def __init__(self, pairs, size):
+        self.indptr = array("q", bytes(8 * (size + 1)))
+        self.indices = array("i")
+        for row, column in pairs:
+            if row >= size:
+                # Запись появилась уже после подсчёта размера
+                continue
+            self.indices.append(column)
+            self.indptr[row + 1] += 1
+        for row in range(size):
+            self.indptr[row + 1] += self.indptr[row]
+
+    def row(self, index):
+        if index + 1 >= len(self.indptr):
+            return self.indices[0:0]
+        return self.indices[self.indptr[index]:self.indptr[index + 1]]
+
+    def degree(self, index):
+        if index + 1 >= len(self.indptr):
+            return 0
+        return self.indptr[index + 1] - self.indptr[index]
+
+
+def _size(model):
+    return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+
+def _pairs(queryset, *fields):
+    return (
+        queryset.order_by(*fields)
+        .values_list(*fields)
+        .distinct()
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+class Recommender:
+    def __init__(self, top_k, max_degree, comment_weight):
+        Comment = django_apps.get_model("posts", "Comment")
+        Follow = django_apps.get_model("posts", "Follow")
+        Post = django_apps.get_model("posts", "Post")
+        User = Follow._meta.get_field("user").related_model
+
+        self.top_k = top_k
+        self.max_degree = max_degree
+        self.comment_weight = comment_weight
+        users = _size(User)
+        self.follows = Adjacency(
+            _pairs(Follow.objects.all(), "user_id", "author_id"), users
+        )
+        self.commented = Adjacency(
+            _pairs(Comment.objects.all(), "author_id", "post_id"), users
+        )
+        self.commenters = Adjacency(
+            _pairs(Comment.objects.all(), "post_id", "author_id"),
+            _size(Post),
+        )
+
+    def _spread(self, scores, nodes, adjacency, weight):
+        for node in nodes:
+            degree = adjacency.degree(node)
+            if not degree or degree > self.max_degree:
+                continue
+            share = weight / math.log2(1 + degree)
+            for candidate in adjacency.row(node):
+                scores[candidate] += share
+
+    def suggestions(self, user_id):
+        """Первые ``top_k`` пар ``(id автора, оценка)`` для читателя."""
+        followed = self.follows.row(user_id)
+        scores = defaultdict(float)
+        self._spread(scores, followed, self.follows, 1.0)
+        self._spread(
+            scores,
+            self.commented.row(user_id),
+            self.commenters,
+            self.comment_weight,
+        )
+        scores.pop(user_id, None)
+        for author_id in followed:
+            scores.pop(author_id, None)
+        return heapq.nlargest(
+            self.top_k, scores.items(), key=lambda item: (item[1], -item[0])
+        )
+
+
+def _blocks(iterable, size):
+    block = []
+    for item in iterable:
+        block.append(item)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def rebuild(top_k=None, block_size=5000, max_degree=1000,
+            comment_weight=0.5, heartbeat=None):
+    """Пересчитывает рекомендации всех пользователей.
+
+    ``heartbeat`` вызывается после загрузки графов и после каждого блока —
+    фоновая задача продлевает в нём аренду (``posts.jobs.renew_lease``).
+    Возвращает число пользователей и записанных рекомендаций.
+    """
+    FollowSuggestion = django_apps.get_model("posts", "FollowSuggestion")
+    User = FollowSuggestion._meta.get_field("user").related_model
+    recommender = Recommender(
+        top_k or settings.FOLLOW_SUGGESTIONS_TOP_K,
+        max_degree,
+        comment_weight,
+    )
+    if heartbeat is not None:
+        heartbeat()
+    users = suggestions = 0
+    user_ids = (
+        User.objects.order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for block in _blocks(user_ids, block_size):
+        rows = [
+            FollowSuggestion(user_id=user_id, suggested_id=author_id,
+                             score=score)
+            for user_id in block
+            for author_id, score in recommender.suggestions(user_id)
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(
+                user_id__gte=block[0], user_id__lte=block[-1]
+            ).delete()
+            FollowSuggestion.objects.bulk_create(rows)
+        users += len(block)
+        suggestions += len(rows)
+        if heartbeat is not None:
+            heartbeat()
+    freshness.touch("suggestions")
+    return users, suggestions
+
+
+def suggestions_for(user, limit=None):
+    """Рекомендации для страницы: один запрос по индексу."""
+    if not user.is_authenticated:
+        return []
+    FollowSuggestion = django_apps.get_model("posts", "FollowSuggestion")
+    return list(
+        FollowSuggestion.objects.filter(user=user)
+        .select_related("suggested")
+        .only(
+            "suggested__username",
+            "suggested__first_name",
+            "suggested__last_name",
+        )
+        .order_by("-score")[:limit or settings.FOLLOW_SUGGESTIONS_SHOWN]
+    )
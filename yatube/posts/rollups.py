@@ -0,0 +1,105 @@
+"""Сводки сообществ для каталога ``/groups/``.
+
+Таблица ``GroupStats`` хранит для каждой группы время и начало последнего
+поста; число постов каталог берёт из ``Group.posts_count``, который ведёт
+``posts.counters``. Сигналы (``posts.signals``) обновляют сводку при
+создании, удалении и переносе поста между группами — в том числе из
+``list_editable`` админки, который сохраняет посты через ``save()``, —
+поэтому каталог сортируется и листается без агрегатов по ``Post``.
+Последний пост группы ищется заново только когда уходит текущий
+последний, одним запросом по индексу ``(group, -pub_date, -id)``.
+Разошедшиеся сводки пересобирает ``manage.py recount_counters``.
+"""
+from django.apps import apps as django_apps
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+from .counters import BATCH_SIZE
+
+EXCERPT_LENGTH = 200
+
+
+def _model(name):
+    return django_apps.get_model("posts", name)
+
+
+def _latest_fields(Post):
+    latest = Post.objects.filter(group_id=OuterRef("pk")).order_by(
+        "-pub_date", "-id"
+    )
+    return {
+        "last_post_id": Subquery(latest.values("pk")[:1]),
+        "last_post_at": Subquery(latest.values("pub_date")[:1]),
+        "last_post_excerpt": Coalesce(
+            Subquery(
+                latest.annotate(
+                    excerpt=Substr("text", 1, EXCERPT_LENGTH)
+                ).values("excerpt")[:1]
+            ),
+            Value(""),
+        ),
+    }
+
+
+def ensure(group_id):
+    _model("GroupStats").objects.get_or_create(group_id=group_id)
+
+
+def post_added(post):
+    """Пост появился в группе: созданием или переносом."""
+    if post.group_id is None:
+        return
+    stats = _model("GroupStats").objects.filter(group_id=post.group_id)
+    updated = stats.filter(
+        Q(last_post_at__isnull=True) | Q(last_post_at__lte=post.pub_date)
+    ).update(
+        last_post=post,
+        last_post_at=post.pub_date,
+        last_post_excerpt=post.text[:EXCERPT_LENGTH],
+    )
+    if not updated and not stats.exists():
+        # Сводки нет у групп, созданных в обход сигналов
+        rebuild(group_ids=[post.group_id])
+
+
+def post_removed(post, group_id):
+    """Пост ушёл из группы ``group_id``: удалён или перенесён."""
+    if group_id is None:
+        return
+    stats = _model("GroupStats").objects.filter(group_id=group_id)
+    # При удалении ссылка на пост уже обнулена (SET_NULL)
+    stats.filter(
+        Q(last_post_id=post.pk) | Q(last_post_id__isnull=True)
+    ).update(**_latest_fields(_model("Post")))
+
+
+def post_edited(post):
+    _model("GroupStats").objects.filter(last_post_id=post.pk).update(
+        last_post_excerpt=post.text[:EXCERPT_LENGTH]
+    )
+
+
+def rebuild(get_model=django_apps.get_model, group_ids=None):
+    """Пересобирает сводки несколькими UPDATE с подзапросами.
+
+    ``get_model`` позволяет вызывать функцию из миграций с историческими
+    моделями.
+    """
+    Group = get_model("posts", "Group")
+    GroupStats = get_model("posts", "GroupStats")
+    Post = get_model("posts", "Post")
+
+    groups = Group.objects.all()
+    stats = GroupStats.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+        stats = stats.filter(pk__in=group_ids)
+    missing = groups.exclude(
+        pk__in=GroupStats.objects.values("group_id"),
+    ).values_list("pk", flat=True)
+    GroupStats.objects.bulk_create(
+        (GroupStats(group_id=pk) for pk in missing.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    stats.update(**_latest_fields(Post))
@@ -0,0 +1,140 @@
+"""Полнотекстовый поиск по постам (SQLite FTS5).
+
+Индекс хранится в виртуальной таблице ``posts_post_fts``, где ``rowid``
+совпадает с ``Post.id``. Таблица обновляется сигналами ``post_save`` и
+``post_delete`` модели ``Post``, а полностью пересобирается командой
+``manage.py rebuild_search_index``.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = "posts_post_fts"
+SNIPPET_TOKENS = 24
+HIGHLIGHT_OPEN = "\x02"
+HIGHLIGHT_CLOSE = "\x03"
+
+
+def is_available():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(search_query):
+    """Превращает строку пользователя в безопасное выражение MATCH.
+
+    Каждое слово берётся в кавычки (операторы FTS5 не работают) и ищется
+    по префиксу; слова объединяются через неявный AND.
+    """
+    words = re.findall(r"\w+", search_query.lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_OPEN, "<mark>")
+        .replace(HIGHLIGHT_CLOSE, "</mark>")
+    )
+
+
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (%s, %s)",
+            [post.pk, post.text],
+        )
+
+
+def unindex_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, text) "
+            f"SELECT id, text FROM posts_post"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
+
+
+class SearchResults:
+    """Ленивый список найденных постов, отсортированных по релевантности.
+
+    Поддерживает ``count()`` и срезы, поэтому его можно передать прямо в
+    ``posts.utils.paginator``. Посты каждой страницы получают атрибуты
+    ``search_rank`` (bm25, меньше — лучше) и ``snippet`` с подсветкой.
+    """
+
+    def __init__(self, match_query, queryset):
+        self.match_query = match_query
+        self.queryset = queryset
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT count(*) FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH %s",
+                    [self.match_query],
+                )
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        offset = key.start or 0
+        limit = (key.stop if key.stop is not None else self.count()) - offset
+        if limit <= 0:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, rank, "
+                f"snippet({FTS_TABLE}, 0, %s, %s, '…', %s) "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY rank LIMIT %s OFFSET %s",
+                [
+                    HIGHLIGHT_OPEN,
+                    HIGHLIGHT_CLOSE,
+                    SNIPPET_TOKENS,
+                    self.match_query,
+                    limit,
+                    offset,
+                ],
+            )
+            rows = cursor.fetchall()
+        posts = self.queryset.in_bulk([row[0] for row in rows])
+        results = []
+        for post_id, rank, snippet in rows:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            post.search_rank = rank
+            post.snippet = highlight(snippet)
+            results.append(post)
+        return results
+
+
+def search_posts(search_query, queryset):
+    if not is_available():
+        return queryset.filter(text__icontains=search_query)
+    match_query = build_match_query(search_query)
+    if not match_query:
+        return queryset.none()
+    return SearchResults(match_query, queryset)
@@ -0,0 +1,276 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from . import (
+    cards, counters, follow_sets, freshness, popular, rollups, search,
+    timeline,
+)
+from .models import (
+    Comment, Follow, FollowSuggestion, Group, Post, UserCounters,
+)
+
+User = get_user_model()
+
+
+def _deleted_with_parent(origin):
+    """Комментарий удаляется каскадом вместе с постом или автором.
+
+    Тогда счётчики, карточки и ленты обновляют обработчики удаления поста
+    и пользователя — один раз, а не на каждый комментарий.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin is not None and model is not Comment
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=User)
+def create_user_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._previous_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list("group_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, posts_count=1)
+        counters.bump_group(instance.group_id, posts_count=1)
+        return
+    previous_group_id = getattr(instance, "_previous_group_id", None)
+    if previous_group_id != instance.group_id:
+        counters.bump_group(previous_group_id, posts_count=-1)
+        counters.bump_group(instance.group_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, posts_count=-1)
+    counters.bump_group(instance.group_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def roll_up_post(sender, instance, created, **kwargs):
+    if created:
+        rollups.post_added(instance)
+        return
+    previous_group_id = getattr(
+        instance, "_previous_group_id", instance.group_id
+    )
+    if previous_group_id != instance.group_id:
+        rollups.post_removed(instance, previous_group_id)
+        rollups.post_added(instance)
+    else:
+        rollups.post_edited(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unroll_post(sender, instance, **kwargs):
+    rollups.post_removed(instance, instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.ensure(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_post(instance.post_id, comments_count=1)
+        popular.bump(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_parent(origin):
+        counters.bump_post(instance.post_id, comments_count=-1)
+
+
+@receiver(pre_delete, sender=User)
+def uncount_user_comments(sender, instance, **kwargs):
+    counters.uncount_comments_by(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def remember_commented_posts(sender, instance, **kwargs):
+    # Чужие посты, которые останутся без комментариев пользователя
+    instance._commented_posts = list(
+        Post.objects.select_related("author")
+        .filter(comments__author=instance)
+        .exclude(author=instance)
+        .distinct()
+    )
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, followers_count=1)
+        counters.bump_user(instance.user_id, following_count=1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_set(sender, instance, **kwargs):
+    follow_sets.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+def drop_followed_suggestion(sender, instance, created, **kwargs):
+    if created:
+        FollowSuggestion.objects.filter(
+            user_id=instance.user_id, suggested_id=instance.author_id
+        ).delete()
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, followers_count=-1)
+    counters.bump_user(instance.user_id, following_count=-1)
+    timeline.follower_removed(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    cards.bump("post", instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post_card(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_parent(origin):
+        cards.bump("post", instance.post_id)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_commented_post_cards(sender, instance, **kwargs):
+    for post in getattr(instance, "_commented_posts", ()):
+        cards.bump("post", post.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login — карточки не меняются
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    cards.bump("author", instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    cards.bump("group", instance.pk)
+
+
+def _group_slugs(*group_ids):
+    return Group.objects.filter(
+        pk__in={pk for pk in group_ids if pk is not None}
+    ).values_list("slug", flat=True)
+
+
+@receiver(post_save, sender=Post)
+def touch_saved_post_feeds(sender, instance, created, **kwargs):
+    previous_group_id = getattr(
+        instance, "_previous_group_id", instance.group_id
+    )
+    scopes = freshness.post_scopes(
+        instance, _group_slugs(instance.group_id, previous_group_id)
+    )
+    if created or previous_group_id != instance.group_id:
+        scopes.append("group_counts")
+    freshness.touch(*scopes)
+    timeline.feed_changed(instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def touch_deleted_post_feeds(sender, instance, **kwargs):
+    scopes = freshness.post_scopes(instance, _group_slugs(instance.group_id))
+    freshness.touch("group_counts", *scopes)
+    timeline.feed_changed(instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_commented_post_feeds(sender, instance, origin=None, **kwargs):
+    if _deleted_with_parent(origin):
+        return
+    post = (
+        Post.objects.select_related("author")
+        .filter(pk=instance.post_id)
+        .first()
+    )
+    if post is None:
+        return
+    freshness.touch(*freshness.post_scopes(post, _group_slugs(post.group_id)))
+    # Число комментариев видно и в лентах подписчиков
+    timeline.feed_changed(post.author_id)
+
+
+@receiver(post_delete, sender=User)
+def touch_user_commented_post_feeds(sender, instance, **kwargs):
+    posts = getattr(instance, "_commented_posts", ())
+    slugs = dict(
+        Group.objects.filter(
+            pk__in={post.group_id for post in posts},
+        ).values_list("pk", "slug")
+    )
+    scopes = []
+    for post in posts:
+        group_slugs = [slugs[post.group_id]] if post.group_id in slugs else []
+        scopes.extend(freshness.post_scopes(post, group_slugs))
+    freshness.touch(*scopes)
+    for author_id in {post.author_id for post in posts}:
+        timeline.feed_changed(author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_follow_feeds(sender, instance, **kwargs):
+    freshness.touch(
+        f"following:{instance.user_id}",
+        f"author:{instance.user.username}",
+        f"author:{instance.author.username}",
+    )
+
+
+@receiver(post_save, sender=User)
+def touch_user_feeds(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    freshness.touch("users")
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def touch_group_feeds(sender, instance, **kwargs):
+    freshness.touch("groups")
@@ -0,0 +1,54 @@
+"""Фоновые задачи приложения (см. posts.jobs)."""
+from django.core.mail import EmailMultiAlternatives
+
+from . import cards, popular, recommendations, thumbnails, timeline
+from .jobs import background, renew_lease
+from .models import Post
+
+
+@background(max_attempts=5)
+def send_email(subject, body, from_email, recipients, html=None):
+    message = EmailMultiAlternatives(subject, body, from_email, recipients)
+    if html is not None:
+        message.attach_alternative(html, "text/html")
+    message.send()
+
+
+@background
+def build_post_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).only("id", "image").first()
+    if post is None or not post.image:
+        return
+    thumbnails.build(post.image.name, ("post",))
+    cards.bump("post", post.pk)
+
+
+@background
+def fan_out_post(post_id):
+    post = (
+        Post.objects.filter(pk=post_id)
+        .only("id", "author_id", "pub_date")
+        .first()
+    )
+    if post is not None:
+        timeline.write_entries(post)
+
+
+@background
+def backfill_followers(author_id):
+    timeline.backfill_followers(author_id)
+
+
+@background
+def touch_follower_feeds(author_id):
+    timeline.touch_follower_feeds(author_id)
+
+
+@background(max_attempts=1)
+def refresh_popular():
+    popular.rebuild()
+
+
+@background(max_attempts=1)
+def recommend_follows():
+    recommendations.rebuild(heartbeat=renew_lease)
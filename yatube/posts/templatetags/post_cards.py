@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов ленты, разделённые <hr>, из кэша фрагментов."""
+    return mark_safe("\n<hr>\n".join(render_cards(posts)))
@@ -0,0 +1,14 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, preset):
+    """Готовое превью пресета или None, пока оно генерируется.
+
+    {% ready_thumbnail post.image "post" as im %}
+    """
+    return thumbnails.lookup(image, preset)
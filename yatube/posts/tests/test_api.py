@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import jobs
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            text="Тестовый текст",
+            author=cls.author,
+            group=cls.group,
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text="Ого")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_endpoints_return_json(self):
+        urls = {
+            reverse("api:post_list"): "results",
+            reverse("api:post_detail", args=[self.post.id]): "text",
+            reverse("api:post_comments", args=[self.post.id]): "results",
+            reverse("api:group_list"): "results",
+            reverse("api:group_detail", args=[self.group.slug]): "title",
+            reverse("api:group_posts", args=[self.group.slug]): "results",
+            reverse("api:profile_detail", args=["author"]): "username",
+            reverse("api:profile_posts", args=["author"]): "results",
+        }
+        for url, key in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(key, response.json())
+                self.assertTrue(response.has_header("ETag"))
+
+    def test_fields_selection(self):
+        response = self.client.get(
+            reverse("api:post_list"), {"fields": "id,author"}
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": self.post.id, "author": "author"}],
+        )
+        response = self.client.get(
+            reverse("api:post_list"), {"fields": "id,password"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_unchanged_feed_answers_304_without_queries(self):
+        url = reverse("api:group_posts", args=[self.group.slug])
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(
+                text="Новый пост", author=self.author, group=self.group
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_follow_feed(self):
+        response = self.client.get(reverse("api:follow_feed"))
+        self.assertEqual(response.status_code, 401)
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse("api:follow_feed"))
+        self.assertEqual(
+            [post["id"] for post in response.json()["results"]],
+            [self.post.id],
+        )
+
+    @override_settings(COMMENTS_PER_PAGE=2)
+    def test_comment_pages_walk_backwards(self):
+        for number in range(5):
+            Comment.objects.create(
+                post=self.post, author=self.reader, text=f"Ответ {number}"
+            )
+        url = reverse("api:post_comments", args=[self.post.id])
+        pages = [self.client.get(url).json()]
+        while pages[-1]["next"]:
+            pages.append(self.client.get(pages[-1]["next"]).json())
+        self.assertEqual(len(pages), 3)
+        ids = [[c["id"] for c in page["results"]] for page in pages]
+        self.assertIsNone(pages[0]["previous"])
+        back = self.client.get(pages[2]["previous"]).json()
+        self.assertEqual([c["id"] for c in back["results"]], ids[1])
+        back = self.client.get(back["previous"]).json()
+        self.assertEqual([c["id"] for c in back["results"]], ids[0])
+        self.assertIsNone(back["previous"])
+
+    def test_follow_feed_304_reads_one_marker(self):
+        self.client.force_login(self.reader)
+        url = reverse("api:follow_feed")
+        etag = self.client.get(url)["ETag"]
+        # Только сессия и пользователь: подписки из базы не читаются
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(text="Новый пост", author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=post, author=self.reader, text="!")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(TIMELINE_FANOUT_SYNC_MAX=0)
+    def test_follow_feed_markers_of_large_authors_are_queued(self):
+        self.client.force_login(self.reader)
+        url = reverse("api:follow_feed")
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.text = "Исправленный текст"
+            self.post.save()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs.run_pending()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
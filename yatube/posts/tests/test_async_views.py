@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase
+from django.urls import reverse
+
+from .. import async_views
+from ..models import Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="author")
+        cls.reader = User.objects.create(username="reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            text="Тестовый текст",
+            author=cls.author,
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        TimelineEntry.objects.create(
+            user=cls.reader,
+            post=cls.post,
+            author=cls.author,
+            pub_date=cls.post.pub_date,
+        )
+
+    def request(self, url, user=None):
+        request = AsyncRequestFactory().get(url)
+        request.user = user or AnonymousUser()
+        return request
+
+    async def test_async_feeds_render_posts(self):
+        pages = {
+            "posts:index": async_views.index(
+                self.request(reverse("posts:index"))
+            ),
+            "posts:group_list": async_views.group_posts(
+                self.request("/"), AsyncViewsTests.group.slug
+            ),
+            "posts:profile": async_views.profile(
+                self.request("/"), AsyncViewsTests.author.username
+            ),
+            "posts:follow_index": async_views.follow_index(
+                self.request("/", AsyncViewsTests.reader)
+            ),
+            "posts:post_detail": async_views.post_detail(
+                self.request("/"), AsyncViewsTests.post.id
+            ),
+        }
+        for name, page in pages.items():
+            with self.subTest(view=name):
+                response = await page
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("Тестовый текст", response.content.decode())
+
+    async def test_async_views_handle_missing_objects_and_anonymous(self):
+        with self.assertRaises(Http404):
+            await async_views.group_posts(self.request("/"), "missing")
+        response = await async_views.follow_index(self.request("/follow/"))
+        self.assertEqual(response.status_code, 302)
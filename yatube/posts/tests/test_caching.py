@@ -0,0 +1,226 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.cache import shared_cache
+
+from .. import async_views, cards, follow_sets
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="TestName")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            text="Тестовый текст",
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        shared_cache.clear()
+
+    def index(self):
+        return self.client.get(reverse("posts:index")).content.decode()
+
+    def test_cards_are_served_from_cache(self):
+        self.index()
+        self.assertEqual(cards.stats()["misses"], 1)
+        self.index()
+        self.assertEqual(cards.stats()["hits"], 1)
+        self.assertEqual(cards.stats()["hit_rate"], 0.5)
+        # Статистика не пишется в общий кэш на каждый запрос
+        self.assertIsNone(shared_cache.get(cards.HITS_KEY))
+
+    def test_cards_are_invalidated_by_dependencies(self):
+        self.index()
+        post = PostCardCacheTests.post
+        post.text = "Изменённый текст"
+        post.save()
+        self.assertIn("Изменённый текст", self.index())
+
+        group = PostCardCacheTests.group
+        group.title = "Переименованная группа"
+        group.save()
+        self.assertIn("Переименованная группа", self.index())
+
+        Comment.objects.create(post=post, author=post.author, text="Ого")
+        self.assertIn("Комментариев: 1", self.index())
+
+        author = PostCardCacheTests.user
+        author.first_name = "Новое имя"
+        author.save()
+        self.assertIn("Новое имя", self.index())
+        self.assertEqual(cards.stats()["hits"], 0)
+
+
+class ConditionalFeedPagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Post.objects.create(
+            text="Тестовый текст", author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_pages_answer_304_without_queries(self):
+        for url in (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=[self.group.slug]),
+            reverse("posts:profile", args=[self.author.username]),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header("Last-Modified"))
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response["ETag"]
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_etag_of_its_feeds(self):
+        other = Group.objects.create(title="Другая", slug="other")
+        urls = {
+            reverse("posts:index"): True,
+            reverse("posts:group_list", args=[self.group.slug]): True,
+            reverse("posts:group_list", args=[other.slug]): False,
+            reverse("posts:profile", args=[self.author.username]): True,
+            reverse("posts:profile", args=[self.reader.username]): False,
+        }
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(
+                text="Новый пост", author=self.author, group=self.group
+            )
+        for url, changed in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(
+                    response.status_code, 200 if changed else 304
+                )
+
+    def test_deleted_commenter_changes_etag_of_post_feeds(self):
+        post = Post.objects.get(author=self.author)
+        commenter = User.objects.create_user(username="commenter")
+        Comment.objects.create(post=post, author=commenter, text="Ого")
+        url = reverse("posts:profile", args=[self.author.username])
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            commenter.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_viewer_follows(self):
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse("posts:profile", args=[self.author.username])
+        etag = client.get(url)["ETag"]
+        self.assertNotEqual(etag, self.client.get(url)["ETag"])
+        with self.captureOnCommitCallbacks(execute=True):
+            client.get(
+                reverse("posts:profile_follow", args=[self.author.username])
+            )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["following"])
+
+    def test_markers_are_shared_between_workers(self):
+        url = reverse("posts:index")
+        etag = self.client.get(url)["ETag"]
+        # У другого воркера свой локальный кэш, а маркеры общие
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(text="Новый пост", author=self.author)
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    async def test_async_views_answer_304(self):
+        request = AsyncRequestFactory().get("/")
+        request.user = AnonymousUser()
+        response = await async_views.group_posts(request, self.group.slug)
+        request = AsyncRequestFactory().get(
+            "/", headers={"If-None-Match": response["ETag"]}
+        )
+        request.user = AnonymousUser()
+        response = await async_views.group_posts(request, self.group.slug)
+        self.assertEqual(response.status_code, 304)
+
+
+class FollowSetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username="reader")
+        cls.authors = [
+            User.objects.create_user(username=f"author{i}") for i in range(4)
+        ]
+        for author in cls.authors[2:0:-1]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        shared_cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_follow_set_is_sorted_and_cached(self):
+        follow_set = follow_sets.following_ids(self.reader)
+        ids = [author.pk for author in self.authors]
+        self.assertEqual(list(follow_set), ids[1:3])
+        # Набор лежит в общем кэше, а не в памяти процесса
+        self.assertIsNotNone(
+            shared_cache.get(f"{follow_sets.KEY_PREFIX}:{self.reader.pk}")
+        )
+        fresh = User.objects.get(pk=self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertIn(ids[1], follow_sets.following_ids(fresh))
+            self.assertNotIn(ids[0], follow_sets.following_ids(fresh))
+        self.assertFalse(follow_sets.following_ids(AnonymousUser()))
+
+    def test_profile_reads_following_state_from_cache(self):
+        author = self.authors[1]
+        url = reverse("posts:profile", args=[author.username])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertTrue(response.context["following"])
+        self.assertFalse([q for q in queries if "posts_follow" in q["sql"]])
+
+    def test_follow_and_unfollow_invalidate_cache(self):
+        author = self.authors[0]
+        follow_sets.following_ids(self.reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(
+                reverse("posts:profile_follow", args=[author.username])
+            )
+        fresh = User.objects.get(pk=self.reader.pk)
+        self.assertIn(author.pk, follow_sets.following_ids(fresh))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(
+                reverse("posts:profile_unfollow", args=[author.username])
+            )
+        fresh = User.objects.get(pk=self.reader.pk)
+        self.assertNotIn(author.pk, follow_sets.following_ids(fresh))
@@ -0,0 +1,166 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import models
+from django.db.models import F
+from django.test import TestCase
+
+from ..management.commands import import_posts
+from ..models import Comment, Follow, Group, ImportBatch, Post
+
+User = get_user_model()
+
+
+class ExplainViewsCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username="author")
+        reader = User.objects.create(username="reader")
+        Follow.objects.create(user=reader, author=author)
+        group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        for i in range(15):
+            post = Post.objects.create(
+                text=f"Пост {i}",
+                author=author,
+                group=group,
+            )
+        Comment.objects.create(post=post, author=reader, text="Ого")
+
+    def test_feed_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command("explain_views", fail_on_warnings=True, stdout=out)
+        self.assertIn("Предупреждений: 0", out.getvalue())
+
+
+class SeedAndBenchmarkCommandTests(TestCase):
+    def test_seed_data_keeps_counters_consistent(self):
+        call_command(
+            "seed_data", users=10, posts=40, groups=2, comments=15,
+            follows=3, images=0, stdout=io.StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 15)
+        author = User.objects.annotate(
+            n=models.Count("posts")
+        ).order_by("-n").first()
+        self.assertEqual(author.counters.posts_count, author.n)
+        self.assertFalse(Follow.objects.filter(user=F("author")).exists())
+
+    def test_benchmark_compares_with_baseline(self):
+        call_command(
+            "seed_data", users=5, posts=10, groups=1, comments=3,
+            images=0, stdout=io.StringIO(),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = f"{directory}/baseline.json"
+            call_command(
+                "run_benchmarks", iterations=2, warmup=0, output=baseline,
+                only=["posts:index", "about:tech"], stdout=io.StringIO(),
+            )
+            with open(baseline, encoding="utf-8") as report:
+                results = json.load(report)["results"]
+            self.assertEqual(set(results), {"posts:index", "about:tech"})
+            self.assertLessEqual(
+                results["posts:index"]["p50_ms"],
+                results["posts:index"]["p99_ms"],
+            )
+            out = io.StringIO()
+            call_command(
+                "run_benchmarks", iterations=2, warmup=0,
+                output=f"{directory}/current.json", compare=baseline,
+                threshold=10_000, only=["about:tech"], stdout=out,
+            )
+        self.assertIn("Регрессий нет", out.getvalue())
+
+
+class NdjsonTransferCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username="author")
+        reader = User.objects.create_user(username="reader")
+        group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        for i in range(7):
+            post = Post.objects.create(
+                text=f"Пост {i}", author=author, group=group
+            )
+        Comment.objects.create(post=post, author=reader, text="Ого")
+        Follow.objects.create(user=reader, author=author)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "dump.ndjson.gz")
+        call_command("export_posts", self.path, stderr=io.StringIO())
+
+    def test_export_is_gzipped_ndjson(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as dump:
+            types = [json.loads(line)["type"] for line in dump]
+        self.assertEqual(
+            types,
+            ["user"] * 2 + ["group"] + ["post"] * 7 + ["comment", "follow"],
+        )
+
+    def test_import_remaps_ids_and_rebuilds_counters(self):
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        call_command(
+            "import_posts", self.path, batch_size=3, stdout=io.StringIO()
+        )
+        author = User.objects.get(username="author")
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(author.posts.count(), 7)
+        self.assertEqual(author.counters.posts_count, 7)
+        self.assertEqual(author.counters.followers_count, 1)
+        post = Post.objects.get(text="Пост 6")
+        self.assertEqual(post.comments.get().author.username, "reader")
+        self.assertEqual(post.comments_count, 1)
+
+    def test_import_resumes_from_state(self):
+        Post.objects.all().delete()
+        call_command(
+            "import_posts", self.path, batch_size=3, stdout=io.StringIO()
+        )
+        # Прерывание после двух пачек постов: оставшиеся строки догружаются
+        self.assertEqual(
+            list(ImportBatch.objects.values_list("line", flat=True)),
+            [2, 3, 6, 9, 10, 11, 12],
+        )
+        ImportBatch.objects.filter(line__gt=9).delete()
+        Post.objects.filter(
+            pk__in=Post.objects.order_by("-pk").values("pk")[:1]
+        ).delete()
+        Comment.objects.all().delete()
+        call_command("import_posts", self.path, stdout=io.StringIO())
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_failed_batch_rolls_back_with_its_state(self):
+        Post.objects.all().delete()
+        Comment.objects.all().delete()
+        with mock.patch.object(
+            import_posts.Command,
+            "load_comments",
+            side_effect=RuntimeError("сбой"),
+        ), self.assertRaises(RuntimeError):
+            call_command(
+                "import_posts", self.path, batch_size=3, stdout=io.StringIO()
+            )
+        self.assertEqual(ImportBatch.objects.latest("line").line, 10)
+        call_command("import_posts", self.path, stdout=io.StringIO())
+        # Пачки постов уже отмечены — повторно они не загружаются
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertEqual(Comment.objects.count(), 1)
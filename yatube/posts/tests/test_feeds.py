@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SyndicationFeedsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.other = Group.objects.create(title="Другая", slug="other")
+        Post.objects.create(
+            text="Тестовый текст", author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_list_posts(self):
+        for name, args in (
+            ("posts:feed_rss", []),
+            ("posts:feed_atom", []),
+            ("posts:group_feed_rss", [self.group.slug]),
+            ("posts:group_feed_atom", [self.group.slug]),
+            ("posts:profile_feed_rss", [self.author.username]),
+            ("posts:profile_feed_atom", [self.author.username]),
+        ):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("Тестовый текст", response.content.decode())
+                self.assertTrue(response.has_header("ETag"))
+
+    def test_polling_does_not_touch_database(self):
+        url = reverse("posts:group_feed_rss", args=[self.group.slug])
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+            not_modified = self.client.get(
+                url, HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+        self.assertEqual(cached.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_only_affected_feeds_are_rebuilt(self):
+        group_url = reverse("posts:group_feed_rss", args=[self.group.slug])
+        other_url = reverse("posts:group_feed_rss", args=[self.other.slug])
+        self.client.get(group_url)
+        self.client.get(other_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(
+                text="Свежий пост", author=self.author, group=self.group
+            )
+        with self.assertNumQueries(0):
+            self.client.get(other_url)
+        response = self.client.get(group_url)
+        self.assertIn("Свежий пост", response.content.decode())
@@ -1,19 +1,25 @@
+import io
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from PIL import Image
 
+from .. import images, thumbnails
 from ..models import Post, Group, Comment
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -102,10 +108,124 @@ class PostCreateFormTests(TestCase):
         self.assertTrue(
             Post.objects.filter(
                 text=form_data["text"],
-                image=f"posts/{uploaded.name}",
+                image="posts/small.webp",
             ).exists()
         )
 
+    def test_write_transaction_covers_only_the_save(self):
+        with CaptureQueriesContext(connection) as queries:
+            PostCreateFormTests.authorized_client.get(
+                reverse("posts:post_create")
+            )
+        self.assertFalse(
+            [query for query in queries if "SAVEPOINT" in query["sql"]]
+        )
+        depth = len(connection.savepoint_ids)
+        seen = []
+        normalize = images.normalize
+
+        def spy(upload):
+            seen.append(len(connection.savepoint_ids))
+            return normalize(upload)
+
+        uploaded = SimpleUploadedFile(
+            name="locked.gif",
+            content=(
+                b"\x47\x49\x46\x38\x39\x61\x02\x00"
+                b"\x01\x00\x80\x00\x00\x00\x00\x00"
+                b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+                b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+                b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+                b"\x0A\x00\x3B"
+            ),
+            content_type="image/gif",
+        )
+        with mock.patch.object(images, "normalize", spy):
+            PostCreateFormTests.authorized_client.post(
+                reverse("posts:post_create"),
+                data={"text": "Пост с картинкой", "image": uploaded},
+            )
+        # Картинка обработана до открытия транзакции записи
+        self.assertEqual(seen, [depth])
+
+    def test_post_create_generates_thumbnails_after_commit(self):
+        uploaded = SimpleUploadedFile(
+            name="thumbnail.gif",
+            content=(
+                b"\x47\x49\x46\x38\x39\x61\x02\x00"
+                b"\x01\x00\x80\x00\x00\x00\x00\x00"
+                b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+                b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+                b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+                b"\x0A\x00\x3B"
+            ),
+            content_type="image/gif",
+        )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            PostCreateFormTests.authorized_client.post(
+                reverse("posts:post_create"),
+                data={"text": "Пост с картинкой", "image": uploaded},
+            )
+        self.assertTrue(callbacks)
+        post = Post.objects.latest("id")
+        geometry, options = settings.THUMBNAIL_PRESETS["post"]
+        thumbnail = thumbnails.backend.lookup(
+            post.image.name, geometry, **options
+        )
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageIngestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="photographer")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def camera_photo(self, size=(3000, 1200)):
+        """JPEG «с камеры»: повёрнут EXIF-тегом и с координатами GPS."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x8825] = {2: (55.0, 45.0, 0.0)}
+        buffer = io.BytesIO()
+        Image.new("RGB", size, "red").save(
+            buffer, "JPEG", exif=exif, quality=100
+        )
+        return SimpleUploadedFile(
+            "photo.jpg", buffer.getvalue(), content_type="image/jpeg"
+        )
+
+    def test_photo_is_rotated_downscaled_and_stripped(self):
+        upload = self.camera_photo()
+        self.client.post(
+            reverse("posts:post_create"),
+            data={"text": "Фото", "image": upload},
+        )
+        post = Post.objects.get(text="Фото")
+        self.assertEqual(post.image.name, "posts/photo.webp")
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, "WEBP")
+            self.assertEqual(stored.size, (768, 1920))
+            self.assertFalse(stored.getexif())
+        self.assertLess(post.image.size, upload.size / 10)
+
+    @override_settings(IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_too_large_upload_is_rejected(self):
+        response = self.client.post(
+            reverse("posts:post_create"),
+            data={"text": "Фото", "image": self.camera_photo()},
+        )
+        self.assertFalse(Post.objects.filter(text="Фото").exists())
+        self.assertTrue(response.context["form"].has_error("image"))
+
 
 class CommentCreateFormTests(TestCase):
     @classmethod
@@ -0,0 +1,164 @@
+import io
+import json
+import re
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs, tasks
+from ..models import Follow, Job, Post, TimelineEntry
+
+User = get_user_model()
+
+
+def failing_job():
+    raise RuntimeError("сбой задачи")
+
+
+def noop_job():
+    pass
+
+
+class BackgroundJobsTests(TestCase):
+    def send(self):
+        return tasks.send_email.delay(
+            "Тема", "Текст", "from@yatube.ru", ["to@yatube.ru"]
+        )
+
+    def test_delayed_job_runs_in_worker(self):
+        job = self.send()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.name, "posts.tasks.send_email")
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Тема")
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job = jobs.enqueue(
+            "posts.tests.test_jobs.failing_job", max_attempts=2
+        )
+        with self.assertLogs("posts.jobs", "ERROR"):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn("сбой задачи", job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(jobs.run_pending(), 0)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs("posts.jobs", "ERROR"):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_renew_lease_keeps_job_from_other_workers(self):
+        jobs.enqueue("posts.tests.test_jobs.noop_job")
+        job = jobs.claim("first")
+        expired = timezone.now() - timedelta(seconds=1)
+        Job.objects.filter(pk=job.pk).update(locked_until=expired)
+        with mock.patch.object(jobs._current, "job", job, create=True):
+            jobs.renew_lease()
+        self.assertIsNone(jobs.claim("second"))
+        # Аренда истекла и задачу забрали: прежний воркер должен сдаться
+        Job.objects.filter(pk=job.pk).update(locked_until=expired)
+        self.assertIsNotNone(jobs.claim("second"))
+        with mock.patch.object(jobs._current, "job", job, create=True):
+            with self.assertRaises(jobs.LeaseLost):
+                jobs.renew_lease()
+        # Вне воркера продлевать нечего
+        jobs.renew_lease()
+
+    def test_scheduled_job_waits_for_run_at(self):
+        tasks.send_email.schedule(
+            timedelta(hours=1), "Тема", "Текст", None, ["to@yatube.ru"]
+        )
+        self.assertEqual(jobs.run_pending(), 0)
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(jobs.run_pending(), 1)
+
+    def test_job_of_dead_worker_is_reclaimed(self):
+        self.send()
+        lost = jobs.claim("dead")
+        self.assertIsNone(jobs.claim("alive"))
+        Job.objects.update(locked_until=timezone.now() - timedelta(1))
+        job = jobs.claim("alive")
+        self.assertEqual(job.pk, lost.pk)
+        self.assertEqual(job.attempts, 2)
+        jobs.finish(lost, "поздний итог")
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.locked_by, "alive")
+
+    def test_job_that_kills_its_worker_fails_after_last_attempt(self):
+        job = jobs.enqueue("posts.tests.test_jobs.noop_job", max_attempts=2)
+        for worker in ("first", "second"):
+            self.assertEqual(jobs.claim(worker).pk, job.pk)
+            Job.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertIsNone(jobs.claim("third"))
+        jobs.housekeeping()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn("Аренда истекла", job.last_error)
+        self.assertIsNotNone(job.finished_at)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_password_reset_email_is_queued(self):
+        User.objects.create_user(
+            username="reader", email="reader@yatube.ru", password="secret"
+        )
+        self.client.post(
+            reverse("users:password_reset_form"),
+            {"email": "reader@yatube.ru"},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get()
+        self.assertEqual(job.name, "users.tasks.send_password_reset")
+        # Ссылка с токеном не хранится в очереди
+        self.assertNotIn("/auth/reset/", json.dumps([job.args, job.kwargs]))
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(mail.outbox[0].to, ["reader@yatube.ru"])
+        self.assertIn("/auth/reset/", mail.outbox[0].body)
+        link = re.search(r"/auth/reset/[^/]+/([^/]+)/", mail.outbox[0].body)
+        self.assertNotIn(link.group(1), json.dumps([job.args, job.kwargs]))
+
+    @override_settings(TIMELINE_FANOUT_SYNC_MAX=1)
+    def test_large_fan_out_is_queued(self):
+        author = User.objects.create_user(username="author")
+        for name in ("first", "second"):
+            Follow.objects.create(
+                user=User.objects.create_user(username=name), author=author
+            )
+        Post.objects.create(text="Пост", author=author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        jobs.run_pending()
+        self.assertEqual(TimelineEntry.objects.count(), 2)
+
+    @override_settings(
+        JOBS_PERIODIC={"posts.tests.test_jobs.noop_job": 60}
+    )
+    def test_run_worker_once_schedules_periodic_jobs(self):
+        out = io.StringIO()
+        call_command("run_worker", "--once", stdout=out)
+        self.assertIn("Выполнено задач: 1.", out.getvalue())
+        call_command("run_worker", "--once", stdout=out)
+        queued = Job.objects.get(status=Job.QUEUED)
+        self.assertGreater(
+            queued.run_at, timezone.now() + timedelta(seconds=50)
+        )
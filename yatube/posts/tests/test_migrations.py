@@ -0,0 +1,92 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Данные в исторической схеме ``migrate_from`` до миграции."""
+
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([self.migrate_from])
+        self.apps = executor.loader.project_state(
+            [self.migrate_from]
+        ).apps
+        self.addCleanup(self.migrate_to_latest)
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([self.migrate_to])
+        return executor.loader.project_state([self.migrate_to]).apps
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class CountersMigrationTests(MigrationTestCase):
+    migrate_from = ("posts", "0003_timelineentry")
+    migrate_to = ("posts", "0004_counters")
+
+    def test_counters_are_filled_from_existing_rows(self):
+        User = self.apps.get_model("auth", "User")
+        Comment = self.apps.get_model("posts", "Comment")
+        Follow = self.apps.get_model("posts", "Follow")
+        Group = self.apps.get_model("posts", "Group")
+        Post = self.apps.get_model("posts", "Post")
+        author = User.objects.create(username="author")
+        reader = User.objects.create(username="reader")
+        group = Group.objects.create(title="Группа", slug="group")
+        post = Post.objects.create(text="Пост", author=author, group=group)
+        Post.objects.create(text="Ещё пост", author=author)
+        Comment.objects.create(post=post, author=reader, text="Ого")
+        Follow.objects.create(user=reader, author=author)
+
+        apps = self.migrate()
+        UserCounters = apps.get_model("posts", "UserCounters")
+        counters = UserCounters.objects.get(user_id=author.pk)
+        self.assertEqual(
+            (counters.posts_count, counters.followers_count), (2, 1)
+        )
+        counters = UserCounters.objects.get(user_id=reader.pk)
+        self.assertEqual(
+            (counters.posts_count, counters.following_count), (0, 1)
+        )
+        Post = apps.get_model("posts", "Post")
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        Group = apps.get_model("posts", "Group")
+        self.assertEqual(Group.objects.get(pk=group.pk).posts_count, 1)
+
+
+class RemoveDuplicateFollowsTests(MigrationTestCase):
+    migrate_from = ("posts", "0004_counters")
+    migrate_to = ("posts", "0005_feed_indexes")
+
+    def test_counters_exclude_removed_duplicates(self):
+        User = self.apps.get_model("auth", "User")
+        Follow = self.apps.get_model("posts", "Follow")
+        UserCounters = self.apps.get_model("posts", "UserCounters")
+        reader = User.objects.create(username="reader")
+        author = User.objects.create(username="author")
+        for _ in range(3):
+            Follow.objects.create(user=reader, author=author)
+        for user in (reader, author):
+            UserCounters.objects.create(user=user)
+        # Так их посчитала 0004: вместе с повторами
+        UserCounters.objects.filter(user=author).update(followers_count=3)
+        UserCounters.objects.filter(user=reader).update(following_count=3)
+
+        apps = self.migrate()
+        UserCounters = apps.get_model("posts", "UserCounters")
+        self.assertEqual(apps.get_model("posts", "Follow").objects.count(), 1)
+        self.assertEqual(
+            UserCounters.objects.get(user_id=author.pk).followers_count, 1
+        )
+        self.assertEqual(
+            UserCounters.objects.get(user_id=reader.pk).following_count, 1
+        )
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post, UserCounters
 
 User = get_user_model()
 
@@ -35,4 +38,97 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     str(field), expected_value
-                )
\ No newline at end of file
+                )
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_another = Group.objects.create(
+            title='Другая группа',
+            slug='test-slug-another',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, user, **expected):
+        counters = UserCounters.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(counters, field), value)
+
+    def test_counters_follow_creates_and_deletes(self):
+        post = Post.objects.create(
+            author=self.author, text='Текст', group=self.group,
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Ого')
+        Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertCounters(self.author, posts_count=1, followers_count=1)
+        self.assertCounters(self.reader, following_count=1)
+
+        post.group = self.group_another
+        post.save()
+        self.group.refresh_from_db()
+        self.group_another.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.group_another.posts_count, 1)
+
+        self.reader.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertCounters(self.author, posts_count=1, followers_count=0)
+
+        post.delete()
+        self.group_another.refresh_from_db()
+        self.assertEqual(self.group_another.posts_count, 0)
+        self.assertCounters(self.author, posts_count=0)
+
+    def delete_user_with_comments(self, username, count):
+        user = User.objects.create_user(username=username)
+        own_post = Post.objects.create(author=user, text='Свой пост')
+        for _ in range(count):
+            Comment.objects.create(post=own_post, author=self.reader, text='1')
+            Comment.objects.create(post=self.post, author=user, text='2')
+        with CaptureQueriesContext(connection) as queries:
+            user.delete()
+        return len(queries)
+
+    def test_cascaded_comments_are_uncounted_in_bulk(self):
+        self.post = Post.objects.create(author=self.author, text='Текст')
+        Comment.objects.create(post=self.post, author=self.reader, text='Ого')
+        few = self.delete_user_with_comments('few', 2)
+        many = self.delete_user_with_comments('many', 10)
+        self.assertEqual(many, few)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_recount_counters_fixes_drift(self):
+        post = Post.objects.create(
+            author=self.author, text='Текст', group=self.group,
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserCounters.objects.all().delete()
+        Post.objects.update(comments_count=7)
+        Group.objects.update(posts_count=7)
+        call_command('recount_counters', stdout=open('/dev/null', 'w'))
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertCounters(self.author, posts_count=1, followers_count=1)
+        self.assertCounters(self.reader, following_count=1)
+
+    def test_follow_is_unique(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
@@ -0,0 +1,103 @@
+import io
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cache import shared_cache
+
+from .. import popular
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PopularPostsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.quiet = Post.objects.create(text="Тихий", author=cls.author)
+        cls.hot = Post.objects.create(
+            text="Обсуждаемый", author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        shared_cache.clear()
+
+    def comment(self, post, times=1):
+        for _ in range(times):
+            Comment.objects.create(post=post, author=self.author, text="!")
+
+    def test_comment_bumps_hot_score(self):
+        self.comment(self.hot, 2)
+        self.hot.refresh_from_db()
+        self.assertAlmostEqual(self.hot.hot_score, 2, places=3)
+
+    def test_redecay_halves_score_and_drops_faded(self):
+        now = timezone.now().timestamp()
+        Post.objects.filter(pk=self.hot.pk).update(
+            hot_score=1, hot_scored_at=now - settings.POPULAR_HALF_LIFE
+        )
+        Post.objects.filter(pk=self.quiet.pk).update(
+            hot_score=0.01, hot_scored_at=now
+        )
+        popular.redecay(now)
+        self.hot.refresh_from_db()
+        self.quiet.refresh_from_db()
+        self.assertAlmostEqual(self.hot.hot_score, 0.5)
+        self.assertEqual(self.hot.hot_scored_at, now)
+        self.assertEqual(self.quiet.hot_score, 0)
+
+    def test_popular_pages_read_ranking_from_cache(self):
+        self.comment(self.quiet)
+        self.comment(self.hot, 3)
+        popular.rebuild()
+        self.assertEqual(popular.top_ids(), [self.hot.pk, self.quiet.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("posts:popular"))
+        self.assertEqual(
+            list(response.context["page_obj"]), [self.hot, self.quiet]
+        )
+        self.assertFalse(
+            [q for q in queries if "ORDER BY" in q["sql"].upper()]
+        )
+        response = self.client.get(
+            reverse("posts:group_popular", args=[self.group.slug])
+        )
+        self.assertEqual(list(response.context["page_obj"]), [self.hot])
+
+    def test_rebuilt_lists_are_shared_between_processes(self):
+        self.comment(self.hot)
+        popular.rebuild()
+        # Кэш другого процесса пуст, но списки лежат в общем кэше
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(popular.top_ids(), [self.hot.pk])
+            self.assertEqual(popular.top_ids(self.group.pk), [self.hot.pk])
+
+    def test_rebuild_forgets_faded_groups(self):
+        self.comment(self.hot)
+        popular.rebuild()
+        Post.objects.update(hot_score=0)
+        popular.rebuild()
+        self.assertEqual(popular.top_ids(self.group.pk), [])
+
+    def test_refresh_popular_recompute(self):
+        self.comment(self.hot)
+        Post.objects.update(hot_score=0)
+        call_command("refresh_popular", "--recompute", stdout=io.StringIO())
+        self.hot.refresh_from_db()
+        self.assertAlmostEqual(self.hot.hot_score, 1, places=3)
+        self.assertEqual(popular.top_ids(), [self.hot.pk])
@@ -0,0 +1,82 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import recommendations
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ("reader", "friend", "star", "poet", "neighbour")
+        }
+        follows = [
+            ("reader", "friend"),
+            ("friend", "star"),
+            ("friend", "poet"),
+            ("neighbour", "star"),
+            ("reader", "neighbour"),
+        ]
+        for user, author in follows:
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+        post = Post.objects.create(text="Пост", author=cls.users["friend"])
+        cls.commenter = User.objects.create_user(username="commenter")
+        for author in (cls.users["reader"], cls.commenter):
+            Comment.objects.create(post=post, author=author, text="!")
+
+    def suggested(self, name="reader"):
+        return [
+            suggestion.suggested.username
+            for suggestion in recommendations.suggestions_for(
+                self.users[name], limit=10
+            )
+        ]
+
+    def test_friends_of_friends_and_co_commenters(self):
+        recommendations.rebuild()
+        # star достижим через двух подписок, poet — через одну
+        self.assertEqual(self.suggested(), ["star", "poet", "commenter"])
+
+    def test_blocks_and_degree_cap(self):
+        heartbeat = mock.Mock()
+        recommendations.rebuild(block_size=2, heartbeat=heartbeat)
+        self.assertEqual(self.suggested(), ["star", "poet", "commenter"])
+        # После загрузки графов и после каждого блока
+        blocks = -(-User.objects.count() // 2)
+        self.assertEqual(heartbeat.call_count, blocks + 1)
+        recommendations.rebuild(max_degree=1)
+        self.assertEqual(self.suggested(), ["star"])
+
+    def test_follow_drops_suggestion(self):
+        recommendations.rebuild()
+        Follow.objects.create(
+            user=self.users["reader"], author=self.users["star"]
+        )
+        self.assertNotIn("star", self.suggested())
+
+    def test_pages_show_suggestions_with_one_query(self):
+        call_command("recommend_follows", stdout=io.StringIO())
+        self.client.force_login(self.users["reader"])
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertContains(response, "Кого почитать")
+        response = self.client.get(
+            reverse("posts:profile", args=["reader"])
+        )
+        self.assertEqual(len(response.context["suggestions"]), 3)
+        response = self.client.get(
+            reverse("posts:profile", args=["friend"])
+        )
+        self.assertEqual(response.context["suggestions"], [])
+        with self.assertNumQueries(1):
+            recommendations.suggestions_for(self.users["reader"])
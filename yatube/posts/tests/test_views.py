@@ -1,4 +1,4 @@
-import shutil
+import io
 import tempfile
 
 from django import forms
@@ -6,10 +6,14 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Group, Post, Comment, Follow
+from .. import follow_sets, jobs, rollups
+from ..models import Comment, Follow, Group, GroupStats, Post, TimelineEntry
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -355,6 +359,31 @@ class PaginatorViewsTest(TestCase):
                     (Post.objects.count() - 10),
                 )
 
+    @override_settings(CURSOR_PAGINATION_VIEWS=["posts:index"])
+    def test_cursor_pagination_walks_without_count(self):
+        url = reverse("posts:index")
+        with CaptureQueriesContext(connection) as queries:
+            first_page = self.client.get(url).context["page_obj"]
+        self.assertEqual(len(first_page), 10)
+        self.assertFalse(first_page.has_previous())
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+        second_page = self.client.get(
+            url, {"after": first_page.next_cursor}
+        ).context["page_obj"]
+        self.assertEqual(len(second_page), Post.objects.count() - 10)
+        self.assertFalse(second_page.has_next())
+        back_page = self.client.get(
+            url, {"before": second_page.previous_cursor}
+        ).context["page_obj"]
+        self.assertEqual(list(back_page), list(first_page))
+
+    @override_settings(CURSOR_PAGINATION_VIEWS=["posts:index"])
+    def test_cursor_pagination_ignores_broken_token(self):
+        response = self.client.get(reverse("posts:index"), {"after": "%%%"})
+        self.assertEqual(len(response.context["page_obj"]), 10)
+
 
 class FollowViewsTests(TestCase):
     @classmethod
@@ -421,3 +450,330 @@ class FollowViewsTests(TestCase):
             FollowViewsTests.post,
             response_outside_user.context["page_obj"],
         )
+
+    def follow(self):
+        FollowViewsTests.authorized_client.get(
+            reverse(
+                "posts:profile_follow",
+                args=[FollowViewsTests.user_following],
+            )
+        )
+
+    def feed(self):
+        response = FollowViewsTests.authorized_client.get(
+            reverse("posts:follow_index"),
+        )
+        return list(response.context["page_obj"])
+
+    def test_timeline_is_backfilled_fanned_out_and_purged(self):
+        self.follow()
+        entries = TimelineEntry.objects.filter(
+            user=FollowViewsTests.user_follower,
+        )
+        self.assertEqual(
+            list(entries.values_list("post", flat=True)),
+            [FollowViewsTests.post.id],
+        )
+        new_post = Post.objects.create(
+            text="Новый пост",
+            author=FollowViewsTests.user_following,
+        )
+        self.assertEqual(self.feed(), [new_post, FollowViewsTests.post])
+        FollowViewsTests.authorized_client.get(
+            reverse(
+                "posts:profile_unfollow",
+                args=[FollowViewsTests.user_following],
+            )
+        )
+        self.assertFalse(entries.exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_popular_author_posts_are_fanned_out_on_read(self):
+        self.follow()
+        new_post = Post.objects.create(
+            text="Новый пост",
+            author=FollowViewsTests.user_following,
+        )
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [new_post, FollowViewsTests.post])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1)
+    def test_author_falling_below_threshold_is_backfilled(self):
+        self.follow()
+        other = User.objects.create_user(username="other")
+        follow = Follow.objects.create(
+            user=other, author=FollowViewsTests.user_following
+        )
+        new_post = Post.objects.create(
+            text="Новый пост",
+            author=FollowViewsTests.user_following,
+        )
+        self.assertFalse(TimelineEntry.objects.filter(post=new_post).exists())
+        follow.delete()
+        jobs.run_pending()
+        self.assertEqual(self.feed(), [new_post, FollowViewsTests.post])
+        self.assertTrue(TimelineEntry.objects.filter(post=new_post).exists())
+
+    @override_settings(TIMELINE_BACKFILL=1)
+    def test_rebuild_keeps_latest_posts_of_each_author(self):
+        self.follow()
+        new_post = Post.objects.create(
+            text="Новый пост",
+            author=FollowViewsTests.user_following,
+        )
+        TimelineEntry.objects.all().delete()
+        call_command("rebuild_timelines", stdout=io.StringIO())
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list("user", "post")),
+            [(FollowViewsTests.user_follower.pk, new_post.pk)],
+        )
+
+
+class SearchViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username="TestName")
+        cls.post_cats = Post.objects.create(
+            text="Кошки любят спать на солнце",
+            author=cls.user,
+        )
+        cls.post_dogs = Post.objects.create(
+            text="Собаки любят гулять",
+            author=cls.user,
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse("posts:index"), {"search": query})
+        return list(response.context["page_obj"])
+
+    def test_search_finds_posts_by_word_prefix(self):
+        self.assertEqual(self.search("кошк"), [SearchViewsTests.post_cats])
+        self.assertEqual(
+            set(self.search("любят")),
+            {SearchViewsTests.post_cats, SearchViewsTests.post_dogs},
+        )
+
+    def test_search_highlights_snippet(self):
+        post = self.search("собаки")[0]
+        self.assertIn("<mark>Собаки</mark>", post.snippet)
+
+    def test_search_ignores_fts_syntax(self):
+        self.assertEqual(self.search('"(*'), [])
+        self.assertEqual(self.search("NEAR( OR"), [])
+
+    def test_index_follows_post_edit_and_delete(self):
+        post = Post.objects.create(
+            text="Черепахи",
+            author=SearchViewsTests.user,
+        )
+        self.assertEqual(self.search("черепахи"), [post])
+        post.text = "Ежи"
+        post.save()
+        self.assertEqual(self.search("черепахи"), [])
+        self.assertEqual(self.search("ежи"), [post])
+        post.delete()
+        self.assertEqual(self.search("ежи"), [])
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов страниц-лент не зависит от количества постов."""
+
+    # Две первые строки каждого бюджета — сессия и пользователь.
+    BUDGETS = {
+        "posts:index": 4,
+        "posts:group_list": 5,
+        # Подписка зрителя на автора берётся из кэша (posts.follow_sets)
+        "posts:profile": 5,
+        # + рекомендации «кого почитать» одним запросом по индексу
+        "posts:follow_index": 6,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username="reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.authors = [
+            User.objects.create(
+                username=f"author{i}",
+                first_name="Имя",
+                last_name=f"Фамилия{i}",
+            )
+            for i in range(5)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        for i in range(15):
+            Post.objects.create(
+                text=f"Пост {i}",
+                author=cls.authors[i % len(cls.authors)],
+                group=cls.group,
+            )
+
+    def setUp(self):
+        self.client.force_login(QueryBudgetTests.reader)
+        follow_sets.load(QueryBudgetTests.reader.pk)
+
+    def urls(self):
+        return {
+            "posts:index": reverse("posts:index"),
+            "posts:group_list": reverse(
+                "posts:group_list", args=[QueryBudgetTests.group.slug]
+            ),
+            "posts:profile": reverse(
+                "posts:profile", args=[QueryBudgetTests.authors[0].username]
+            ),
+            "posts:follow_index": reverse("posts:follow_index"),
+        }
+
+    def test_feed_pages_stay_within_query_budget(self):
+        for name, url in self.urls().items():
+            with self.subTest(view=name):
+                with self.assertNumQueries(QueryBudgetTests.BUDGETS[name]):
+                    self.client.get(url)
+
+    def test_search_stays_within_query_budget(self):
+        with self.assertNumQueries(5):
+            self.client.get(reverse("posts:index"), {"search": "пост"})
+
+
+@override_settings(COMMENTS_PER_PAGE=20)
+class CommentsPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="author")
+        cls.post = Post.objects.create(
+            text="Тестовый текст",
+            author=cls.author,
+        )
+        for i in range(25):
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create(username=f"commenter{i}"),
+                text=f"Комментарий {i}",
+            )
+
+    def test_post_detail_embeds_first_chunk_with_bounded_queries(self):
+        url = reverse("posts:post_detail", args=[CommentsPagingTests.post.id])
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), 20)
+        self.assertEqual(comments[0].text, "Комментарий 24")
+        self.assertTrue(comments.has_next())
+
+    def test_comments_endpoint_returns_next_chunks(self):
+        first = self.client.get(
+            reverse("posts:post_detail", args=[CommentsPagingTests.post.id])
+        ).context["comments"]
+        url = reverse(
+            "posts:post_comments",
+            args=[CommentsPagingTests.post.id],
+        )
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"after": first.next_cursor})
+        self.assertTemplateUsed(response, "posts/includes/comments.html")
+        self.assertEqual(len(response.context["comments"]), 5)
+        self.assertNotContains(response, "js-more-comments")
+
+        data = self.client.get(
+            url, {"after": first.next_cursor, "format": "json"}
+        ).json()
+        self.assertEqual(
+            [comment["text"] for comment in data["comments"]],
+            [f"Комментарий {i}" for i in range(4, -1, -1)],
+        )
+        self.assertIsNone(data["next"])
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.first = Group.objects.create(
+            title="Альфа", slug="alpha", description="Первая"
+        )
+        cls.second = Group.objects.create(
+            title="Бета", slug="beta", description="Вторая"
+        )
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def post(self, text, group):
+        return Post.objects.create(text=text, author=self.author, group=group)
+
+    def test_rollup_follows_create_edit_move_and_delete(self):
+        older = self.post("Старый пост", self.first)
+        newer = self.post("Новый пост", self.first)
+        stats = self.stats(self.first)
+        self.assertEqual(stats.group.posts_count, 2)
+        self.assertEqual(stats.last_post_id, newer.pk)
+        self.assertEqual(stats.last_post_at, newer.pub_date)
+
+        newer.text = "Исправленный пост"
+        newer.save()
+        self.assertEqual(
+            self.stats(self.first).last_post_excerpt, "Исправленный пост"
+        )
+
+        newer.group = self.second
+        newer.save()
+        stats = self.stats(self.first)
+        self.assertEqual(stats.group.posts_count, 1)
+        self.assertEqual(stats.last_post_id, older.pk)
+        self.assertEqual(self.stats(self.second).last_post_id, newer.pk)
+
+        older.delete()
+        stats = self.stats(self.first)
+        self.assertEqual(stats.group.posts_count, 0)
+        self.assertIsNone(stats.last_post_id)
+        self.assertEqual(stats.last_post_excerpt, "")
+
+    def test_admin_list_editable_moves_post(self):
+        post = self.post("Пост", self.first)
+        admin = User.objects.create_superuser("admin", "a@yatube.ru", "pw")
+        self.client.force_login(admin)
+        self.client.post(reverse("admin:posts_post_changelist"), {
+            "form-TOTAL_FORMS": "1",
+            "form-INITIAL_FORMS": "1",
+            "form-0-id": post.pk,
+            "form-0-group": self.second.pk,
+            "_save": "Сохранить",
+        })
+        self.assertEqual(self.stats(self.first).group.posts_count, 0)
+        self.assertEqual(self.stats(self.second).last_post_id, post.pk)
+
+    def test_rebuild_matches_incremental_rollup(self):
+        for i in range(3):
+            self.post(f"Пост {i}", self.first if i % 2 else self.second)
+        expected = list(GroupStats.objects.order_by("pk").values())
+        GroupStats.objects.all().delete()
+        rollups.rebuild()
+        self.assertEqual(
+            list(GroupStats.objects.order_by("pk").values()), expected
+        )
+
+    def test_directory_sorts_without_touching_posts(self):
+        self.post("Пост", self.first)
+        self.post("Пост", self.first)
+        self.post("Пост", self.second)
+        url = reverse("posts:group_index")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"sort": "posts"})
+        self.assertFalse([q for q in queries if "posts_post" in q["sql"]])
+        self.assertEqual(
+            [stats.group for stats in response.context["page_obj"]],
+            [self.first, self.second],
+        )
+        response = self.client.get(url, {"sort": "activity"})
+        self.assertEqual(
+            response.context["page_obj"][0].group, self.second
+        )
+        response = self.client.get(url, {"sort": "unknown"})
+        self.assertEqual(response.context["sort"], "activity")
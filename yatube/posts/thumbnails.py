@@ -0,0 +1,110 @@
+"""Генерация превью sorl-thumbnail сразу после загрузки картинки.
+
+Превью всех пресетов из ``settings.THUMBNAIL_PRESETS`` строятся в пуле
+потоков после коммита транзакции, а не в шаблоне у первого зрителя.
+Шаблоны берут готовое превью тегом ``{% ready_thumbnail %}``, который
+только читает key-value store sorl и, пока превью нет, отдаёт ``None``.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+class LookupBackend(ThumbnailBackend):
+    """Бэкенд sorl, который умеет искать превью без его генерации."""
+
+    def lookup(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = LookupBackend()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+    return _executor
+
+
+def build(name, presets):
+    """Строит превью пресетов; ошибки пробрасываются вызывающему."""
+    for preset in presets:
+        geometry, options = settings.THUMBNAIL_PRESETS[preset]
+        backend.get_thumbnail(name, geometry, **options)
+
+
+def generate(name, presets, on_ready=None):
+    try:
+        build(name, presets)
+        if on_ready is not None:
+            on_ready()
+    except Exception:
+        logger.exception("Не удалось построить превью для %s", name)
+    finally:
+        _pending.discard(name)
+        close_old_connections()
+
+
+def _submit(name, presets, on_ready=None):
+    if name in _pending:
+        return
+    _pending.add(name)
+    if not settings.THUMBNAIL_WORKERS:
+        generate(name, presets, on_ready)
+        return
+    _get_executor().submit(generate, name, presets, on_ready)
+
+
+def schedule(image, *presets, on_ready=None):
+    """Ставит генерацию превью в очередь после коммита транзакции.
+
+    ``on_ready`` вызывается в рабочем потоке, когда все превью готовы, —
+    например, чтобы сбросить закэшированную карточку поста.
+    """
+    if image:
+        name = image.name
+        transaction.on_commit(lambda: _submit(name, presets, on_ready))
+
+
+def lookup(image, preset):
+    """Готовое превью или ``None``; отсутствующее ставится в очередь."""
+    if not image:
+        return None
+    geometry, options = settings.THUMBNAIL_PRESETS[preset]
+    try:
+        thumbnail = backend.lookup(image.name, geometry, **options)
+    except Exception:
+        logger.exception("Не удалось найти превью для %s", image.name)
+        return None
+    if thumbnail is None:
+        _submit(image.name, (preset,))
+    return thumbnail
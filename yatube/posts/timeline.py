@@ -0,0 +1,215 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+Новый пост сразу раскладывается по лентам всех подписчиков автора, поэтому
+``follow_index`` читает одну таблицу ``TimelineEntry`` по индексу
+``(user, -pub_date)``. Авторы, у которых подписчиков больше
+``settings.TIMELINE_FANOUT_MAX_FOLLOWERS``, в ленты не раскладываются:
+их посты подмешиваются при чтении (fan-out-on-read). Если подписчиков
+больше ``settings.TIMELINE_FANOUT_SYNC_MAX``, раскладка уходит в очередь
+фоновых задач (``posts.tasks.fan_out_post``), а не держит запрос.
+
+Изменение поста или его комментариев сбрасывает маркер свежести
+``following:<id>`` у каждого подписчика автора (``feed_changed``), поэтому
+условный запрос ленты подписок сверяет один маркер. При большом числе
+подписчиков маркеры сбрасывает фоновая задача.
+
+Число подписчиков берётся из ``UserCounters.followers_count``. Ленты
+заполняются одним ``INSERT … SELECT`` из постов и подписок: и для нового
+подписчика, и при полной пересборке, и когда автор опускается ниже
+порога — тогда в ленты его подписчиков попадают посты, написанные, пока
+он раздавался при чтении.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.constants import OnConflict
+
+from . import freshness
+from .models import Follow, Post, TimelineEntry, UserCounters
+
+FANOUT_BATCH_SIZE = 1000
+REBUILD_BATCH_SIZE = 500
+
+
+def followers_count(author_id):
+    count = (
+        UserCounters.objects.filter(user_id=author_id)
+        .values_list("followers_count", flat=True)
+        .first()
+    )
+    return count or 0
+
+
+def is_fanout_on_read(author):
+    return followers_count(author.pk) > settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out_post(post):
+    """Добавляет пост в ленты подписчиков автора сразу или через очередь."""
+    followers = followers_count(post.author_id)
+    if followers > settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+        return
+    if followers > settings.TIMELINE_FANOUT_SYNC_MAX:
+        from .tasks import fan_out_post as fan_out_job
+
+        fan_out_job.delay(post.pk)
+        return
+    write_entries(post)
+
+
+def write_entries(post):
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id,
+    ).values_list("user_id", flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=follower_id,
+                post=post,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for follower_id in follower_ids.iterator()
+        ),
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def feed_changed(author_id):
+    """Сбрасывает ленты подписок подписчиков автора сразу или через очередь."""
+    if followers_count(author_id) > settings.TIMELINE_FANOUT_SYNC_MAX:
+        from .tasks import touch_follower_feeds as touch_job
+
+        touch_job.delay(author_id)
+        return
+    touch_follower_feeds(author_id)
+
+
+def touch_follower_feeds(author_id):
+    follower_ids = Follow.objects.filter(author_id=author_id).values_list(
+        "user_id", flat=True
+    )
+    freshness.touch(
+        *(f"following:{user_id}" for user_id in follower_ids.iterator())
+    )
+
+
+def _copy_latest_posts(follow_where, follow_params=(), author_id=None):
+    """Кладёт последние посты авторов в ленты их подписчиков.
+
+    Один ``INSERT … SELECT``: подписки ``f``, отобранные ``follow_where``,
+    соединяются с ``TIMELINE_BACKFILL`` последними постами каждого автора
+    (только ``author_id``, если он задан). Авторы выше порога раздачи
+    пропускаются. Возвращает число новых записей.
+    """
+    posts_where, params = "", []
+    if author_id is not None:
+        posts_where = "WHERE author_id = %s"
+        params.append(author_id)
+    params += [
+        settings.TIMELINE_BACKFILL,
+        settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+        *follow_params,
+    ]
+    insert = connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)
+    suffix = connection.ops.on_conflict_suffix_sql(
+        [], OnConflict.IGNORE, None, None
+    )
+    sql = f"""
+        {insert} {TimelineEntry._meta.db_table}
+            (user_id, post_id, author_id, pub_date)
+        SELECT f.user_id, p.id, p.author_id, p.pub_date
+        FROM {Follow._meta.db_table} f
+        JOIN (
+            SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+                PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+            ) AS position
+            FROM {Post._meta.db_table}
+            {posts_where}
+        ) p ON p.author_id = f.author_id
+        LEFT JOIN {UserCounters._meta.db_table} c
+            ON c.user_id = f.author_id
+        WHERE p.position <= %s
+            AND COALESCE(c.followers_count, 0) <= %s
+            AND {follow_where}
+        {suffix}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def backfill(user, author):
+    """Кладёт в ленту нового подписчика последние посты автора."""
+    return _copy_latest_posts(
+        "f.user_id = %s AND f.author_id = %s",
+        [user.pk, author.pk],
+        author_id=author.pk,
+    )
+
+
+def backfill_followers(author_id):
+    """Раскладывает посты автора по лентам всех его подписчиков.
+
+    Нужна, когда автор опустился ниже порога раздачи: посты, написанные
+    выше порога, в ленты не попали.
+    """
+    return _copy_latest_posts(
+        "f.author_id = %s", [author_id], author_id=author_id
+    )
+
+
+def follower_removed(author_id):
+    """Вызывается после отписки: автор мог опуститься до порога."""
+    if followers_count(author_id) == settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+        from .tasks import backfill_followers as backfill_job
+
+        backfill_job.delay(author_id)
+
+
+def purge(user, author):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(user=user, author=author).delete()
+
+
+def fanout_on_read_authors(user):
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__counters__followers_count__gt=(
+                settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+            ),
+        ).values_list("author_id", flat=True)
+    )
+
+
+def feed_for(user):
+    """Посты ленты подписок пользователя, от новых к старым."""
+    inbox = Post.objects.filter(timeline_entries__user=user)
+    pulled_authors = fanout_on_read_authors(user)
+    if not pulled_authors:
+        return inbox.order_by("-timeline_entries__pub_date")
+    return Post.objects.filter(
+        Q(id__in=inbox.values("id")) | Q(author_id__in=pulled_authors)
+    )
+
+
+def rebuild(user_ids=None):
+    """Пересобирает ленты пользователей (по умолчанию всех) с нуля.
+
+    Возвращает число записей в новых лентах.
+    """
+    if user_ids is None:
+        TimelineEntry.objects.all().delete()
+        return _copy_latest_posts("1 = 1")
+    user_ids = list(user_ids)
+    created = 0
+    # Пачками, чтобы не упереться в лимит параметров запроса
+    for start in range(0, len(user_ids), REBUILD_BATCH_SIZE):
+        batch = user_ids[start:start + REBUILD_BATCH_SIZE]
+        TimelineEntry.objects.filter(user_id__in=batch).delete()
+        created += _copy_latest_posts(
+            f"f.user_id IN ({', '.join(['%s'] * len(batch))})", batch
+        )
+    return created
@@ -1,17 +1,49 @@
+from django.conf import settings
 from django.urls import path, include
-from . import views
+from . import async_views, feeds, views
 
 app_name = 'posts'
 
+# Под ASGI read-only страницы обслуживают асинхронные view
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
+
 urlpatterns = [
-    path("", views.index, name="index"),
-    path("group/<slug:slug>/", views.group_posts, name="group_list"),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path("", read_views.index, name="index"),
+    path("groups/", views.group_index, name="group_index"),
+    path("group/<slug:slug>/", read_views.group_posts, name="group_list"),
+    path("popular/", views.popular_posts, name="popular"),
+    path(
+        "group/<slug:slug>/popular/",
+        views.group_popular,
+        name="group_popular",
+    ),
+    path('profile/<str:username>/', read_views.profile, name='profile'),
+    path('posts/<int:post_id>/', read_views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
-    path("follow/", views.follow_index, name="follow_index"),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments',
+    ),
+    path("rss/", feeds.latest_rss, name="feed_rss"),
+    path("atom/", feeds.latest_atom, name="feed_atom"),
+    path("group/<slug:slug>/rss/", feeds.group_rss, name="group_feed_rss"),
+    path(
+        "group/<slug:slug>/atom/", feeds.group_atom, name="group_feed_atom"
+    ),
+    path(
+        "profile/<str:username>/rss/",
+        feeds.author_rss,
+        name="profile_feed_rss",
+    ),
+    path(
+        "profile/<str:username>/atom/",
+        feeds.author_atom,
+        name="profile_feed_atom",
+    ),
+    path("follow/", read_views.follow_index, name="follow_index"),
     path("profile/<str:username>/follow/", views.profile_follow, name="profile_follow",),
     path("profile/<str:username>/unfollow/", views.profile_unfollow, name="profile_unfollow",),
 ]
\ No newline at end of file
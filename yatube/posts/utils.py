@@ -1,8 +1,150 @@
+import base64
+import binascii
+from contextlib import contextmanager
+from datetime import datetime
+
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+
+PAGE_BAR_ON_EACH_SIDE = 2
+PAGE_BAR_ON_ENDS = 1
+
 
+def paginator(object_list, request, cursor=None):
+    """Возвращает страницу постов для шаблона ``includes/paginator.html``.
 
-def paginator(object_list, request):
+    По умолчанию это обычная нумерованная страница с сокращённой
+    навигацией. View из ``settings.CURSOR_PAGINATION_VIEWS`` (или при
+    ``cursor=True``) листаются курсором по ``(pub_date, id)``: без COUNT(*)
+    и OFFSET, с непрозрачными токенами ``?after=``/``?before=``.
+    """
+    if cursor is None:
+        match = getattr(request, "resolver_match", None)
+        cursor = (
+            match is not None
+            and match.view_name in settings.CURSOR_PAGINATION_VIEWS
+        )
+    if cursor and isinstance(object_list, QuerySet):
+        return CursorPaginator(
+            object_list, settings.RECORDS_PER_PAGE
+        ).get_page(request.GET.get("after"), request.GET.get("before"))
     paginator = Paginator(object_list, settings.RECORDS_PER_PAGE)
-    page_number = request.GET.get("page")
-    return paginator.get_page(page_number)
\ No newline at end of file
+    page = paginator.get_page(request.GET.get("page"))
+    page.page_range = paginator.get_elided_page_range(
+        page.number,
+        on_each_side=PAGE_BAR_ON_EACH_SIDE,
+        on_ends=PAGE_BAR_ON_ENDS,
+    )
+    return page
+
+
+def encode_cursor(obj, field="pub_date"):
+    raw = f"{getattr(obj, field).isoformat()}|{obj.pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора; для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        pub_date, pk = raw.decode().split("|")
+        return datetime.fromisoformat(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous, field):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.field = field
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page and self.object_list:
+            return encode_cursor(self.object_list[-1], self.field)
+        return ""
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page and self.object_list:
+            return encode_cursor(self.object_list[0], self.field)
+        return ""
+
+
+class CursorPaginator:
+    """Keyset-пагинация по ``(field, id)`` от новых записей к старым."""
+
+    def __init__(self, queryset, per_page, field="pub_date"):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    def get_page(self, after=None, before=None):
+        after, before = decode_cursor(after), decode_cursor(before)
+        field = self.field
+        if before and not after:
+            value, pk = before
+            rows = list(
+                self.queryset.filter(
+                    Q(**{f"{field}__gt": value})
+                    | Q(**{field: value, "pk__gt": pk})
+                ).order_by(field, "pk")[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            return CursorPage(
+                rows[:self.per_page][::-1],
+                has_next=True,
+                has_previous=has_previous,
+                field=field,
+            )
+        queryset = self.queryset.order_by(f"-{field}", "-pk")
+        if after:
+            value, pk = after
+            queryset = queryset.filter(
+                Q(**{f"{field}__lt": value})
+                | Q(**{field: value, "pk__lt": pk})
+            )
+        rows = list(queryset[:self.per_page + 1])
+        return CursorPage(
+            rows[:self.per_page],
+            has_next=len(rows) > self.per_page,
+            has_previous=bool(after),
+            field=field,
+        )
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключает auto_now_add, чтобы bulk_create сохранил даты."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
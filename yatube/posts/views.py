@@ -1,33 +1,89 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
+from django.conf import settings
+from django.db.models import F
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.db import write_transaction
+
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post
-from .utils import paginator
+from .models import Comment, Follow, Group, GroupStats, Post
+from . import (
+    cards, follow_sets, freshness, popular, recommendations, tasks,
+    thumbnails, timeline,
+)
+from .counters import counters_for
+from .search import search_posts
+from .utils import CursorPaginator, paginator
 
 User = get_user_model()
 
 
+def schedule_post_thumbnails(post):
+    if settings.THUMBNAIL_USE_JOBS:
+        if post.image:
+            tasks.build_post_thumbnails.delay(post.pk)
+        return
+    thumbnails.schedule(
+        post.image,
+        "post",
+        on_ready=lambda: cards.bump("post", post.pk),
+    )
+
+
+GROUP_ORDERINGS = {
+    "activity": (F("last_post_at").desc(nulls_last=True), "group__title"),
+    "posts": ("-group__posts_count", "group__title"),
+    "title": ("group__title",),
+}
+
+
+def index_scopes(request):
+    return ["posts"]
+
+
+def group_index_scopes(request):
+    # Сводки меняются только вместе с постами
+    return ["posts"]
+
+
+def group_scopes(request, slug):
+    return [f"group:{slug}"]
+
+
+def profile_scopes(request, username):
+    scopes = [f"author:{username}"]
+    if request.user.is_authenticated:
+        # Кнопка «Подписаться» зависит от подписок зрителя
+        scopes.append(f"following:{request.user.pk}")
+        if request.user.username == username:
+            scopes.append("suggestions")
+    return scopes
+
+
+@freshness.conditional(index_scopes)
 def index(request):
     search_query = request.GET.get("search", "")
     if search_query:
-        post_list = Post.objects.select_related("group").filter(
-            text__iregex=search_query,
+        post_list = search_posts(
+            search_query,
+            Post.objects.for_feed(),
         )
     else:
-        post_list = Post.objects.select_related("group").all()
+        post_list = Post.objects.for_feed()
     page_obj = paginator(post_list, request)
     context = {
         "page_obj": page_obj,
+        "search_query": search_query,
     }
     return render(request, "posts/index.html", context)
 
 
+@freshness.conditional(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.for_feed()
     page_obj = paginator(post_list, request)
     context = {
         "group": group,
@@ -36,41 +92,132 @@ def group_posts(request, slug):
     return render(request, "posts/group_list.html", context)
 
 
+@freshness.conditional(group_index_scopes)
+def group_index(request):
+    sort = request.GET.get("sort")
+    if sort not in GROUP_ORDERINGS:
+        sort = "activity"
+    stats = GroupStats.objects.select_related("group").order_by(
+        *GROUP_ORDERINGS[sort]
+    )
+    context = {
+        "page_obj": paginator(stats, request, cursor=False),
+        "sort": sort,
+    }
+    return render(request, "posts/groups.html", context)
+
+
+def popular_page(post_ids, request):
+    """Страница популярных постов по готовому списку id из кэша."""
+    page_obj = paginator(post_ids, request, cursor=False)
+    posts = Post.objects.for_feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[post_id] for post_id in page_obj.object_list
+        if post_id in posts
+    ]
+    return page_obj
+
+
+def popular_posts(request):
+    context = {
+        "page_obj": popular_page(popular.top_ids(), request),
+    }
+    return render(request, "posts/popular.html", context)
+
+
+def group_popular(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    context = {
+        "group": group,
+        "page_obj": popular_page(popular.top_ids(group.pk), request),
+    }
+    return render(request, "posts/popular.html", context)
+
+
+@freshness.conditional(profile_scopes)
 def profile(request, username):
-    user_obj = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author=user_obj)
-    page_obj = paginator(post_list, request)
-    following = (
-        request.user.is_authenticated
-        and (
-            Follow.objects.filter(
-                user=request.user,
-                author=user_obj,
-            )
-        ).exists()
+    user_obj = get_object_or_404(
+        User.objects.select_related("counters"),
+        username=username,
     )
+    post_list = Post.objects.filter(author=user_obj).for_feed()
+    page_obj = paginator(post_list, request)
+    user_counters = counters_for(user_obj)
+    following = user_obj.pk in follow_sets.following_ids(request.user)
+    suggestions = []
+    if request.user == user_obj:
+        suggestions = recommendations.suggestions_for(request.user)
     context = {
         "user_obj": user_obj,
         "page_obj": page_obj,
-        "amount_posts": post_list.count(),
+        "counters": user_counters,
+        "amount_posts": user_counters.posts_count,
         "following": following,
+        "suggestions": suggestions,
     }
     return render(request, "posts/profile.html", context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related("author__counters", "group"),
+        id=post_id,
+    )
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post_id)
+    comments = comments_page(post.id, request)
     context = {
         "post": post,
-        "amount_posts": Post.objects.filter(author=post.author).count(),
+        "amount_posts": counters_for(post.author).posts_count,
         "form": form,
         "comments": comments,
     }
     return render(request, "posts/post_detail.html", context)
 
 
+def comments_page(post_id, request):
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).for_thread(),
+        settings.COMMENTS_PER_PAGE,
+        field="created",
+    ).get_page(request.GET.get("after"), request.GET.get("before"))
+
+
+def post_comments(request, post_id):
+    """Следующая порция комментариев: HTML-фрагмент или ?format=json."""
+    post = get_object_or_404(Post.objects.only("id"), id=post_id)
+    comments = comments_page(post.id, request)
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "comments": [
+                {
+                    "id": comment.id,
+                    "author": comment.author.username,
+                    "text": comment.text,
+                    "created": comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+            "next": comments.next_cursor or None,
+        })
+    context = {
+        "post": post,
+        "comments": comments,
+    }
+    return render(request, "posts/includes/comments.html", context)
+
+
+@write_transaction
+def save_post(post, image_changed=True):
+    """Сохраняет проверенный пост; повторы используют тот же объект.
+
+    Картинка уже обработана в ``PostForm.clean_image`` и записывается в
+    хранилище один раз: после первой попытки файл помечен сохранённым.
+    """
+    post.save()
+    if image_changed:
+        schedule_post_thumbnails(post)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -78,7 +225,7 @@ def post_create(request):
     if request.method == "POST" and form.is_valid():
         temp_form = form.save(commit=False)
         temp_form.author = request.user
-        temp_form.save()
+        save_post(temp_form)
         return redirect("posts:profile", temp_form.author)
 
     context = {
@@ -101,7 +248,8 @@ def post_edit(request, post_id):
     )
 
     if request.method == "POST" and form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        save_post(post, image_changed="image" in form.changed_data)
         return redirect("posts:post_detail", post_id)
 
     context = {
@@ -118,32 +266,45 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = Post.objects.get(id=post_id)
-        comment.save()
+        write_transaction(comment.save)()
     return redirect("posts:post_detail", post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = timeline.feed_for(request.user).for_feed()
     page_obj = paginator(post_list, request)
     context = {
         "page_obj": page_obj,
+        "suggestions": recommendations.suggestions_for(request.user),
     }
     return render(request, "posts/follow.html", context)
 
 
+@write_transaction
+def follow(user, author):
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if created:
+        timeline.backfill(user, author)
+
+
+@write_transaction
+def unfollow(user, author):
+    Follow.objects.filter(user=user, author=author).delete()
+    timeline.purge(user, author)
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        follow(request.user, author)
     return redirect("posts:profile", username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    following = Follow.objects.filter(user=request.user, author=author)
-    following.delete()
+    unfollow(request.user, author)
     return redirect("posts:profile", username)
 
@@ -1,6 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from .tasks import send_password_reset
+
 User = get_user_model()
 
 
@@ -16,3 +18,27 @@ class CreationForm(UserCreationForm):
                   'username',
                   'email'
                   )
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо для сброса пароля отправляется фоновой задачей.
+
+    В очередь уходят только id пользователя, адрес и домен: токен и
+    ссылка создаются в задаче ``users.tasks.send_password_reset`` и не
+    хранятся в ``Job.args``.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        send_password_reset.delay(
+            context["user"].pk,
+            to_email,
+            context["domain"],
+            context["site_name"],
+            context["protocol"] == "https",
+            subject_template_name,
+            email_template_name,
+            from_email,
+            html_email_template_name,
+        )
@@ -0,0 +1,42 @@
+"""Фоновые задачи пользователей (см. posts.jobs)."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts.jobs import background
+from posts.tasks import send_email
+
+User = get_user_model()
+
+
+@background(max_attempts=5)
+def send_password_reset(user_id, to_email, domain, site_name, use_https,
+                        subject_template_name, email_template_name,
+                        from_email=None, html_email_template_name=None):
+    """Письмо со ссылкой для сброса пароля.
+
+    Токен создаётся здесь, в воркере: в очереди лежат только id
+    пользователя, адрес и домен, так что ссылку нельзя достать из
+    таблицы задач.
+    """
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    context = {
+        "email": to_email,
+        "domain": domain,
+        "site_name": site_name,
+        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+        "user": user,
+        "token": default_token_generator.make_token(user),
+        "protocol": "https" if use_https else "http",
+    }
+    subject = loader.render_to_string(subject_template_name, context)
+    subject = "".join(subject.splitlines())
+    body = loader.render_to_string(email_template_name, context)
+    html = None
+    if html_email_template_name is not None:
+        html = loader.render_to_string(html_email_template_name, context)
+    send_email(subject, body, from_email, [to_email], html)
@@ -3,6 +3,7 @@ from django.contrib.auth.views import LogoutView, LoginView, PasswordChangeView,
     PasswordResetView, PasswordResetDoneView, PasswordResetConfirmView, PasswordResetCompleteView
 from django.urls import path
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -45,6 +46,7 @@ urlpatterns = [
         "password_reset/",
         PasswordResetView.as_view(
             template_name="users/password_reset_form.html",
+            form_class=QueuedPasswordResetForm,
         ),
         name="password_reset_form",
     ),
@@ -7,6 +7,8 @@ from django.views.generic import CreateView, UpdateView
 # Берём, тоже пригодится
 from django.urls import reverse_lazy
 
+from posts import cards, thumbnails
+
 # Импортируем класс формы, чтобы сослаться на неё во view-классе
 from .forms import CreationForm
 
@@ -40,4 +42,14 @@ class UserUpdateView(UpdateView):
         obj = super().get_object()
         if obj != self.request.user:
             raise PermissionDenied()
-        return obj
\ No newline at end of file
+        return obj
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if "profile_picture" in form.changed_data:
+            thumbnails.schedule(
+                self.object.profile_picture,
+                "avatar",
+                on_ready=lambda: cards.bump("author", self.object.pk),
+            )
+        return response
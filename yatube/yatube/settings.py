@@ -57,7 +57,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -100,11 +103,81 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': os.environ.get(
+            'YATUBE_SQLITE_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
     }
 }
 
+# Боевой профиль SQLite (core.db, core.backends.sqlite3): WAL и PRAGMA на
+# каждом соединении, постоянные соединения и BEGIN IMMEDIATE, чтобы
+# писатели ждали очереди, а не получали «database is locked».
+SQLITE_PRODUCTION = os.environ.get('YATUBE_SQLITE_PRODUCTION', '') == '1'
+SQLITE_PRAGMAS = {}
+if SQLITE_PRODUCTION:
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+        'temp_store': 'MEMORY',
+        'cache_size': -20000,
+        'mmap_size': 134217728,
+    }
+# Сколько раз core.db.write_transaction повторяет занятую базу и начальная
+# задержка в секундах (удваивается с каждой попыткой).
+DB_WRITE_RETRIES = 5
+DB_WRITE_RETRY_DELAY = 0.05
+
+# Очередь фоновых задач в базе (posts.jobs, команда run_worker).
+# JOBS_EAGER = True — выполнять задачи сразу после коммита, без воркера.
+# JOBS_LEASE — сколько секунд задача числится за воркером, прежде чем её
+# заберёт другой (долгие задачи продлевают аренду через
+# posts.jobs.renew_lease); JOBS_RETRY_DELAY — первая пауза перед повтором
+# (удваивается); JOBS_PERIODIC — {'модуль.функция': интервал в секундах}.
+JOBS_EAGER = False
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_DELAY = 30
+JOBS_LEASE = 10 * 60
+JOBS_POLL_INTERVAL = 1
+JOBS_PROCESSES = 1
+JOBS_THREADS = 4
+JOBS_PERIODIC = {
+    'posts.tasks.refresh_popular': 5 * 60,
+    'posts.tasks.recommend_follows': 24 * 60 * 60,
+}
+JOBS_KEEP_FINISHED = 7 * 24 * 60 * 60
+
+# Реплика для чтения (core.routers). Локально это второй файл SQLite,
+# который заполняет команда sync_replica. Другая репликация должна после
+# каждого догоняния вызывать core.routers.bump_generation, иначе ответы,
+# прочитанные с реплики, не кэшируются.
+REPLICA_DATABASE = None
+if os.environ.get('YATUBE_REPLICA_DB'):
+    REPLICA_DATABASE = 'replica'
+    DATABASES[REPLICA_DATABASE] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['YATUBE_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_APPS = ['posts', 'auth']
+REPLICA_READ_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:post_comments',
+    'posts:follow_index',
+]
+REPLICA_PIN_COOKIE = 'primary_until'
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -163,6 +236,25 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+# collectstatic добавляет в имена файлов хеш содержимого и сжимает
+# текстовые форматы заранее (core.storage).
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Что сжимать в .gz (и .br при установленном brotli) при collectstatic.
+STATIC_COMPRESS_EXTENSIONS = ['.css', '.js', '.svg', '.map', '.txt', '.json']
+# Сколько секунд браузер хранит файлы без хеша в имени; файлы с хешем
+# отдаются с годовым Cache-Control: immutable (core.middleware).
+STATIC_MAX_AGE = 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -170,6 +262,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+TEST_RUNNER = 'core.runner.TestRunner'
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
@@ -178,9 +272,106 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.LocMemCache',
+    },
+    # Общий для всех процессов кэш (core.cache.shared_cache): маркеры
+    # свежести, версии карточек и наборы подписок. Файлы подходят для
+    # одного сервера; для нескольких — Redis
+    # (django.core.cache.backends.redis.RedisCache). Тесты
+    # (core.runner.TestRunner) пишут его во временный каталог.
+    'shared': {
+        'BACKEND': 'core.cache.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_SHARED_CACHE_DIR', os.path.join(BASE_DIR, 'shared_cache')
+        ),
+        # Уборка раз в CULL_INTERVAL секунд: истёкшие, затем самые
+        # старые записи (core.cache.FileBasedCache)
+        'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_INTERVAL': 60},
+    },
 }
 
+# Сколько секунд живут маркеры свежести и версии карточек. Истёкший
+# маркер создаётся заново: страница один раз рендерится целиком.
+FRESHNESS_TIMEOUT = 60 * 60
+
 RECORDS_PER_PAGE = 10
-AMOUNT_OF_SYMBOLS = 50
\ No newline at end of file
+AMOUNT_OF_SYMBOLS = 50
+
+# Лента подписок: сколько последних постов автора попадает в ленту при
+# подписке и с какого числа подписчиков посты автора не раскладываются
+# по лентам, а подмешиваются при чтении.
+TIMELINE_BACKFILL = 50
+TIMELINE_FANOUT_MAX_FOLLOWERS = 1000
+# С какого числа подписчиков раскладка поста уходит в фоновую задачу.
+TIMELINE_FANOUT_SYNC_MAX = 100
+
+# View, которые листаются курсором (?after=/?before=) без COUNT(*) и OFFSET,
+# например ['posts:index', 'posts:group_list', 'posts:follow_index'].
+CURSOR_PAGINATION_VIEWS = []
+
+# Сколько секунд отрендеренная карточка поста живёт в кэше (posts.cards).
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+# Превью картинок строятся в пуле потоков сразу после загрузки
+# (posts.thumbnails). THUMBNAIL_WORKERS = 0 — строить синхронно.
+# THUMBNAIL_USE_JOBS = True — строить превью новых постов в очереди
+# фоновых задач: она переживает перезапуск процесса, пул потоков — нет.
+THUMBNAIL_PRESETS = {
+    'post': ('960x339', {'crop': 'center', 'upscale': True}),
+    'avatar': ('60x60', {'crop': 'center'}),
+}
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_USE_JOBS = False
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+THUMBNAIL_CACHE = 'default'
+
+# Популярные посты (posts.popular): вес комментария вдвое падает за
+# POPULAR_HALF_LIFE секунд, оценки ниже POPULAR_MIN_SCORE обнуляются.
+# В общем кэше хранятся первые POPULAR_TOP_N постов ленты и каждой группы;
+# их пересчитывает периодическая задача posts.tasks.refresh_popular.
+POPULAR_HALF_LIFE = 12 * 60 * 60
+POPULAR_COMMENT_WEIGHT = 1.0
+POPULAR_MIN_SCORE = 0.05
+POPULAR_TOP_N = 100
+POPULAR_REFRESH_INTERVAL = 5 * 60
+
+# Сколько секунд набор подписок зрителя живёт в кэше (posts.follow_sets).
+# Подписка и отписка сбрасывают его сразу; срок лишь ограничивает
+# устаревание, если сброс разминулся с параллельным чтением.
+FOLLOW_SET_TIMEOUT = 60 * 60
+
+# Рекомендации «кого почитать» (posts.recommendations): сколько хранится
+# на пользователя и сколько показывается на странице.
+FOLLOW_SUGGESTIONS_TOP_K = 20
+FOLLOW_SUGGESTIONS_SHOWN = 5
+
+# Сколько комментариев отдаётся за раз на странице поста.
+COMMENTS_PER_PAGE = 20
+
+# Асинхронные read-only view (posts.async_views); включается в yatube/asgi.py.
+ASYNC_READ_VIEWS = os.environ.get('YATUBE_ASYNC_VIEWS', '') == '1'
+
+# Метрики Prometheus на /metrics (core.metrics). Каждый воркер сбрасывает
+# свои данные в METRICS_DIR не чаще раза в METRICS_FLUSH_INTERVAL секунд,
+# эндпоинт суммирует файлы всех процессов. Каталог нужен свой для каждого
+# сервиса, и очищать его при перезапуске должен сам запуск (например,
+# ExecStartPre в systemd). None — только текущий процесс.
+METRICS_ENABLED = True
+METRICS_DIR = os.environ.get('YATUBE_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
+# RSS/Atom (posts.feeds): число записей в ленте и сколько секунд готовый
+# XML хранится в кэше, если область ленты не менялась.
+SYNDICATION_ITEMS = 20
+SYNDICATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Загрузка картинок постов (posts.images): больше IMAGE_MAX_UPLOAD_SIZE
+# не принимается, остальное уменьшается до IMAGE_MAX_DIMENSION по большей
+# стороне и перекодируется в IMAGE_FORMAT без метаданных. Качество
+# снижается шагами, пока файл больше IMAGE_MAX_BYTES.
+IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+IMAGE_MAX_DIMENSION = 1920
+IMAGE_MAX_BYTES = 512 * 1024
+IMAGE_FORMAT = 'WEBP'
+IMAGE_QUALITY = 80